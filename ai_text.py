@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - AI文本生成
+提示词构建、后台线程执行（结果通过root.after回到Tk主线程）、超时与取消，
+以及用于离线测试的本地模拟客户端。
+"""
+
+import importlib.util
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+AI_MODEL = "glm-4-flash"
+
+# 只检查zhipuai是否已安装而不导入它（导入会连带加载httpx、pydantic等，明显拖慢启动）
+AI_AVAILABLE: bool = importlib.util.find_spec("zhipuai") is not None
+_zhipuai_class: Any = None
+
+# 可选的文本风格（"随机"表示每次随机选择一个具体风格）
+STYLE_OPTIONS = ["随机", "科技", "生活", "学习", "工作", "文学", "新闻", "故事", "哲理", "历史"]
+CONCRETE_STYLES = STYLE_OPTIONS[1:]
+
+
+def resolve_style(style: str) -> str:
+    """把"随机"风格替换为一个具体风格"""
+    if style == "随机":
+        return random.choice(CONCRETE_STYLES)
+    return style
+
+
+def build_prompt(language: str, style: str) -> list[dict[str, str]]:
+    """根据语言和具体风格构建对话消息"""
+    if language == "chinese":
+        system_prompt = f"请生成一段关于'{style}'主题的中文文本，适合打字练习使用。要求：1.长度在50-100字之间 2.语言流畅自然 3.包含常用汉字 4.避免生僻字词 5.内容积极正面 6.符合{style}主题特色"
+    else:
+        system_prompt = f"Please generate an English text about '{style}' suitable for typing practice. Requirements: 1.Length between 50-150 characters 2.Natural and fluent language 3.Use common words 4.Avoid complex vocabulary 5.Positive content 6.Match the {style} theme"
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"生成{style}主题的打字练习文本"}
+    ]
+
+
+def create_client(api_key: str) -> Any:
+    """首次使用AI功能时才导入zhipuai并创建客户端"""
+    global _zhipuai_class
+    if _zhipuai_class is None:
+        from zhipuai import ZhipuAI
+        _zhipuai_class = ZhipuAI
+    return _zhipuai_class(api_key=api_key)
+
+
+def generate_passage(client: Any, language: str, style: str) -> str:
+    """调用AI客户端生成一段练习文本（阻塞调用，应在后台线程中执行）"""
+    style = resolve_style(style)
+    response = client.chat.completions.create(
+        model=AI_MODEL,
+        messages=build_prompt(language, style),
+        max_tokens=200,
+        temperature=0.7
+    )
+    generated_text = response.choices[0].message.content
+    if not generated_text or not generated_text.strip():
+        raise ValueError("AI返回了空文本")
+    return generated_text.strip()
+
+
+class TaskHandle:
+    """后台任务句柄"""
+
+    def __init__(self, future: Future, timeout: float | None):
+        self.future = future
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.cancelled = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def cancel(self) -> None:
+        """取消任务：后台调用无法中断，但其结果会被丢弃，回调不再触发"""
+        self.cancelled = True
+
+    @property
+    def active(self) -> bool:
+        return not self.cancelled and not self.future.done()
+
+
+class BackgroundRunner:
+    """在守护线程中执行阻塞调用，并在Tk主线程中轮询结果、分发回调"""
+
+    def __init__(self, root: Any, poll_ms: int = 50):
+        self.root = root
+        self.poll_ms = poll_ms
+
+    def submit(self, func: Callable[[], Any],
+               on_success: Callable[[Any], None],
+               on_error: Callable[[Exception], None] | None = None,
+               timeout: float | None = None) -> TaskHandle:
+        """提交任务；回调只会在主线程中被调用一次，取消后不再调用"""
+        future: Future = Future()
+
+        def worker():
+            try:
+                result = func()
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        # 使用守护线程，网络请求卡住时不会阻止程序退出
+        threading.Thread(target=worker, daemon=True).start()
+        handle = TaskHandle(future, timeout)
+        self.root.after(self.poll_ms, self._poll, handle, on_success, on_error)
+        return handle
+
+    def _poll(self, handle: TaskHandle, on_success, on_error) -> None:
+        if handle.cancelled:
+            return
+        if handle.future.done():
+            handle.cancelled = True
+            error = handle.future.exception()
+            if error is None:
+                on_success(handle.future.result())
+            elif on_error is not None:
+                on_error(error)
+            return
+        if handle.timeout is not None and handle.elapsed >= handle.timeout:
+            handle.cancelled = True
+            if on_error is not None:
+                on_error(TimeoutError(f"请求超时（{handle.timeout:g}秒）"))
+            return
+        self.root.after(self.poll_ms, self._poll, handle, on_success, on_error)
+
+
+class FakeAIClient:
+    """本地模拟AI客户端，接口与ZhipuAI一致，可模拟慢响应和失败，用于离线测试"""
+
+    class _Message:
+        def __init__(self, content: str):
+            self.content = content
+
+    class _Choice:
+        def __init__(self, content: str):
+            self.message = FakeAIClient._Message(content)
+
+    class _Response:
+        def __init__(self, content: str):
+            self.choices = [FakeAIClient._Choice(content)]
+
+    def __init__(self, delay: float = 2.0, fail: bool = False, texts: list[str] | None = None):
+        self.delay = delay
+        self.fail = fail
+        self.texts = texts
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+        self._lock = threading.Lock()
+
+    def create(self, model: str, messages: list[dict[str, str]], **kwargs: Any) -> "_Response":
+        """模拟chat.completions.create"""
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("模拟的网络错误")
+        if self.texts:
+            return self._Response(self.texts[(call - 1) % len(self.texts)])
+        prompt = messages[-1]["content"] if messages else ""
+        return self._Response(f"Practice passage {call}: {prompt}. Keep typing steadily and accurately.")
+
+
+class PassagePool:
+    """按(语言, 风格)预取AI文本的队列，低于低水位时在后台自动补充"""
+
+    def __init__(self, client_getter: Callable[[], Any], capacity: int = 3, low_water: int = 1,
+                 generator: Callable[[Any, str, str], str] = generate_passage):
+        self.client_getter = client_getter
+        # capacity为0表示关闭预取
+        self.capacity = max(0, capacity)
+        self.low_water = max(0, min(low_water, self.capacity - 1))
+        self.generator = generator
+        self.hits = 0
+        self.misses = 0
+        self.last_error: Exception | None = None
+        self._queues: dict[tuple[str, str], list[str]] = {}
+        self._refilling: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+    def get(self, language: str, style: str) -> str | None:
+        """取出一段现成的文本；没有时返回None。取出后按需触发后台补充"""
+        key = (language, style)
+        with self._lock:
+            queue = self._queues.get(key)
+            text = queue.pop(0) if queue else None
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        self.prefetch(language, style)
+        return text
+
+    def size(self, language: str, style: str) -> int:
+        """当前可用的文本数量"""
+        with self._lock:
+            return len(self._queues.get((language, style), ()))
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def prefetch(self, language: str, style: str) -> None:
+        """数量不高于低水位时启动后台补充（每个键最多一个补充线程）；
+        客户端在补充线程中获取，创建客户端的开销不会落在调用方线程上"""
+        key = (language, style)
+        with self._lock:
+            if self.capacity == 0 or key in self._refilling or len(self._queues.get(key, ())) > self.low_water:
+                return
+            self._refilling.add(key)
+        threading.Thread(target=self._refill, args=(key,), daemon=True).start()
+
+    def clear(self) -> None:
+        """丢弃全部预取的文本（例如更换了API Key）"""
+        with self._lock:
+            self._queues.clear()
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """等待所有补充线程结束，主要用于测试"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._refilling, timeout)
+
+    def _refill(self, key: tuple[str, str]) -> None:
+        language, style = key
+        try:
+            while True:
+                with self._lock:
+                    if len(self._queues.get(key, ())) >= self.capacity:
+                        break
+                client = self.client_getter()
+                if client is None:
+                    break
+                try:
+                    text = self.generator(client, language, style)
+                except Exception as e:
+                    # 出错时停止本轮补充，下次取用时再尝试
+                    self.last_error = e
+                    break
+                with self._lock:
+                    self._queues.setdefault(key, []).append(text)
+        finally:
+            with self._idle:
+                self._refilling.discard(key)
+                self._idle.notify_all()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 外部文本库性能测试
+生成合成的JSONL文本库，测量首次建索引、再次打开（复用索引）和随机选取一段文本的耗时
+
+用法: python benchmarks/bench_corpus.py [--passages 1000000] [--picks 10000]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import CorpusPassageSource
+from passages import CHINESE_TEXTS, ENGLISH_TEXTS
+
+
+def write_corpus(path: str, count: int) -> None:
+    """用内置文本拼接出合成文本库"""
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            language = rng.choice(("english", "chinese"))
+            pool = ENGLISH_TEXTS if language == "english" else CHINESE_TEXTS
+            text = " ".join(rng.sample(pool, rng.randint(1, 3)))
+            item = {"text": text, "language": language, "difficulty": rng.randint(1, 5)}
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="外部文本库性能测试")
+    parser.add_argument("--passages", type=int, default=1_000_000, help="合成文本段数")
+    parser.add_argument("--picks", type=int, default=10_000, help="随机选取次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.jsonl")
+        start = time.perf_counter()
+        write_corpus(path, args.passages)
+        print(f"生成 {args.passages} 段文本: {time.perf_counter() - start:.1f} s, "
+              f"文件大小 {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        start = time.perf_counter()
+        source = CorpusPassageSource([path])
+        print(f"首次打开（建索引）: {time.perf_counter() - start:.2f} s, "
+              f"索引大小 {os.path.getsize(path + '.cidx') / 1024 / 1024:.1f} MB")
+        source.close()
+
+        start = time.perf_counter()
+        source = CorpusPassageSource([path])
+        print(f"再次打开（复用索引）: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        for language, difficulty in (("english", None), ("chinese", 3)):
+            samples = []
+            for _ in range(args.picks):
+                start = time.perf_counter_ns()
+                source.random_passage(language, difficulty)
+                samples.append((time.perf_counter_ns() - start) / 1000)
+            samples.sort()
+            print(f"随机选取 {language} 难度={difficulty}: 中位数 {statistics.median(samples):.1f} µs, "
+                  f"p99 {samples[int(len(samples) * 0.99)]:.1f} µs")
+        source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 历史记录存储性能测试
+生成大量合成记录，测量打开存储、追加一条记录和读取一页记录的耗时
+
+用法: python benchmarks/bench_history.py [--records 1000000] [--page-size 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore
+
+
+def synthetic_records(count: int):
+    """生成合成的测试结果"""
+    random.seed(0)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        language = random.choice(("english", "chinese"))
+        total = random.randint(40, 200)
+        correct = total - random.randint(0, 10)
+        yield {
+            "date": (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+            "wpm": random.randint(10, 150),
+            "accuracy": int(correct / total * 100),
+            "time": random.randint(10, 120),
+            "text_length": total,
+            "language": language,
+            "correct_chars": correct,
+            "total_chars": total,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="历史记录存储性能测试")
+    parser.add_argument("--records", type=int, default=1_000_000, help="合成记录条数")
+    parser.add_argument("--page-size", type=int, default=20, help="每页条数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "typing_history.jsonl")
+        store = HistoryStore(path, legacy_path=None)
+
+        start = time.perf_counter()
+        store.extend(synthetic_records(args.records))
+        print(f"生成 {args.records} 条记录: {time.perf_counter() - start:.1f} s, "
+              f"文件大小 {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        start = time.perf_counter()
+        store = HistoryStore(path, legacy_path=None)
+        print(f"打开存储: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        for page_number in (0, store.page_count(args.page_size) // 2, store.page_count(args.page_size) - 1):
+            start = time.perf_counter()
+            records = store.page(page_number, args.page_size)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"读取第 {page_number + 1} 页 ({len(records)} 条): {elapsed:.2f} ms")
+
+        start = time.perf_counter()
+        store.append(next(synthetic_records(1)))
+        print(f"追加一条记录: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
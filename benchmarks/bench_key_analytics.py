@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键分析性能测试
+生成合成的按键日志，测量从全部日志重新统计（含读取文件）和单次测试增量合并的耗时
+
+用法: python benchmarks/bench_key_analytics.py [--sessions 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import key_analytics
+from key_analytics import KeyAnalytics, summarize
+from passages import CHINESE_TEXTS, ENGLISH_TEXTS
+from session import TypingSession
+
+
+def synthetic_log(rng: random.Random):
+    """模拟一次带错误和退格的测试"""
+    language = rng.choice(("english", "chinese"))
+    text = rng.choice(ENGLISH_TEXTS if language == "english" else CHINESE_TEXTS)
+    session = TypingSession(text, language)
+    session.start(0)
+    now = 0
+    typed = ""
+    while len(typed) < len(text):
+        now += rng.randint(60_000_000, 350_000_000)
+        roll = rng.random()
+        if roll < 0.04 and typed:
+            typed = typed[:-1]
+        elif roll < 0.10:
+            typed += rng.choice("asdfjkl")
+        else:
+            typed += text[len(typed)]
+        session.process(typed, (now,))
+    return session.keystroke_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按键分析性能测试")
+    parser.add_argument("--sessions", type=int, default=10_000, help="合成的测试次数")
+    parser.add_argument("--distinct", type=int, default=200, help="实际生成的不同日志数（其余重复使用）")
+    args = parser.parse_args()
+
+    print(f"numpy: {'可用' if key_analytics.NUMPY_AVAILABLE else '不可用（纯Python实现）'}")
+    rng = random.Random(0)
+    distinct = [synthetic_log(rng) for _ in range(min(args.distinct, args.sessions))]
+    logs = [distinct[i % len(distinct)] for i in range(args.sessions)]
+    events = sum(len(log) for log in logs)
+
+    start = time.perf_counter()
+    summarize(logs)
+    print(f"统计 {args.sessions} 次测试（{events} 个事件，内存中）: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        records = []
+        for i, log in enumerate(logs):
+            path = os.path.join(tmp, f"{i}.ksl")
+            log.save(path)
+            records.append({"keystroke_file": path})
+
+        start = time.perf_counter()
+        analytics = KeyAnalytics.from_history(records)
+        print(f"从 {args.sessions} 个日志文件重新统计: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    analytics.add_log(distinct[0])
+    print(f"增量合并一次测试: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键日志性能测试
+测量输入处理器中每次按键的采集开销、每帧编辑记录开销以及二进制文件的读写速度
+
+用法: python benchmarks/bench_keystroke_log.py [--events 200000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keystroke_log import KeystrokeLog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按键日志性能测试")
+    parser.add_argument("--events", type=int, default=200_000, help="模拟按键次数")
+    args = parser.parse_args()
+    n = args.events
+
+    # 1. 输入处理器中的采集：只追加一个perf_counter_ns时间戳
+    pending = array("q")
+    clock = time.perf_counter_ns
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        pending.append(clock())
+    capture_ns = (time.perf_counter_ns() - start) / n
+
+    # 2. 每帧把编辑拆分为逐字符事件并写入列缓冲区
+    text = ("the quick brown fox jumps over the lazy dog " * (n // 44 + 1))[:n]
+    log = KeystrokeLog(text)
+    log.reset(pending[0], text)
+    start = time.perf_counter_ns()
+    for i in range(n):
+        log.record_edit("", i, 0, text[i], pending[i:i + 1])
+    record_ns = (time.perf_counter_ns() - start) / n
+
+    # 3. 文件读写
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.ksl")
+        start = time.perf_counter()
+        log.save(path)
+        save_s = time.perf_counter() - start
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        loaded = KeystrokeLog.load(path)
+        load_s = time.perf_counter() - start
+        assert len(loaded) == len(log) and loaded.target_text == text
+
+    print(f"事件数: {n}")
+    print(f"按键采集: {capture_ns:.0f} ns/事件")
+    print(f"编辑记录: {record_ns:.0f} ns/事件")
+    print(f"文件大小: {size / 1024:.1f} KB ({(size - len(text.encode())) / n:.1f} 字节/事件)")
+    print(f"写入: {save_s * 1000:.1f} ms, 读取: {load_s * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
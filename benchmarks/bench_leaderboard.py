@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 排行榜服务器压力测试
+在子进程中启动leaderboard.py（临时数据库，本机随机端口），
+用asyncio模拟数百个同时在线的客户端：每个客户端保持一个长连接，
+提交若干条结果，并穿插排行榜和个人记录查询。
+输出提交/查询的p50/p95/p99延迟和吞吐量，最后核对写入数据库的条数。
+
+用法: python benchmarks/bench_leaderboard.py [--clients 300] [--posts 20] [--read-ratio 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "无数据"
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return f"p50 {pick(0.5):.2f} | p95 {pick(0.95):.2f} | p99 {pick(0.99):.2f} | 最大 {ordered[-1]:.2f} ms"
+
+
+class Connection:
+    """一个HTTP/1.1长连接"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, port: int) -> "Connection":
+        return cls(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def request(self, method: str, path: str, data: dict | None = None) -> tuple[int, dict]:
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+async def run_client(index: int, port: int, posts: int, read_ratio: float, think_ms: float,
+                     latencies: dict[str, list[float]], errors: list[str]) -> None:
+    """模拟一个客户端：提交结果并偶尔查询"""
+    rng = random.Random(index)
+    user = f"student{index:04d}"
+    try:
+        connection = await Connection.open(port)
+    except OSError as e:
+        errors.append(str(e))
+        return
+    try:
+        for _ in range(posts):
+            if think_ms:
+                await asyncio.sleep(rng.uniform(0, think_ms) / 1000)
+            if rng.random() < read_ratio:
+                kind = "leaderboard" if rng.random() < 0.5 else "user"
+                path = "/leaderboard?language=english&limit=20" if kind == "leaderboard" else f"/users/{user}?limit=20"
+                start = time.perf_counter()
+                status, _ = await connection.request("GET", path)
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+                if status != 200:
+                    errors.append(f"GET {path}: {status}")
+            result = {
+                "user": user,
+                "language": rng.choice(("english", "chinese")),
+                "wpm": rng.randint(20, 140),
+                "accuracy": rng.randint(80, 100),
+                "time": rng.randint(20, 120),
+                "text_length": rng.randint(100, 500),
+            }
+            start = time.perf_counter()
+            status, _ = await connection.request("POST", "/results", result)
+            latencies["post"].append((time.perf_counter() - start) * 1000)
+            if status != 202:
+                errors.append(f"POST: {status}")
+    except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+        errors.append(f"{user}: {e}")
+    finally:
+        connection.close()
+
+
+async def wait_for_server(port: int, timeout: float = 10) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            connection = await Connection.open(port)
+            connection.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def load_test(args, port: int) -> dict:
+    await wait_for_server(port)
+    latencies: dict[str, list[float]] = {"post": [], "leaderboard": [], "user": []}
+    errors: list[str] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(i, port, args.posts, args.read_ratio, args.think_ms, latencies, errors)
+        for i in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    # 等待队列中的结果全部写入
+    connection = await Connection.open(port)
+    try:
+        while True:
+            _, health = await connection.request("GET", "/health")
+            if health["written"] >= health["received"]:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        connection.close()
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed, "health": health}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="排行榜服务器压力测试")
+    parser.add_argument("--clients", type=int, default=300, help="同时在线的客户端数")
+    parser.add_argument("--posts", type=int, default=20, help="每个客户端提交的结果数")
+    parser.add_argument("--read-ratio", type=float, default=0.2, help="每次提交前穿插一次查询的概率")
+    parser.add_argument("--think-ms", type=float, default=0, help="两次请求之间的随机等待上限（毫秒）")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmp.name, "leaderboard.db")
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "leaderboard.py"), "--host", "127.0.0.1", "--port", str(port),
+         "--db", db_path],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        report = asyncio.run(load_test(args, port))
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    import sqlite3
+    with sqlite3.connect(db_path) as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    tmp.cleanup()
+
+    latencies = report["latencies"]
+    requests = sum(len(values) for values in latencies.values())
+    expected = args.clients * args.posts
+    health = report["health"]
+    print(f"客户端: {args.clients}, 每个提交 {args.posts} 条, 查询比例 {args.read_ratio:g}")
+    print(f"总耗时: {report['elapsed']:.2f} s, {requests / report['elapsed']:,.0f} 请求/秒"
+          f", {len(latencies['post']) / report['elapsed']:,.0f} 提交/秒")
+    print(f"提交延迟: {percentiles(latencies['post'])}")
+    print(f"排行榜查询: {percentiles(latencies['leaderboard'])}")
+    print(f"个人记录查询: {percentiles(latencies['user'])}")
+    print(f"批量写入: {health['batches']} 批，平均每批 {health['written'] / max(1, health['batches']):.0f} 条")
+    print(f"数据库记录: {stored} / {expected} {'✅' if stored == expected else '❌'}")
+    if report["errors"]:
+        print(f"❌ {len(report['errors'])} 个错误，例如: {report['errors'][:3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 计分引擎性能测试
+无需图形界面，模拟在长文本上逐字输入，对比增量计分与全量重扫的单次按键耗时
+
+用法: python benchmarks/bench_scoring.py [--length 100000] [--keystrokes 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import ScoringEngine
+
+
+def full_rescan(user_input: str, target_text: str) -> int:
+    """旧版calculate_stats的全量比对方式"""
+    correct = 0
+    for i in range(min(len(user_input), len(target_text))):
+        if user_input[i] == target_text[i]:
+            correct += 1
+    return correct
+
+
+def make_text(length: int) -> str:
+    """生成指定长度的随机英文文本"""
+    words = ["typing", "speed", "python", "keyboard", "practice", "accuracy", "the", "quick", "fox"]
+    parts = []
+    size = 0
+    while size < length:
+        word = random.choice(words)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)[:length]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计分引擎性能测试")
+    parser.add_argument("--length", type=int, default=100_000, help="文本长度")
+    parser.add_argument("--keystrokes", type=int, default=5000, help="模拟按键次数（在文本末尾附近）")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="输入错误率")
+    args = parser.parse_args()
+
+    random.seed(0)
+    target = make_text(args.length)
+    # 从文本末尾附近开始输入，最能体现全量重扫的开销
+    prefix = target[:max(0, args.length - args.keystrokes)]
+    inputs = []
+    current = prefix
+    for i in range(len(prefix), min(args.length, len(prefix) + args.keystrokes)):
+        ch = target[i] if random.random() >= args.error_rate else "#"
+        current += ch
+        inputs.append(current)
+
+    engine = ScoringEngine(target)
+    engine.update(prefix)
+    start = time.perf_counter()
+    for text in inputs:
+        engine.update(text)
+    incremental = (time.perf_counter() - start) / len(inputs)
+
+    sample = inputs[::max(1, len(inputs) // 200)]
+    start = time.perf_counter()
+    for text in sample:
+        full_rescan(text, target)
+    rescan = (time.perf_counter() - start) / len(sample)
+
+    assert engine.correct_chars == full_rescan(inputs[-1], target)
+
+    print(f"文本长度: {args.length} 字符, 模拟按键: {len(inputs)} 次")
+    print(f"增量计分: {incremental * 1e6:.2f} µs/按键")
+    print(f"全量重扫: {rescan * 1e6:.2f} µs/按键")
+    print(f"加速比: {rescan / incremental:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
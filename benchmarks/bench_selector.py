@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按难度/薄弱字符选取文本的性能测试
+在合成的JSONL文本库上测量特征文件的生成和加载耗时，以及按难度、按薄弱字符选取的耗时；
+并与逐段循环的纯Python评分比较。
+
+用法: python benchmarks/bench_selector.py [--passages 1000000] [--picks 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import passage_selector
+from bench_corpus import write_corpus
+from corpus import CorpusFile
+from passage_selector import FeatureTable, PassageSelector, char_weights
+
+WEAK_CHARS = {"z": 1.0, "q": 0.8, "x": 0.6, "th": 0.5, "练": 1.0, "熟": 0.7}
+
+
+def timed(func, repeat: int) -> float:
+    """重复调用，返回中位数耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def python_weakness_scores(table: FeatureTable, weights: dict[str, float]) -> list[float]:
+    """逐段循环计算薄弱字符得分，作为对照"""
+    columns = passage_selector.ASCII_COLUMNS
+    ascii_weights = {passage_selector.ascii_column(char): weight for char, weight in weights.items()
+                     if passage_selector.ascii_column(char) is not None}
+    other_weights = {ord(char): weight for char, weight in weights.items()
+                     if passage_selector.ascii_column(char) is None}
+    ascii_counts = bytes(table.ascii_counts)
+    offsets = list(table.char_offsets)
+    codes = list(table.char_codes)
+    counts = bytes(table.char_counts)
+    lengths = list(table.lengths)
+    scores = []
+    for entry in range(table.count):
+        base = entry * columns
+        total = 0.0
+        for column, weight in ascii_weights.items():
+            total += ascii_counts[base + column] * weight
+        for i in range(offsets[entry], offsets[entry + 1]):
+            total += counts[i] * other_weights.get(codes[i], 0.0)
+        scores.append(total / max(lengths[entry], 1))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按难度/薄弱字符选取文本的性能测试")
+    parser.add_argument("--passages", type=int, default=1_000_000, help="合成文本段数")
+    parser.add_argument("--picks", type=int, default=200, help="每种选取方式的次数")
+    parser.add_argument("--skip-python", action="store_true", help="跳过纯Python对照（百万段时需要数十秒）")
+    args = parser.parse_args()
+
+    print(f"numpy: {'可用' if passage_selector.NUMPY_AVAILABLE else '不可用（纯Python实现）'}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.jsonl")
+        write_corpus(path, args.passages)
+        corpus = CorpusFile(path)
+
+        start = time.perf_counter()
+        FeatureTable.from_corpus(corpus).close()
+        print(f"生成特征文件: {time.perf_counter() - start:.1f} s, "
+              f"大小 {os.path.getsize(path + '.cfeat') / 1024 / 1024:.1f} MB")
+
+        start = time.perf_counter()
+        table = FeatureTable.from_corpus(corpus)
+        print(f"加载特征文件: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        selector = PassageSelector([table])
+        print(f"首次按难度选取（含筛选）: {timed(lambda: selector.select('english', 3), 1):.2f} ms")
+        print(f"按难度选取（候选已缓存）: {timed(lambda: selector.select('english', 3), args.picks):.3f} ms")
+        print(f"按薄弱字符选取: {timed(lambda: selector.select('english', weak_chars=WEAK_CHARS), args.picks // 10 or 1):.1f} ms")
+        print(f"按难度+薄弱字符选取: "
+              f"{timed(lambda: selector.select('chinese', 2, weak_chars=WEAK_CHARS), args.picks // 10 or 1):.1f} ms")
+
+        if not args.skip_python:
+            weights = char_weights(WEAK_CHARS)
+            print(f"纯Python逐段评分（对照）: "
+                  f"{timed(lambda: python_weakness_scores(table, weights), 1):.0f} ms")
+        selector.close()
+        corpus.close()
+
+
+if __name__ == "__main__":
+    main()
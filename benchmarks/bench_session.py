@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 会话引擎吞吐量测试
+不创建任何窗口，直接驱动TypingSession模拟完整测试（计分 + 按键日志），
+可在无显示器的Linux服务器上运行。
+
+用法: python benchmarks/bench_session.py [--sessions 200] [--length 2000] [--error-rate 0.05]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passages import ENGLISH_TEXTS
+from session import TypingSession
+
+
+def run_session(text: str, error_rate: float, wpm: int) -> dict:
+    """模拟一名打字者逐字输入并偶尔退格纠错"""
+    session = TypingSession(text, "english")
+    session.start(0)
+    interval_ns = int(60e9 / (wpm * 5))
+    now = 0
+    typed = ""
+    while len(typed) < len(text):
+        now += interval_ns
+        if random.random() < error_rate:
+            typed += "#"
+            session.process(typed, (now,))
+            now += interval_ns
+            typed = typed[:-1]
+            session.process(typed, (now,))
+            continue
+        typed += text[len(typed)]
+        session.process(typed, (now,))
+    return session.finish(now)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话引擎吞吐量测试")
+    parser.add_argument("--sessions", type=int, default=200, help="模拟测试次数")
+    parser.add_argument("--length", type=int, default=2000, help="每次测试的文本长度")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="错误率")
+    parser.add_argument("--wpm", type=int, default=80, help="模拟打字速度")
+    args = parser.parse_args()
+
+    random.seed(0)
+    base = " ".join(ENGLISH_TEXTS)
+    text = (base * (args.length // len(base) + 1))[:args.length]
+
+    keystrokes = 0
+    start = time.perf_counter()
+    for _ in range(args.sessions):
+        result = run_session(text, args.error_rate, args.wpm)
+        keystrokes += result["total_chars"]
+    elapsed = time.perf_counter() - start
+
+    print(f"测试次数: {args.sessions}, 文本长度: {args.length}")
+    print(f"总耗时: {elapsed:.2f} s ({args.sessions / elapsed:.1f} 次测试/秒)")
+    print(f"单次处理: {elapsed / keystrokes * 1e6:.2f} µs/按键")
+    print(f"最后一次结果: WPM {result['wpm']}, 准确率 {result['accuracy']}%")
+
+
+if __name__ == "__main__":
+    main()
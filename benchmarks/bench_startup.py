@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 启动性能测试
+多次冷启动 main.py（或打包后的可执行文件），记录:
+  - 逐模块导入耗时（python -X importtime）
+  - TypingSpeedTest.__init__ 完成、首次空闲、首次绘制的时间
+结果写入JSON文件，并与保存的基线比较，超过阈值时以非零状态码退出。
+Linux上没有DISPLAY时自动启动Xvfb虚拟显示。
+
+用法:
+    python benchmarks/bench_startup.py [--runs 5] [--exe dist/打字速度检测器/打字速度检测器]
+    python benchmarks/bench_startup.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "startup_latest.json")
+METRICS = ("imports_ms", "init_ms", "first_idle_ms", "first_paint_ms", "wall_ms")
+
+
+def start_virtual_display() -> subprocess.Popen | None:
+    """Linux下没有显示器时启动Xvfb"""
+    if not sys.platform.startswith("linux") or os.environ.get("DISPLAY"):
+        return None
+    if shutil.which("Xvfb") is None:
+        sys.exit("❌ 没有可用的DISPLAY，且找不到Xvfb，请先安装: apt install xvfb")
+    display = ":99"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """解析 -X importtime 输出，返回顶层模块的累计导入耗时（毫秒）"""
+    modules: dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue
+        name = parts[2].rstrip()
+        # 缩进表示被其他模块间接导入，只统计顶层导入
+        if not name.startswith("  ") and name.strip():
+            modules[name.strip()] = cumulative_us / 1000
+    return modules
+
+
+def run_once(command: list[str], timeout: float) -> dict:
+    """冷启动一次并读取程序写出的启动耗时"""
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "startup.json")
+        start = time.perf_counter()
+        completed = subprocess.run(
+            command + ["--startup-json", json_path, "--exit-after-startup"],
+            cwd=tmp, capture_output=True, text=True, timeout=timeout
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if completed.returncode != 0 or not os.path.exists(json_path):
+            raise RuntimeError(f"启动失败 (返回码 {completed.returncode}):\n{completed.stderr[-2000:]}")
+        with open(json_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    result["wall_ms"] = wall_ms
+    result["modules"] = parse_importtime(completed.stderr)
+    return result
+
+
+def summarize(runs: list[dict]) -> dict:
+    """取各指标的中位数"""
+    summary = {metric: statistics.median(run[metric] for run in runs) for metric in METRICS}
+    module_names = set().union(*(run["modules"] for run in runs))
+    modules = {
+        name: statistics.median(run["modules"].get(name, 0.0) for run in runs)
+        for name in module_names
+    }
+    summary["modules"] = dict(sorted(modules.items(), key=lambda item: item[1], reverse=True))
+    return summary
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """与基线比较，返回回退项说明"""
+    regressions = []
+    for metric in METRICS:
+        if metric not in baseline:
+            continue
+        old, new = baseline[metric], current[metric]
+        if new > old * (1 + threshold) and new - old > min_delta_ms:
+            regressions.append(f"{metric}: {old:.1f} ms -> {new:.1f} ms (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动性能测试")
+    parser.add_argument("--runs", type=int, default=5, help="冷启动次数")
+    parser.add_argument("--exe", help="测试打包后的可执行文件，而不是 python main.py")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果JSON文件")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线JSON文件")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的相对回退比例")
+    parser.add_argument("--min-delta", type=float, default=20.0, help="忽略小于该值(ms)的回退")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单次启动超时(秒)")
+    args = parser.parse_args()
+
+    if args.exe:
+        target = "exe"
+        command = [os.path.abspath(args.exe)]
+    else:
+        target = "source"
+        command = [sys.executable, "-X", "importtime", os.path.join(ROOT, "main.py")]
+
+    xvfb = start_virtual_display()
+    try:
+        runs = [run_once(command, args.timeout) for _ in range(args.runs)]
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    summary = summarize(runs)
+    report = {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "target": target,
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "runs": args.runs,
+        "summary": summary,
+        "raw": runs,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"📊 启动耗时（{target}，{args.runs} 次中位数）")
+    for metric in METRICS:
+        print(f"   {metric}: {summary[metric]:.1f} ms")
+    print("   导入最慢的模块:")
+    for name, ms in list(summary["modules"].items())[:8]:
+        print(f"     {name}: {ms:.1f} ms")
+    print(f"✅ 结果已写入 {args.output}")
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+
+    if args.update_baseline:
+        baselines[target] = {metric: summary[metric] for metric in METRICS}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+        print(f"✅ 基线已更新: {args.baseline}")
+        return
+
+    if target not in baselines:
+        print("⚠️  没有基线，使用 --update-baseline 创建")
+        return
+    regressions = compare(summary, baselines[target], args.threshold, args.min_delta)
+    if regressions:
+        print("❌ 启动性能回退:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print("✅ 未发现启动性能回退")
+
+
+if __name__ == "__main__":
+    main()
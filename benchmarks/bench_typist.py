@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 模拟打字者按键延迟测试
+创建真实的TypingSpeedTest窗口，用event_generate按设定的速度和错误率逐键输入（错误后退格改正），
+对每种文本长度记录:
+  - handler_ms:      每次输入处理（process_input，包括计分和高亮）的耗时
+  - calculate_ms / highlight_ms: 其中计分和高亮各自的耗时
+  - key_latency_ms:  按键发生到该按键被处理完的时间（包括按帧合并的等待）
+  - loop_lag_ms:     每10ms一次的心跳定时器的延迟，反映事件循环是否被阻塞
+输出p50/p95/p99，并把结果写入JSON文件，便于跨版本跟踪。
+Linux上没有DISPLAY时自动启动Xvfb虚拟显示。
+
+用法:
+    python benchmarks/bench_typist.py [--wpm 120] [--error-rate 0.03] [--lengths 200,2000,20000,50000]
+    python benchmarks/bench_typist.py --label v1.2 --output benchmarks/results/typist_v1.2.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_startup import start_virtual_display
+from passages import ENGLISH_TEXTS
+
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results", "typist_latest.json")
+HEARTBEAT_MS = 10
+
+# 字符对应的keysym；其余字符（如汉字）模拟输入法直接插入
+KEYSYMS = {
+    " ": "space", "\n": "Return", ".": "period", ",": "comma", "'": "apostrophe", "-": "minus",
+    ";": "semicolon", ":": "colon", "!": "exclam", "?": "question", "(": "parenleft", ")": "parenright",
+    '"': "quotedbl", "/": "slash",
+}
+# 需要按住Shift的字符
+SHIFTED = set('!?:"()')
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50/p95/p99、平均值和最大值"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": ordered[-1],
+    }
+
+
+def make_passage(length: int, rng: random.Random, line_length: int = 0) -> str:
+    """拼接内置英文文本到指定长度；line_length大于0时每隔约该长度换行"""
+    parts = []
+    size = 0
+    while size < length:
+        text = rng.choice(ENGLISH_TEXTS)
+        parts.append(text)
+        size += len(text) + 1
+    passage = " ".join(parts)[:length]
+    if line_length > 0:
+        chars = list(passage)
+        for i in range(line_length, len(chars), line_length):
+            # 在最近的空格处换行
+            j = passage.rfind(" ", i - line_length, i)
+            if j > 0:
+                chars[j] = "\n"
+        passage = "".join(chars)
+    return passage
+
+
+class SyntheticTypist:
+    """按固定节奏向输入框发送按键"""
+
+    def __init__(self, app, text: str, wpm: float, error_rate: float, rng: random.Random):
+        self.app = app
+        self.root = app.root
+        # CTkTextbox内部的tk.Text，按键绑定实际在它上面
+        self.widget = getattr(app.input_textbox, "_textbox", app.input_textbox)
+        self.interval = 60.0 / (wpm * 5)
+        self.keys: list[str] = []
+        for char in text:
+            if char != "\n" and rng.random() < error_rate:
+                wrong = rng.choice([c for c in "qxzj" if c != char])
+                self.keys.extend((wrong, "BackSpace"))
+            self.keys.append(char)
+        self.sent = 0
+        self.on_done = None
+
+    def start(self, on_done) -> None:
+        self.on_done = on_done
+        self.origin = time.perf_counter()
+        self.root.after(0, self._send)
+
+    def _send(self) -> None:
+        key = self.keys[self.sent]
+        self.press(key)
+        self.sent += 1
+        if self.sent >= len(self.keys):
+            # 等待最后一帧处理完成
+            self.root.after(250, self.on_done)
+            return
+        target = self.origin + self.sent * self.interval
+        self.root.after(max(0, round((target - time.perf_counter()) * 1000)), self._send)
+
+    def press(self, key: str) -> None:
+        if key == "BackSpace":
+            keysym, state = "BackSpace", 0
+        elif len(key) == 1 and key.isascii() and key.isalnum():
+            keysym, state = key, 1 if key.isupper() else 0
+        elif key in KEYSYMS:
+            keysym, state = KEYSYMS[key], 1 if key in SHIFTED else 0
+        else:
+            # 没有对应按键的字符：像输入法上屏一样直接插入，并按一次按键记录时间
+            self.widget.insert("insert", key)
+            self.app.input_scheduler.mark_dirty(time.perf_counter_ns())
+            self.widget.event_generate("<KeyRelease>", keysym="Return")
+            return
+        self.widget.event_generate("<KeyPress>", keysym=keysym, state=state)
+        self.widget.event_generate("<KeyRelease>", keysym=keysym, state=state)
+
+
+SAMPLE_NAMES = ("handler_ms", "calculate_ms", "highlight_ms", "key_latency_ms", "loop_lag_ms", "tcl_calls")
+
+
+def instrument(app, samples: dict[str, list[float]]) -> None:
+    """包装输入处理链路，记录各环节耗时。只能调用一次：再次包装会把上一层包装也计入耗时，
+    各长度之间通过清空samples中的列表重新计数"""
+    process_input = app.process_input
+    calculate_stats = app.calculate_stats
+    highlight_text = app.highlight_text
+
+    def timed_process(keystroke_times):
+        start = time.perf_counter()
+        process_input(keystroke_times)
+        end = time.perf_counter()
+        samples["handler_ms"].append((end - start) * 1000)
+        end_ns = end * 1e9
+        for timestamp in keystroke_times:
+            samples["key_latency_ms"].append((end_ns - timestamp) / 1e6)
+
+    def timed_calculate(*args):
+        start = time.perf_counter()
+        calculate_stats(*args)
+        samples["calculate_ms"].append((time.perf_counter() - start) * 1000)
+
+    def timed_highlight():
+        start = time.perf_counter()
+        highlight_text()
+        samples["highlight_ms"].append((time.perf_counter() - start) * 1000)
+        samples["tcl_calls"].append(app.highlighter.last_render_calls)
+
+    app.input_scheduler.callback = timed_process
+    app.calculate_stats = timed_calculate
+    app.highlight_text = timed_highlight
+
+
+def run_length(app, samples: dict[str, list[float]], length: int, args, rng: random.Random) -> dict:
+    """用一段指定长度的文本完成一次测试"""
+    text = make_passage(length, rng, args.line_length)
+    app.current_text = text
+    app.current_language = "english"
+    app.reset_test()
+    # 丢弃reset_test及上一个长度留下的样本
+    for values in samples.values():
+        values.clear()
+    app.input_textbox.focus_force()
+    app.root.update()
+
+    typist = SyntheticTypist(app, text, args.wpm, args.error_rate, rng)
+    done = [False]
+    heartbeat_origin = time.perf_counter()
+    beats = [0]
+
+    def heartbeat():
+        if done[0]:
+            return
+        now = time.perf_counter()
+        target = heartbeat_origin + beats[0] * HEARTBEAT_MS / 1000
+        samples["loop_lag_ms"].append(max(0.0, (now - target) * 1000))
+        beats[0] = max(beats[0] + 1, int((now - heartbeat_origin) * 1000 / HEARTBEAT_MS) + 1)
+        next_target = heartbeat_origin + beats[0] * HEARTBEAT_MS / 1000
+        app.root.after(max(0, round((next_target - time.perf_counter()) * 1000)), heartbeat)
+
+    def finish():
+        done[0] = True
+        app.root.quit()
+
+    start = time.perf_counter()
+    typist.start(finish)
+    app.root.after(0, heartbeat)
+    app.root.mainloop()
+    duration = time.perf_counter() - start
+
+    typed = app.input_textbox.get("1.0", "end").rstrip("\n")
+    tcl_calls = samples["tcl_calls"]
+    result = {
+        "length": length,
+        "keys": len(typist.keys),
+        "duration_s": duration,
+        "completed": typed == text,
+        "tcl_calls_per_render": sum(tcl_calls) / len(tcl_calls) if tcl_calls else 0,
+        "window_moves": app.highlighter.window_moves,
+    }
+    result.update({name: percentiles(values) for name, values in samples.items() if name != "tcl_calls"})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟打字者按键延迟测试")
+    parser.add_argument("--wpm", type=float, default=120, help="模拟打字速度（英文WPM）")
+    parser.add_argument("--error-rate", type=float, default=0.03, help="每个字符打错一次再退格改正的概率")
+    parser.add_argument("--lengths", default="200,2000,20000,50000", help="逗号分隔的文本长度")
+    parser.add_argument("--line-length", type=int, default=0, help="大于0时每隔约该长度换行，测试多行文本")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--label", default="", help="写入结果的版本标签")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果JSON文件")
+    args = parser.parse_args()
+    lengths = [int(value) for value in args.lengths.split(",") if value.strip()]
+
+    xvfb = start_virtual_display()
+    # 在临时目录中运行，历史记录、按键日志和配置不影响真实数据
+    previous_cwd = os.getcwd()
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    try:
+        import main as app_module
+        app = app_module.TypingSpeedTest()
+        # 不弹出测试报告（模态窗口会抢占输入焦点）
+        app.show_test_report = lambda *args: None
+        samples: dict[str, list[float]] = {name: [] for name in SAMPLE_NAMES}
+        instrument(app, samples)
+        rng = random.Random(args.seed)
+        results = []
+        for length in lengths:
+            result = run_length(app, samples, length, args, rng)
+            results.append(result)
+            print(f"📊 长度 {length}（{result['keys']} 次按键，{'完成' if result['completed'] else '未完整输入'}）")
+            for name in ("handler_ms", "highlight_ms", "key_latency_ms", "loop_lag_ms"):
+                stats = result[name]
+                if stats["count"]:
+                    print(f"   {name}: p50 {stats['p50']:.2f} | p95 {stats['p95']:.2f} | p99 {stats['p99']:.2f} | max {stats['max']:.2f}")
+            print(f"   每次渲染Tcl调用: {result['tcl_calls_per_render']:.1f}")
+        tk_version = app.root.tk.call("info", "patchlevel")
+        app.root.destroy()
+    finally:
+        os.chdir(previous_cwd)
+        tmp.cleanup()
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "label": args.label,
+        "python": sys.version.split()[0],
+        "tk": str(tk_version),
+        "platform": sys.platform,
+        "wpm": args.wpm,
+        "error_rate": args.error_rate,
+        "line_length": args.line_length,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@
 使用PyInstaller将程序打包为可执行文件
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -31,9 +32,37 @@ def install_pyinstaller():
         print("❌ PyInstaller安装失败")
         return False
 
-def create_spec_file():
+APP_NAME = '打字速度检测器'
+SPEC_FILE = 'typing_speed_test.spec'
+
+# 程序用不到的标准库和第三方模块，排除后可减小体积、加快解包和导入
+EXCLUDES = [
+    'unittest', 'doctest', 'pydoc', 'pydoc_data', 'pdb',
+    'test', 'tkinter.test', 'lib2to3', 'idlelib', 'turtle', 'turtledemo',
+    'distutils', 'setuptools', 'pip', 'ensurepip', 'venv',
+    'xmlrpc', 'ftplib', 'imaplib', 'poplib', 'smtplib', 'telnetlib', 'nntplib',
+    'curses', 'dbm', 'mailbox',
+    'IPython', 'matplotlib', 'pytest',
+]
+
+# 打包方案：onefile每次启动都要先解压到临时目录，onedir直接从目录加载，启动最快
+VARIANTS = {
+    'onefile-upx': {'onedir': False, 'upx': True},
+    'onefile': {'onedir': False, 'upx': False},
+    'onedir': {'onedir': True, 'upx': False},
+}
+
+
+def exe_filename():
+    """当前平台下可执行文件的文件名"""
+    return APP_NAME + ('.exe' if sys.platform == 'win32' else '')
+
+
+def create_spec_file(onedir=False, upx=True, excludes=None):
     """创建PyInstaller配置文件"""
-    spec_content = '''# -*- mode: python ; coding: utf-8 -*-
+    excludes = EXCLUDES if excludes is None else excludes
+    upx_flag = 'True' if upx else 'False'
+    spec_content = f'''# -*- mode: python ; coding: utf-8 -*-
 
 block_cipher = None
 
@@ -44,9 +73,9 @@ a = Analysis(
     datas=[],
     hiddenimports=['customtkinter', 'zhipuai', 'requests'],
     hookspath=[],
-    hooksconfig={},
+    hooksconfig={{}},
     runtime_hooks=[],
-    excludes=[],
+    excludes={excludes!r},
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -54,7 +83,41 @@ a = Analysis(
 )
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
+'''
+    if onedir:
+        spec_content += f'''
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='{APP_NAME}',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx={upx_flag},
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=None,
+)
 
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip=False,
+    upx={upx_flag},
+    upx_exclude=[],
+    name='{APP_NAME}',
+)
+'''
+    else:
+        spec_content += f'''
 exe = EXE(
     pyz,
     a.scripts,
@@ -62,11 +125,11 @@ exe = EXE(
     a.zipfiles,
     a.datas,
     [],
-    name='打字速度检测器',
+    name='{APP_NAME}',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx={upx_flag},
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -79,11 +142,12 @@ exe = EXE(
 )
 '''
     
-    with open('typing_speed_test.spec', 'w', encoding='utf-8') as f:
+    with open(SPEC_FILE, 'w', encoding='utf-8') as f:
         f.write(spec_content)
-    print("✅ 配置文件已创建: typing_speed_test.spec")
+    mode = "onedir" if onedir else "onefile"
+    print(f"✅ 配置文件已创建: {SPEC_FILE} ({mode}, UPX{'开启' if upx else '关闭'}, 排除{len(excludes)}个模块)")
 
-def build_executable():
+def build_executable(distpath="dist"):
     """构建可执行文件"""
     print("🔨 开始构建可执行文件...")
     try:
@@ -91,7 +155,9 @@ def build_executable():
         subprocess.check_call([
             sys.executable, "-m", "PyInstaller", 
             "--clean", 
-            "typing_speed_test.spec"
+            "--noconfirm",
+            "--distpath", distpath,
+            SPEC_FILE
         ])
         print("✅ 构建完成")
         return True
@@ -99,7 +165,63 @@ def build_executable():
         print(f"❌ 构建失败: {e}")
         return False
 
-def create_portable_package():
+def built_executable(distpath, onedir):
+    """构建产物中可执行文件的路径"""
+    if onedir:
+        return os.path.join(distpath, APP_NAME, exe_filename())
+    return os.path.join(distpath, exe_filename())
+
+def path_size(path):
+    """文件或目录的总大小（字节）"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+def measure_launch(exe_path, runs=3):
+    """测量冷启动到首次绘制的时间（毫秒，取中位数）"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    from bench_startup import run_once, start_virtual_display
+    import statistics
+
+    xvfb = start_virtual_display()
+    try:
+        results = [run_once([os.path.abspath(exe_path)], timeout=120) for _ in range(runs)]
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+    return (statistics.median(r["first_paint_ms"] for r in results),
+            statistics.median(r["wall_ms"] for r in results))
+
+def compare_variants(runs=3):
+    """分别构建各打包方案，对比体积和启动时间"""
+    rows = []
+    for variant, options in VARIANTS.items():
+        print(f"\n📦 构建方案: {variant}")
+        create_spec_file(**options)
+        distpath = os.path.join("dist", variant)
+        if not build_executable(distpath):
+            continue
+        exe_path = built_executable(distpath, options['onedir'])
+        output = os.path.join(distpath, APP_NAME) if options['onedir'] else exe_path
+        size_mb = path_size(output) / 1024 / 1024
+        try:
+            paint_ms, wall_ms = measure_launch(exe_path, runs)
+        except Exception as e:
+            print(f"⚠️  启动测试失败: {e}")
+            paint_ms = wall_ms = float('nan')
+        rows.append((variant, size_mb, paint_ms, wall_ms))
+
+    print("\n📊 打包方案对比")
+    print(f"{'方案':<14}{'体积(MB)':>10}{'首次绘制(ms)':>16}{'总启动(ms)':>14}")
+    for variant, size_mb, paint_ms, wall_ms in rows:
+        print(f"{variant:<14}{size_mb:>10.1f}{paint_ms:>16.0f}{wall_ms:>14.0f}")
+    return rows
+
+def create_portable_package(onedir=False):
     """创建便携版包"""
     print("📦 创建便携版包...")
     
@@ -109,14 +231,17 @@ def create_portable_package():
         shutil.rmtree(release_dir)
     os.makedirs(release_dir)
     
-    # 复制可执行文件
-    exe_path = os.path.join("dist", "打字速度检测器.exe")
-    if os.path.exists(exe_path):
-        shutil.copy2(exe_path, release_dir)
-        print(f"✅ 可执行文件已复制到 {release_dir}")
-    else:
+    # 复制可执行文件（onedir模式复制整个程序目录）
+    exe_path = built_executable("dist", onedir)
+    if not os.path.exists(exe_path):
         print("❌ 找不到可执行文件")
         return False
+    if onedir:
+        shutil.rmtree(release_dir)
+        shutil.copytree(os.path.dirname(exe_path), release_dir)
+    else:
+        shutil.copy2(exe_path, release_dir)
+    print(f"✅ 可执行文件已复制到 {release_dir}")
     
     # 创建说明文件
     readme_content = """# 🚀 打字速度检测器 - 便携版
@@ -145,7 +270,8 @@ def create_portable_package():
 ## 📁 文件说明
 
 - `打字速度检测器.exe` - 主程序
-- `typing_history.json` - 历史记录文件（自动生成）
+- `typing_history.jsonl` - 历史记录文件（自动生成，旧版 `typing_history.json` 会自动迁移）
+- `keystrokes/` - 每次测试的按键日志（自动生成）
 - `config.json` - 配置文件（自动生成）
 
 ## 🎮 快速开始
@@ -178,7 +304,7 @@ def clean_build_files():
             print(f"✅ 已清理: {dir_name}")
     
     # 清理文件
-    files_to_clean = ["typing_speed_test.spec"]
+    files_to_clean = [SPEC_FILE]
     for file_name in files_to_clean:
         if os.path.exists(file_name):
             os.remove(file_name)
@@ -186,6 +312,14 @@ def clean_build_files():
 
 def main():
     """主打包流程"""
+    parser = argparse.ArgumentParser(description="打字速度检测器 - 自动打包工具")
+    parser.add_argument("--onedir", action="store_true", help="打包为目录而不是单文件（启动更快）")
+    parser.add_argument("--no-upx", action="store_true", help="不使用UPX压缩（体积变大，但启动时无需解压）")
+    parser.add_argument("--no-excludes", action="store_true", help="不排除未使用的模块")
+    parser.add_argument("--compare", action="store_true", help="构建所有打包方案并对比体积和启动时间")
+    parser.add_argument("--runs", type=int, default=3, help="对比时每个方案的启动次数")
+    args = parser.parse_args()
+
     print("🚀 打字速度检测器 - 自动打包工具")
     print("=" * 50)
     
@@ -201,17 +335,23 @@ def main():
         print("❌ 找不到主程序文件 main.py")
         return
     
+    if args.compare:
+        compare_variants(args.runs)
+        clean_build_files()
+        return
+    
     print("\n📋 开始打包流程...")
     
     # 创建配置文件
-    create_spec_file()
+    create_spec_file(onedir=args.onedir, upx=not args.no_upx,
+                     excludes=[] if args.no_excludes else None)
     
     # 构建可执行文件
     if not build_executable():
         return
     
     # 创建便携版包
-    if not create_portable_package():
+    if not create_portable_package(args.onedir):
         return
     
     # 清理构建文件
@@ -221,7 +361,7 @@ def main():
     print("=" * 50)
     print("📁 输出文件:")
     print("   - 便携版: 打字速度检测器_便携版/")
-    print("   - 可执行文件: 打字速度检测器_便携版/打字速度检测器.exe")
+    print(f"   - 可执行文件: 打字速度检测器_便携版/{exe_filename()}")
     print("\n💡 使用提示:")
     print("   1. 直接运行可执行文件即可使用")
     print("   2. 可以将整个文件夹复制到任何地方使用")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 外部文本库
+从 .txt（每行一段）或 .jsonl（每行一个 {"text", "language", "difficulty"} 对象）文件加载练习文本。
+首次打开时扫描一遍文件，生成按(语言, 难度)分组的偏移索引(.cidx)；之后通过mmap按偏移直接取出文本，
+不需要把整个文本库读入内存，百万段文本的随机选取也只需几次O(1)读取。
+源文件大小或修改时间变化后索引会自动重建。
+
+索引文件格式（小端序）:
+    头部  HEADER: 魔数 "CIX1"、版本、源文件格式、条目数、源文件大小、源文件修改时间(ns)、分组数
+    分组  GROUP × 分组数: 语言、难度、起始条目、条目数
+    偏移  uint64 × 条目数（按分组排列）
+    长度  uint32 × 条目数
+"""
+
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+from array import array
+from typing import Iterator
+
+MAGIC = b"CIX1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQqI")
+GROUP = struct.Struct("<BB2xQQ")
+OFFSET = struct.Struct("<Q")
+LENGTH = struct.Struct("<I")
+
+FORMAT_TEXT = 0
+FORMAT_JSONL = 1
+
+LANGUAGES = ("english", "chinese")
+LANGUAGE_CODES = {name: code for code, name in enumerate(LANGUAGES)}
+
+# 难度1-5，0表示未标注
+MAX_DIFFICULTY = 5
+
+CORPUS_EXTENSIONS = (".txt", ".jsonl")
+
+_CJK = re.compile("[\u4e00-\u9fff]")
+# 索引文件固定为小端序
+_SWAP = sys.byteorder != "little"
+
+
+def detect_language(text: str) -> str:
+    """含有汉字的文本视为中文"""
+    return "chinese" if _CJK.search(text) else "english"
+
+
+class CorpusFile:
+    """单个文本库文件及其偏移索引"""
+
+    def __init__(self, path: str, language: str | None = None, difficulty: int = 0):
+        self.path = path
+        self.index_path = path + ".cidx"
+        # 纯文本文件没有逐段标注时使用的默认语言（None为自动识别）和难度
+        self.default_language = language
+        self.default_difficulty = difficulty
+        self.format = FORMAT_JSONL if path.lower().endswith(".jsonl") else FORMAT_TEXT
+        self._data: mmap.mmap | None = None
+        self._index: mmap.mmap | None = None
+        if not self._index_fresh():
+            self._build_index()
+        self._open()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def count(self, language: str, difficulty: int | None = None) -> int:
+        """指定语言（和难度）的文本段数"""
+        return sum(count for _, count in self._ranges(language, difficulty))
+
+    def passage(self, entry: int) -> str:
+        """按索引中的位置取出一段文本"""
+        if not 0 <= entry < self._count:
+            raise IndexError(entry)
+        offset = OFFSET.unpack_from(self._index, self._offsets_at + entry * OFFSET.size)[0]
+        length = LENGTH.unpack_from(self._index, self._lengths_at + entry * LENGTH.size)[0]
+        raw = self._data[offset:offset + length]
+        if self.format == FORMAT_JSONL:
+            return json.loads(raw)["text"]
+        return raw.decode("utf-8")
+
+    def random_passage(self, language: str, difficulty: int | None = None,
+                       rng: random.Random | None = None) -> str | None:
+        """随机取出一段指定语言（和难度）的文本，没有时返回None"""
+        total = self.count(language, difficulty)
+        if total == 0:
+            return None
+        return self.nth(language, difficulty, (rng or random).randrange(total))
+
+    def nth(self, language: str, difficulty: int | None, n: int) -> str:
+        """符合条件的文本中的第n段"""
+        for start, count in self._ranges(language, difficulty):
+            if n < count:
+                return self.passage(start + n)
+            n -= count
+        raise IndexError(n)
+
+    def iter_passages(self, language: str | None = None) -> Iterator[tuple[str, int, str]]:
+        """按索引顺序遍历 (语言, 难度, 文本)；不指定语言时第i项即条目i"""
+        for (code, difficulty), (start, count) in self._groups.items():
+            if language is not None and LANGUAGES[code] != language:
+                continue
+            for entry in range(start, start + count):
+                yield LANGUAGES[code], difficulty, self.passage(entry)
+
+    def close(self) -> None:
+        for mapping in (self._data, self._index):
+            if mapping is not None:
+                mapping.close()
+        self._data = self._index = None
+
+    def _ranges(self, language: str, difficulty: int | None) -> list[tuple[int, int]]:
+        code = LANGUAGE_CODES.get(language)
+        if difficulty is not None:
+            group = self._groups.get((code, difficulty))
+            return [group] if group else []
+        return [group for (group_code, _), group in self._groups.items() if group_code == code]
+
+    def _source_stat(self) -> tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _index_fresh(self) -> bool:
+        """索引存在且与源文件一致"""
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(HEADER.size)
+        except OSError:
+            return False
+        if len(header) != HEADER.size:
+            return False
+        magic, version, fmt, _, size, mtime_ns, _ = HEADER.unpack(header)
+        return (magic == MAGIC and version == VERSION and fmt == self.format
+                and (size, mtime_ns) == self._source_stat())
+
+    def _parse_line(self, line: bytes) -> tuple[int, int] | None:
+        """返回该行的(语言编号, 难度)；空行或无效行返回None"""
+        if self.format == FORMAT_JSONL:
+            try:
+                item = json.loads(line)
+                text = item["text"]
+            except (ValueError, KeyError, TypeError):
+                return None
+            if not isinstance(text, str) or not text.strip():
+                return None
+            language = item.get("language") or self.default_language or detect_language(text)
+            difficulty = item.get("difficulty", self.default_difficulty)
+        else:
+            try:
+                text = line.decode("utf-8")
+            except UnicodeDecodeError:
+                return None
+            if not text.strip():
+                return None
+            language = self.default_language or detect_language(text)
+            difficulty = self.default_difficulty
+        if language not in LANGUAGE_CODES:
+            return None
+        try:
+            difficulty = max(0, min(MAX_DIFFICULTY, int(difficulty)))
+        except (TypeError, ValueError):
+            difficulty = 0
+        return LANGUAGE_CODES[language], difficulty
+
+    def _build_index(self) -> None:
+        """扫描一遍源文件，按(语言, 难度)分组写出偏移索引"""
+        size, mtime_ns = self._source_stat()
+        groups: dict[tuple[int, int], tuple[array, array]] = {}
+        position = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                start = position
+                position += len(line)
+                content = line.rstrip(b"\r\n")
+                if start == 0 and content.startswith(b"\xef\xbb\xbf"):
+                    # 跳过UTF-8 BOM
+                    content = content[3:]
+                    start = 3
+                key = self._parse_line(content)
+                if key is None:
+                    continue
+                offsets, lengths = groups.setdefault(key, (array("Q"), array("I")))
+                offsets.append(start)
+                lengths.append(len(content))
+
+        keys = sorted(groups)
+        count = sum(len(groups[key][0]) for key in keys)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.format, count, size, mtime_ns, len(keys)))
+            start = 0
+            for code, difficulty in keys:
+                group_count = len(groups[(code, difficulty)][0])
+                f.write(GROUP.pack(code, difficulty, start, group_count))
+                start += group_count
+            for column in (0, 1):
+                for key in keys:
+                    values = groups[key][column]
+                    if _SWAP:
+                        values.byteswap()
+                    values.tofile(f)
+        os.replace(tmp_path, self.index_path)
+
+    def _open(self) -> None:
+        with open(self.index_path, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, _, self._count, size, mtime_ns, group_count = HEADER.unpack_from(self._index, 0)
+        # 派生索引（如passage_selector的特征文件）据此判断是否过期
+        self.source_size, self.source_mtime_ns = size, mtime_ns
+        self._groups: dict[tuple[int, int], tuple[int, int]] = {}
+        position = HEADER.size
+        for _ in range(group_count):
+            code, difficulty, start, count = GROUP.unpack_from(self._index, position)
+            self._groups[(code, difficulty)] = (start, count)
+            position += GROUP.size
+        self._offsets_at = position
+        self._lengths_at = position + self._count * OFFSET.size
+        if size > 0:
+            with open(self.path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class CorpusPassageSource:
+    """由若干文本库文件组成的文本来源"""
+
+    def __init__(self, paths: list[str] | tuple[str, ...] = ()):
+        self.files: list[CorpusFile] = []
+        for path in paths:
+            self.add(path)
+
+    @classmethod
+    def from_directory(cls, directory: str) -> "CorpusPassageSource":
+        """加载目录下所有 .txt 和 .jsonl 文件"""
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(CORPUS_EXTENSIONS)
+        )
+        return cls(paths)
+
+    def add(self, path: str, language: str | None = None, difficulty: int = 0) -> CorpusFile:
+        corpus = CorpusFile(path, language, difficulty)
+        self.files.append(corpus)
+        return corpus
+
+    def __len__(self) -> int:
+        return sum(len(corpus) for corpus in self.files)
+
+    def count(self, language: str, difficulty: int | None = None) -> int:
+        return sum(corpus.count(language, difficulty) for corpus in self.files)
+
+    def random_passage(self, language: str, difficulty: int | None = None) -> str:
+        """按各文件中符合条件的文本数量加权随机选取"""
+        counts = [corpus.count(language, difficulty) for corpus in self.files]
+        total = sum(counts)
+        if total == 0:
+            raise LookupError(f"文本库中没有{language}文本")
+        target = random.randrange(total)
+        for corpus, count in zip(self.files, counts):
+            if target < count:
+                break
+            target -= count
+        return corpus.nth(language, difficulty, target)
+
+    def close(self) -> None:
+        for corpus in self.files:
+            corpus.close()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 批量评分
+对一个目录下的全部按键日志（.ksl）按当前的计分规则重新评分，
+用进程池在多个CPU核心上并行处理，结果按文件顺序流式写入CSV或JSONL，并输出吞吐量。
+只依赖会话引擎，不导入任何GUI库，可在无显示器的服务器上运行。
+
+用法:
+    python grade.py exams/ -o results.csv
+    python grade.py exams/ -o results.jsonl --history typing_history.jsonl   与保存的成绩核对
+    python grade.py exams/ --workers 1                                        单进程（对比基准）
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+
+from replay import SessionReplay, compare_results
+
+FIELDS = ["file", "language", "text_length", "events", "wpm", "accuracy", "correct_chars", "total_chars",
+          "time", "recorded_wpm", "recorded_accuracy", "match", "problems", "error"]
+
+
+def find_logs(directory: str) -> list[str]:
+    """递归查找目录下的按键日志，按路径排序以保证输出顺序稳定"""
+    paths = []
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith(".ksl"):
+                paths.append(os.path.join(root, name))
+    paths.sort()
+    return paths
+
+
+def grade_file(path: str) -> dict[str, Any]:
+    """重新评分一个按键日志（在工作进程中执行）"""
+    try:
+        replay = SessionReplay.from_file(path)
+        replay.start()
+        replay.run()
+    except (OSError, ValueError) as e:
+        return {"file": path, "error": str(e)}
+    result = replay.result()
+    return {
+        "file": path,
+        "language": result["language"],
+        "text_length": result["text_length"],
+        "events": len(replay.log),
+        "wpm": result["wpm"],
+        "accuracy": result["accuracy"],
+        "correct_chars": result["correct_chars"],
+        "total_chars": result["total_chars"],
+        "time": result["time"],
+    }
+
+
+def load_records(history_file: str) -> dict[str, dict[str, Any]]:
+    """历史记录按按键日志文件名索引（只读，不修改历史记录文件）"""
+    from history_store import read_records
+
+    records = {}
+    for record in read_records(history_file):
+        log_file = record.get("keystroke_file")
+        if log_file:
+            records[os.path.basename(log_file)] = record
+    return records
+
+
+def grade_all(paths: list[str], workers: int) -> Iterator[dict[str, Any]]:
+    """按输入顺序产出评分结果；workers为1时在当前进程中执行"""
+    if workers <= 1:
+        yield from map(grade_file, paths)
+        return
+    # 每个工作进程一次领取多个文件，减少进程间通信次数
+    chunksize = max(1, len(paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(grade_file, paths, chunksize=chunksize)
+
+
+class ResultWriter:
+    """把结果流式写入CSV或JSONL"""
+
+    def __init__(self, stream: Any, fmt: str):
+        self.stream = stream
+        self.fmt = fmt
+        if fmt == "csv":
+            self.writer = csv.DictWriter(stream, fieldnames=FIELDS, extrasaction="ignore")
+            self.writer.writeheader()
+
+    def write(self, row: dict[str, Any]) -> None:
+        if self.fmt == "csv":
+            self.writer.writerow({**row, "problems": "; ".join(row.get("problems", []))})
+        else:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def write_results(rows: Iterable[dict[str, Any]], writer: ResultWriter,
+                  records: dict[str, dict[str, Any]] | None, total: int) -> dict[str, int]:
+    """写出结果并统计；有历史记录时附上保存的成绩和核对结论"""
+    counts = {"graded": 0, "errors": 0, "mismatches": 0}
+    step = max(1, total // 20)
+    for done, row in enumerate(rows, 1):
+        if "error" in row:
+            counts["errors"] += 1
+        else:
+            counts["graded"] += 1
+            record = records.get(os.path.basename(row["file"])) if records is not None else None
+            if record is not None:
+                problems = compare_results(record, row)
+                row["recorded_wpm"] = record.get("wpm")
+                row["recorded_accuracy"] = record.get("accuracy")
+                row["match"] = not problems
+                row["problems"] = problems
+                if problems:
+                    counts["mismatches"] += 1
+        writer.write(row)
+        if done % step == 0 or done == total:
+            print(f"\r⏳ {done}/{total}", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行批量评分按键日志")
+    parser.add_argument("directory", help="包含按键日志（.ksl）的目录，会递归查找")
+    parser.add_argument("-o", "--output", default="-", help="输出文件（.csv或.jsonl），默认输出到标准输出")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="输出格式，默认按输出文件扩展名判断")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="工作进程数")
+    parser.add_argument("--history", help="历史记录文件，提供时与保存的成绩核对")
+    args = parser.parse_args()
+
+    paths = find_logs(args.directory)
+    if not paths:
+        print(f"❌ {args.directory} 中没有找到按键日志", file=sys.stderr)
+        raise SystemExit(1)
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "csv")
+    records = None
+    if args.history:
+        try:
+            records = load_records(args.history)
+        except OSError as e:
+            print(f"❌ 无法读取历史记录 {args.history}: {e}", file=sys.stderr)
+            raise SystemExit(1)
+    workers = max(1, min(args.workers, len(paths)))
+
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    start = time.perf_counter()
+    try:
+        counts = write_results(grade_all(paths, workers), ResultWriter(stream, fmt), records, len(paths))
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ 评分 {counts['graded']} 个，失败 {counts['errors']} 个"
+          + (f"，与保存的成绩不一致 {counts['mismatches']} 个" if records is not None else ""), file=sys.stderr)
+    print(f"⚡ {workers} 个进程，用时 {elapsed:.2f}s，{len(paths) / elapsed:.1f} 个/秒", file=sys.stderr)
+    if counts["errors"] or counts["mismatches"]:
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
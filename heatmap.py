@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键热力图
+在tk.Canvas上按错误率着色（绿→黄→红）绘制键盘或字符格子，格子中显示平均按键用时。
+英文按键盘布局绘制，中文绘制最薄弱的若干个汉字。
+"""
+
+import tkinter as tk
+
+from key_analytics import ATTEMPTS, KeyAnalytics
+
+KEYBOARD_ROWS = ("1234567890-=", "qwertyuiop[]", "asdfghjkl;'", "zxcvbnm,./")
+# 每行相对左边的缩进（格子宽度的比例），模拟键盘的错位
+ROW_INDENT = (0.0, 0.5, 0.75, 1.25)
+
+BACKGROUND = "#2b2b2b"
+EMPTY_COLOR = "#3a3a3a"
+TEXT_COLOR = "#ffffff"
+GOOD = (76, 175, 80)
+WARN = (255, 193, 7)
+BAD = (244, 67, 54)
+
+# 错误率达到该值时显示为最红
+MAX_ERROR_RATE = 0.2
+
+
+def heat_color(error_rate: float) -> str:
+    """错误率映射为颜色：0为绿色，MAX_ERROR_RATE/2为黄色，MAX_ERROR_RATE及以上为红色"""
+    t = min(max(error_rate / MAX_ERROR_RATE, 0.0), 1.0)
+    if t < 0.5:
+        start, end, t = GOOD, WARN, t * 2
+    else:
+        start, end, t = WARN, BAD, (t - 0.5) * 2
+    return "#" + "".join(f"{round(a + (b - a) * t):02x}" for a, b in zip(start, end))
+
+
+class KeyHeatmap:
+    """按键热力图"""
+
+    def __init__(self, canvas: tk.Canvas, cell: int = 44, gap: int = 4):
+        self.canvas = canvas
+        self.cell = cell
+        self.gap = gap
+        canvas.configure(bg=BACKGROUND, highlightthickness=0)
+
+    def _merge_case(self, analytics: KeyAnalytics, key: str) -> list[int] | None:
+        """字母键合并大小写的统计"""
+        rows = [analytics.chars[k] for k in {key, key.upper()} if k in analytics.chars]
+        if not rows:
+            return None
+        return [sum(values) for values in zip(*rows)]
+
+    def _draw_cell(self, x: float, y: float, width: float, label: str, row: list[int] | None) -> None:
+        if row is None or row[ATTEMPTS] == 0:
+            color, detail = EMPTY_COLOR, ""
+        else:
+            color = heat_color(KeyAnalytics.error_rate(row))
+            latency = KeyAnalytics.mean_latency_ms(row)
+            detail = f"{latency:.0f}ms" if latency else ""
+        self.canvas.create_rectangle(x, y, x + width, y + self.cell, fill=color, outline="")
+        self.canvas.create_text(x + width / 2, y + self.cell * 0.36, text=label,
+                                fill=TEXT_COLOR, font=("Consolas", 13, "bold"))
+        if detail:
+            self.canvas.create_text(x + width / 2, y + self.cell * 0.76, text=detail,
+                                    fill=TEXT_COLOR, font=("Consolas", 8))
+
+    def draw_keyboard(self, analytics: KeyAnalytics) -> None:
+        """按键盘布局绘制英文按键"""
+        self.canvas.delete("all")
+        step = self.cell + self.gap
+        for r, keys in enumerate(KEYBOARD_ROWS):
+            x0 = self.gap + ROW_INDENT[r] * step
+            y = self.gap + r * step
+            for c, key in enumerate(keys):
+                self._draw_cell(x0 + c * step, y, self.cell, key.upper(), self._merge_case(analytics, key))
+        # 空格键
+        y = self.gap + len(KEYBOARD_ROWS) * step
+        self._draw_cell(self.gap + 3 * step, y, 6 * step - self.gap, "space", analytics.chars.get(" "))
+        width = self.gap + max(ROW_INDENT[r] * step + len(keys) * step for r, keys in enumerate(KEYBOARD_ROWS))
+        self.canvas.configure(width=width, height=self.gap + (len(KEYBOARD_ROWS) + 1) * step)
+
+    def draw_chars(self, analytics: KeyAnalytics, keys: list[str], columns: int = 10) -> None:
+        """按网格绘制指定的字符（例如最薄弱的汉字）"""
+        self.canvas.delete("all")
+        step = self.cell + self.gap
+        for i, key in enumerate(keys):
+            r, c = divmod(i, columns)
+            self._draw_cell(self.gap + c * step, self.gap + r * step, self.cell, key, analytics.chars.get(key))
+        rows = max(1, -(-len(keys) // columns))
+        self.canvas.configure(width=self.gap + columns * step, height=self.gap + rows * step)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 增量文本高亮
+记住上一次渲染的标签状态，只对最近一次编辑影响的区间重新打标签，
+并把连续的正确/错误字符合并为一个范围标签，
+使每次按键的Tcl调用次数保持恒定，与文本长度无关。
+
+文本可以包含多行：载入时预先计算每行的起始偏移，字符偏移通过二分查找转换为"行.列"索引。
+很长的文本只把光标附近的一个窗口放进Text控件，光标接近窗口边缘时再整体移动窗口，
+Tk只需要排版窗口内的文字。
+"""
+
+import tkinter as tk
+from array import array
+from bisect import bisect_right
+
+from scoring import ScoringEngine
+
+HIGHLIGHT_TAGS = ("correct", "incorrect", "current", "remaining")
+FOLLOW_STEP = 40
+
+
+class TextHighlighter:
+    """基于编辑差异的文本高亮层"""
+
+    def __init__(self, widget: tk.Text, window: int = 4000, margin: int = 500):
+        self.widget = widget
+        # 显示窗口的字符数；文本不超过window时整段显示
+        self.window = window
+        # 光标离窗口边缘不足margin个字符时移动窗口
+        self.margin = margin
+        # Tcl调用计数：累计值和最近一次渲染的值
+        self.tcl_calls = 0
+        self.last_render_calls = 0
+        self.window_moves = 0
+        self._rendered_version = -1
+        self._text = ""
+        self._window_start = 0
+        self._window_end = 0
+        self._line_starts = array("I", [0])
+        self._cursor_position = (0, 0)
+
+    @property
+    def visible_range(self) -> tuple[int, int]:
+        """当前显示在控件中的文本区间（全文中的字符偏移）"""
+        return self._window_start, self._window_end
+
+    def _index(self, offset: int) -> str:
+        """全文中的字符偏移量转换为Text索引（"行.列"）"""
+        offset -= self._window_start
+        line = bisect_right(self._line_starts, offset) - 1
+        return f"{line + 1}.{offset - self._line_starts[line]}"
+
+    def _tag_add(self, tag: str, start: str, end: str) -> None:
+        self.widget.tag_add(tag, start, end)
+        self.tcl_calls += 1
+
+    def _tag_remove(self, tag: str, start: str, end: str) -> None:
+        self.widget.tag_remove(tag, start, end)
+        self.tcl_calls += 1
+
+    def set_text(self, text: str) -> None:
+        """载入新的目标文本，从开头显示"""
+        self._text = text
+        self._show(0)
+
+    def _show(self, start: int) -> None:
+        """把从start开始的一个窗口的文本放进控件，并计算各行起始偏移"""
+        end = len(self._text) if len(self._text) <= self.window else min(len(self._text), start + self.window)
+        self._window_start, self._window_end = start, end
+        visible = self._text[start:end]
+
+        line_starts = array("I", [0])
+        newline = visible.find("\n")
+        while newline != -1:
+            line_starts.append(newline + 1)
+            newline = visible.find("\n", newline + 1)
+        self._line_starts = line_starts
+        self._cursor_position = (0, 0)
+
+        state = self.widget.cget("state")
+        self.widget.configure(state="normal")
+        self.widget.delete("1.0", tk.END)
+        self.widget.insert("1.0", visible)
+        self.widget.configure(state=state)
+        self.tcl_calls += 5
+
+    def reset(self, engine: ScoringEngine | None = None) -> None:
+        """清除全部高亮，把整段文本标记为剩余文本"""
+        before = self.tcl_calls
+        if self._window_start != 0:
+            self._show(0)
+        for tag in HIGHLIGHT_TAGS:
+            self._tag_remove(tag, "1.0", tk.END)
+        self._tag_add("remaining", "1.0", tk.END)
+        self.last_render_calls = self.tcl_calls - before
+        self._rendered_version = engine.version if engine is not None else -1
+
+    def render(self, engine: ScoringEngine) -> None:
+        """根据计分引擎的最近一次编辑增量更新高亮"""
+        if engine.version == self._rendered_version:
+            self.last_render_calls = 0
+            return
+        before = self.tcl_calls
+        start, old_len, new_len = engine.last_edit
+        text_len = len(engine.target_text)
+
+        if self._needs_move(new_len, text_len):
+            # 光标接近窗口边缘：移动窗口后重新标记整个窗口
+            self._show(max(0, min(new_len - self.margin, text_len - self.window)))
+            self.window_moves += 1
+            lo, hi = self._window_start, self._window_end
+        else:
+            # 受影响区间：从编辑起点到新旧输入中较长者的下一个字符（当前位置标记），限制在窗口内
+            lo = max(min(start, text_len), self._window_start)
+            hi = min(max(old_len, new_len) + 1, text_len, self._window_end)
+        if lo < hi:
+            self._retag(engine, lo, hi, new_len)
+        self._follow_cursor(min(new_len, text_len))
+
+        self._rendered_version = engine.version
+        self.last_render_calls = self.tcl_calls - before
+
+    def _needs_move(self, cursor: int, text_len: int) -> bool:
+        if self._window_end - self._window_start >= text_len:
+            return False
+        near_end = self._window_end < text_len and cursor > self._window_end - self.margin
+        near_start = self._window_start > 0 and cursor < self._window_start + self.margin
+        return near_end or near_start
+
+    def _retag(self, engine: ScoringEngine, lo: int, hi: int, cursor: int) -> None:
+        """重新标记[lo, hi)区间"""
+        lo_index = self._index(lo)
+        hi_index = self._index(hi)
+        for tag in HIGHLIGHT_TAGS:
+            self._tag_remove(tag, lo_index, hi_index)
+
+        # 已输入部分：合并连续的正确/错误字符
+        for run_start, run_end, correct in engine.iter_runs(lo, min(cursor, hi)):
+            self._tag_add("correct" if correct else "incorrect",
+                          self._index(run_start), self._index(run_end))
+
+        # 当前位置和剩余文本
+        if lo <= cursor < hi:
+            self._tag_add("current", self._index(cursor), self._index(cursor + 1))
+        if max(lo, cursor + 1) < hi:
+            self._tag_add("remaining", self._index(max(lo, cursor + 1)), hi_index)
+
+    def _follow_cursor(self, cursor: int) -> None:
+        """光标换行（或在长行中前进一段）时滚动控件，保持当前位置可见"""
+        if not self._window_start <= cursor <= self._window_end:
+            return
+        offset = cursor - self._window_start
+        line = bisect_right(self._line_starts, offset) - 1
+        # 自动换行时一行可能显示为多行，按每FOLLOW_STEP个字符再检查一次
+        position = (line, (offset - self._line_starts[line]) // FOLLOW_STEP)
+        if position != self._cursor_position:
+            self._cursor_position = position
+            self.widget.see(self._index(cursor))
+            self.tcl_calls += 1
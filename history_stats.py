@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 历史记录汇总统计
+维护测试次数、总和、最大/最小值，以及按语言和按日期的分组汇总。
+每追加一条记录以O(1)更新，并与历史记录一同持久化，查看统计时无需遍历全部记录。
+"""
+
+import json
+import os
+from typing import Any, Iterable
+
+
+class StatsBucket:
+    """一组记录的累计统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.wpm_sum = 0
+        self.wpm_max: int | None = None
+        self.wpm_min: int | None = None
+        self.accuracy_sum = 0
+        self.accuracy_max: int | None = None
+        self.accuracy_min: int | None = None
+        self.time_sum = 0
+        self.correct_chars = 0
+        self.total_chars = 0
+
+    def add(self, record: dict[str, Any]) -> None:
+        """累加一条记录"""
+        wpm = record.get('wpm', 0)
+        accuracy = record.get('accuracy', 0)
+        self.count += 1
+        self.wpm_sum += wpm
+        self.wpm_max = wpm if self.wpm_max is None else max(self.wpm_max, wpm)
+        self.wpm_min = wpm if self.wpm_min is None else min(self.wpm_min, wpm)
+        self.accuracy_sum += accuracy
+        self.accuracy_max = accuracy if self.accuracy_max is None else max(self.accuracy_max, accuracy)
+        self.accuracy_min = accuracy if self.accuracy_min is None else min(self.accuracy_min, accuracy)
+        self.time_sum += record.get('time', 0)
+        self.correct_chars += record.get('correct_chars', 0)
+        self.total_chars += record.get('total_chars', 0)
+
+    @property
+    def best_wpm(self) -> int:
+        return self.wpm_max or 0
+
+    @property
+    def average_wpm(self) -> float:
+        return self.wpm_sum / self.count if self.count else 0.0
+
+    @property
+    def average_accuracy(self) -> float:
+        return self.accuracy_sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StatsBucket":
+        bucket = cls()
+        for key, value in data.items():
+            if key in bucket.__dict__:
+                setattr(bucket, key, value)
+        return bucket
+
+
+class HistoryAggregates:
+    """历史记录的整体、按语言和按日期汇总"""
+
+    def __init__(self):
+        self.overall = StatsBucket()
+        self.by_language: dict[str, StatsBucket] = {}
+        self.by_day: dict[str, StatsBucket] = {}
+        # 已汇总的存储行数（包括无法解析而被跳过的行），用于校验是否与历史记录同步
+        self.records = 0
+
+    @property
+    def count(self) -> int:
+        return self.overall.count
+
+    def add(self, record: dict[str, Any]) -> None:
+        """追加一条记录，O(1)"""
+        self.overall.add(record)
+        # 兼容没有语言字段的旧记录
+        language = record.get('language', 'english')
+        self.by_language.setdefault(language, StatsBucket()).add(record)
+        day = str(record.get('date', ''))[:10]
+        self.by_day.setdefault(day, StatsBucket()).add(record)
+
+    def extend(self, records: Iterable[dict[str, Any]]) -> None:
+        for record in records:
+            self.add(record)
+
+    def language(self, language: str) -> StatsBucket:
+        """指定语言的汇总（没有记录时返回空汇总）"""
+        return self.by_language.get(language, StatsBucket())
+
+    def day(self, day: str) -> StatsBucket:
+        """指定日期(YYYY-MM-DD)的汇总"""
+        return self.by_day.get(day, StatsBucket())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "records": self.records,
+            "overall": self.overall.to_dict(),
+            "by_language": {key: bucket.to_dict() for key, bucket in self.by_language.items()},
+            "by_day": {key: bucket.to_dict() for key, bucket in self.by_day.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "HistoryAggregates":
+        aggregates = cls()
+        aggregates.records = data.get("records", 0)
+        aggregates.overall = StatsBucket.from_dict(data.get("overall", {}))
+        aggregates.by_language = {key: StatsBucket.from_dict(value) for key, value in data.get("by_language", {}).items()}
+        aggregates.by_day = {key: StatsBucket.from_dict(value) for key, value in data.get("by_day", {}).items()}
+        return aggregates
+
+    def save(self, path: str) -> None:
+        """原子写入汇总文件"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "HistoryAggregates | None":
+        """读取汇总文件，不存在或损坏时返回None"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, AttributeError):
+            return None
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 追加式历史记录存储
+每条记录以JSON Lines格式追加写入，并维护一个定长偏移索引文件(.idx)，
+启动和保存的耗时都与历史记录条数无关。
+
+崩溃恢复：写到一半的末行会被截断；索引与数据不一致时从数据文件重建索引。
+首次运行时会把旧版的 typing_history.json 迁移过来。
+汇总统计在内存中随每次追加增量更新，每追加STATS_SAVE_INTERVAL条以及关闭时写入 .stats.json；
+意外退出后其中的条数落后于历史记录，下次打开时只补统计后面的记录。
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Iterable, Iterator
+
+from history_stats import HistoryAggregates
+
+OFFSET = struct.Struct("<Q")
+# 索引文件固定为小端序
+_SWAP = sys.byteorder != "little"
+# 每追加这么多条记录写一次汇总统计文件
+STATS_SAVE_INTERVAL = 50
+
+
+def read_records(path: str) -> Iterator[dict[str, Any]]:
+    """只读地按写入顺序遍历历史记录文件，不做崩溃恢复，也不创建索引和统计文件"""
+    with open(path, "rb") as f:
+        for line in f:
+            record = HistoryStore._parse(line)
+            if record is not None:
+                yield record
+
+
+class HistoryStore:
+    """JSON Lines历史记录存储"""
+
+    def __init__(self, path: str = "typing_history.jsonl", legacy_path: str | None = "typing_history.json"):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.stats_path = path + ".stats.json"
+        self.legacy_path = legacy_path
+        # 汇总统计中尚未写入文件的追加记录数
+        self._unsaved = 0
+        if legacy_path and not os.path.exists(path) and os.path.exists(legacy_path):
+            self._migrate_legacy(legacy_path)
+        self._recover()
+        self._load_aggregates()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ---------- 写入 ----------
+
+    def append(self, record: dict[str, Any]) -> int:
+        """追加一条记录并返回其序号；数据先落盘再写索引"""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._size
+        with open(self.path, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, "ab") as f:
+            f.write(OFFSET.pack(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        self._size = offset + len(line)
+        self._count += 1
+        self.aggregates.add(record)
+        self.aggregates.records = self._count
+        self._unsaved += 1
+        if self._unsaved >= STATS_SAVE_INTERVAL:
+            self._save_aggregates()
+        return self._count - 1
+
+    def extend(self, records: Iterable[dict[str, Any]]) -> None:
+        """批量追加记录，只做一次落盘"""
+        offsets = array("Q")
+        position = self._size
+        with open(self.path, "ab") as f:
+            for record in records:
+                self.aggregates.add(record)
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                offsets.append(position)
+                position += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        if _SWAP:
+            offsets.byteswap()
+        with open(self.index_path, "ab") as f:
+            offsets.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._size = position
+        self._count += len(offsets)
+        self.aggregates.records = self._count
+        self._save_aggregates()
+
+    def close(self) -> None:
+        """把尚未保存的汇总统计写入文件"""
+        if self._unsaved:
+            self._save_aggregates()
+
+    # ---------- 读取 ----------
+
+    def get(self, index: int) -> dict[str, Any] | None:
+        """按序号读取一条记录"""
+        records = self.read_range(index, index + 1)
+        return records[0] if records else None
+
+    def read_range(self, start: int, stop: int) -> list[dict[str, Any]]:
+        """读取[start, stop)区间的记录（按写入顺序）"""
+        start = max(0, start)
+        stop = min(stop, self._count)
+        if start >= stop:
+            return []
+
+        offsets = self._read_offsets(start, stop + 1 if stop < self._count else stop)
+        if stop == self._count:
+            offsets.append(self._size)
+        with open(self.path, "rb") as f:
+            f.seek(offsets[0])
+            data = f.read(offsets[-1] - offsets[0])
+        return [record for record in map(self._parse, data.splitlines()) if record is not None]
+
+    def recent(self, count: int) -> list[dict[str, Any]]:
+        """最近的count条记录，最新的在前"""
+        records = self.read_range(self._count - count, self._count)
+        records.reverse()
+        return records
+
+    def page_count(self, page_size: int) -> int:
+        """按page_size分页后的总页数"""
+        return max(1, (self._count + page_size - 1) // page_size)
+
+    def page(self, page_number: int, page_size: int) -> list[dict[str, Any]]:
+        """读取第page_number页（从0开始，最新的记录在第0页且排在最前）"""
+        stop = self._count - page_number * page_size
+        records = self.read_range(stop - page_size, stop)
+        records.reverse()
+        return records
+
+    def iter_records(self) -> Iterator[dict[str, Any]]:
+        """按写入顺序流式遍历全部记录"""
+        if os.path.exists(self.path):
+            yield from read_records(self.path)
+
+    # ---------- 内部实现 ----------
+
+    @staticmethod
+    def _parse(line: bytes) -> dict[str, Any] | None:
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _read_offsets(self, start: int, stop: int) -> array:
+        offsets = array("Q")
+        with open(self.index_path, "rb") as f:
+            f.seek(start * OFFSET.size)
+            offsets.frombytes(f.read((stop - start) * OFFSET.size))
+        if _SWAP:
+            offsets.byteswap()
+        return offsets
+
+    def _recover(self) -> None:
+        """校验数据文件和索引，必要时截断残缺末行或重建索引"""
+        if not os.path.exists(self.path):
+            open(self.path, "ab").close()
+        size = os.path.getsize(self.path)
+
+        # 截断没有换行结尾的残缺末行
+        if size > 0:
+            with open(self.path, "rb+") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    tail_start = max(0, size - (1 << 16))
+                    while True:
+                        f.seek(tail_start)
+                        chunk = f.read(size - tail_start)
+                        cut = chunk.rfind(b"\n")
+                        if cut != -1 or tail_start == 0:
+                            break
+                        tail_start = max(0, tail_start - (1 << 16))
+                    size = tail_start + cut + 1 if cut != -1 else 0
+                    f.truncate(size)
+        self._size = size
+
+        index_size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        self._count = index_size // OFFSET.size
+        if index_size % OFFSET.size or not self._index_consistent():
+            self._rebuild_index()
+
+    def _index_consistent(self) -> bool:
+        """索引最后一项应指向数据文件中的最后一行"""
+        if self._count == 0:
+            return self._size == 0
+        last = self._read_offsets(self._count - 1, self._count)[0]
+        if last >= self._size:
+            return False
+        with open(self.path, "rb") as f:
+            if last > 0:
+                f.seek(last - 1)
+                if f.read(1) != b"\n":
+                    return False
+            else:
+                f.seek(0)
+            return f.read(self._size - last).count(b"\n") == 1
+
+    def _rebuild_index(self) -> None:
+        """扫描数据文件重建偏移索引"""
+        offsets = array("Q")
+        position = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                offsets.append(position)
+                position += len(line)
+        if _SWAP:
+            offsets.byteswap()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            offsets.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        self._count = len(offsets)
+
+    def _load_aggregates(self) -> None:
+        """读取汇总统计；落后于历史记录时只补统计后面的记录，缺失或多于历史记录时重新遍历一次"""
+        aggregates = HistoryAggregates.load(self.stats_path)
+        if aggregates is not None and aggregates.records == self._count:
+            self.aggregates = aggregates
+            return
+        if aggregates is not None and aggregates.records < self._count:
+            # 意外退出时最近不到STATS_SAVE_INTERVAL条记录还没有写入统计文件
+            aggregates.extend(self.read_range(aggregates.records, self._count))
+        else:
+            aggregates = HistoryAggregates()
+            aggregates.extend(self.iter_records())
+        aggregates.records = self._count
+        self.aggregates = aggregates
+        self._save_aggregates()
+
+    def _save_aggregates(self) -> None:
+        self._unsaved = 0
+        try:
+            self.aggregates.save(self.stats_path)
+        except OSError:
+            # 汇总文件只是缓存，写入失败时下次启动会重新计算
+            pass
+
+    def _migrate_legacy(self, legacy_path: str) -> None:
+        """把旧版的整文件JSON历史记录迁移为JSON Lines"""
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(records, list):
+            return
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # 保留旧文件作为备份，避免重复迁移
+        os.replace(legacy_path, legacy_path + ".bak")
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 热点函数计时
+把界面中的高频处理函数包装起来，记录调用次数和耗时直方图，用于排查"卡顿"问题。
+关闭时包装函数只多一次属性判断；开启后每次调用多两次perf_counter_ns和一次直方图累加。
+直方图按2的幂（微秒）分桶，内存固定，可以长时间开启。
+"""
+
+import functools
+import json
+import platform
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+# 第i个桶记录耗时在[2^(i-1), 2^i)微秒之间的调用，第0个桶为不足1微秒，最后一个桶不设上限
+BUCKETS = 24
+
+
+def bucket_upper_ms(index: int) -> float:
+    """第index个桶的上限（毫秒）"""
+    return (1 << index) / 1000
+
+
+class LatencyHistogram:
+    """对数分桶的耗时直方图"""
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, elapsed_ns: int) -> None:
+        self.counts[min((elapsed_ns // 1000).bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def clear(self) -> None:
+        self.__init__()
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ns / self.count / 1e6 if self.count else 0.0
+
+    @property
+    def max_ms(self) -> float:
+        return self.max_ns / 1e6
+
+    def percentile(self, q: float) -> float:
+        """分位数的估计值（所在桶的上限，毫秒；不超过最大值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bucket_upper_ms(index), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "calls": self.count,
+            "total_ms": self.total_ns / 1e6,
+            "mean_ms": self.mean_ms,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        data = self.summary()
+        # 只导出非空的桶，键为桶上限（毫秒）
+        data["buckets"] = {f"{bucket_upper_ms(i):g}": c for i, c in enumerate(self.counts) if c}
+        return data
+
+
+class Instrumentation:
+    """可开关的函数计时器"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.started = time.time()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """返回记录耗时的包装函数；关闭时直接调用原函数"""
+        histogram = self.histograms.setdefault(name, LatencyHistogram())
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.record(time.perf_counter_ns() - start)
+
+        return wrapper
+
+    def instrument(self, obj: Any, names: Iterable[str]) -> None:
+        """用包装函数替换对象上的方法（实例属性）
+
+        需要在方法被绑定为事件回调之前调用，回调才会经过包装函数。
+        """
+        for name in names:
+            setattr(obj, name, self.wrap(name, getattr(obj, name)))
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        for histogram in self.histograms.values():
+            histogram.clear()
+        self.started = time.time()
+
+    def summary(self) -> list[tuple[str, dict[str, float]]]:
+        """按总耗时从高到低排列的各函数统计"""
+        rows = [(name, histogram.summary()) for name, histogram in self.histograms.items()]
+        rows.sort(key=lambda row: row[1]["total_ms"], reverse=True)
+        return rows
+
+    def format_table(self) -> str:
+        """等宽文字表格，供诊断窗口显示"""
+        # 中文表头每个字占两列，宽度相应减少
+        lines = [f"{'函数':<22}{'次数':>6}{'平均':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'最大':>7}  (ms)"]
+        for name, stats in self.summary():
+            lines.append(
+                f"{name:<24}{stats['calls']:>8}{stats['mean_ms']:>9.2f}{stats['p50_ms']:>9.2f}"
+                f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['max_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def to_dict(self, extra: dict[str, Any] | None = None) -> dict[str, Any]:
+        data = {
+            "exported": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "since": datetime.fromtimestamp(self.started).strftime("%Y-%m-%d %H:%M:%S"),
+            "enabled": self.enabled,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "handlers": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+        }
+        if extra:
+            data.update(extra)
+        return data
+
+    def export(self, path: str, extra: dict[str, Any] | None = None) -> None:
+        """导出为JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(extra), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键分析
+从按键日志统计每个字符和每个双字符的输入次数、错误次数和按键间隔，
+每次测试结束时增量合并，并与历史记录一同持久化(.keys.json)。
+
+统计口径：每个插入事件对应目标文本中同一位置的字符（期望字符）；
+输入的字符与期望字符不同记为该字符的一次错误；
+与上一个事件的间隔记为该字符（以及"前一字符+该字符"双字符）的按键用时，超过MAX_INTERVAL_NS的停顿不计入。
+
+安装了numpy时，多次测试的日志会拼接成整列后一次性分组统计；否则退回到逐事件的纯Python实现。
+numpy在第一次统计时才导入。
+"""
+
+import importlib.util
+import json
+import os
+from typing import Any, Iterable
+
+from keystroke_log import OP_INSERT, KeystrokeLog
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# 超过2秒的间隔视为停顿，不计入按键用时
+MAX_INTERVAL_NS = 2_000_000_000
+
+# 每项统计: [输入次数, 错误次数, 用时总和(ns), 计入用时的次数]
+ATTEMPTS, ERRORS, LATENCY_SUM, LATENCY_COUNT = range(4)
+
+
+def _summarize_numpy(logs: list[KeystrokeLog]) -> tuple[dict[str, list[int]], dict[str, list[int]]]:
+    """把所有日志拼接成整列后分组统计"""
+    if not logs:
+        return {}, {}
+    import numpy as np
+
+    timestamps = np.concatenate([np.frombuffer(log.timestamps, dtype=np.int64) for log in logs])
+    if timestamps.size == 0:
+        # 日志都没有事件（例如空的按键日志文件）
+        return {}, {}
+    positions = np.concatenate([np.frombuffer(log.positions, dtype=np.uint32) for log in logs]).astype(np.int64)
+    codepoints = np.concatenate([np.frombuffer(log.codepoints, dtype=np.uint32) for log in logs])
+    ops = np.concatenate([np.frombuffer(log.ops, dtype=np.uint8) for log in logs])
+    targets = [np.frombuffer(log.target_text.encode("utf-32-le"), dtype="<u4") for log in logs]
+    target_codes = np.concatenate(targets + [np.zeros(1, dtype="<u4")])
+
+    # 每个事件所属的日志，以及该日志目标文本在拼接后的起点和长度
+    event_counts = np.array([len(log) for log in logs])
+    session = np.repeat(np.arange(len(logs)), event_counts)
+    target_lengths = np.array([len(codes) for codes in targets])
+    target_starts = np.concatenate(([0], np.cumsum(target_lengths)[:-1]))
+
+    # 与同一日志中上一个事件的间隔；每个日志的第一个事件没有间隔
+    intervals = np.empty_like(timestamps)
+    intervals[0] = -1
+    intervals[1:] = np.diff(timestamps)
+    first_events = np.concatenate(([0], np.cumsum(event_counts)[:-1]))
+    intervals[first_events[event_counts > 0]] = -1
+
+    keep = (ops == OP_INSERT) & (positions < target_lengths[session])
+    positions = positions[keep]
+    base = target_starts[session[keep]]
+    expected = target_codes[base + positions].astype(np.uint64)
+    errors = codepoints[keep] != expected
+    intervals = intervals[keep]
+    timed = (intervals >= 0) & (intervals <= MAX_INTERVAL_NS)
+
+    previous = target_codes[base + np.maximum(positions - 1, 0)].astype(np.uint64)
+    has_previous = positions > 0
+    bigram_keys = (previous[has_previous] << np.uint64(32)) | expected[has_previous]
+
+    def group(keys, errors, intervals, timed):
+        unique, inverse = np.unique(keys, return_inverse=True)
+        size = len(unique)
+        attempts = np.bincount(inverse, minlength=size)
+        error_counts = np.bincount(inverse, weights=errors, minlength=size)
+        latency_sum = np.bincount(inverse[timed], weights=intervals[timed], minlength=size)
+        latency_count = np.bincount(inverse[timed], minlength=size)
+        return unique, np.stack([attempts, error_counts, latency_sum, latency_count], axis=1).astype(np.int64)
+
+    char_keys, char_rows = group(expected, errors, intervals, timed)
+    bigram_unique, bigram_rows = group(bigram_keys, errors[has_previous],
+                                       intervals[has_previous], timed[has_previous])
+    chars = {chr(int(key)): row.tolist() for key, row in zip(char_keys, char_rows)}
+    bigrams = {chr(int(key) >> 32) + chr(int(key) & 0xFFFFFFFF): row.tolist()
+               for key, row in zip(bigram_unique, bigram_rows)}
+    return chars, bigrams
+
+
+def _summarize_python(logs: list[KeystrokeLog]) -> tuple[dict[str, list[int]], dict[str, list[int]]]:
+    """逐事件统计（没有numpy时使用）"""
+    chars: dict[str, list[int]] = {}
+    bigrams: dict[str, list[int]] = {}
+    for log in logs:
+        target = log.target_text
+        previous_ts = None
+        for ts, op, position, codepoint in zip(log.timestamps, log.ops, log.positions, log.codepoints):
+            interval = ts - previous_ts if previous_ts is not None else -1
+            previous_ts = ts
+            if op != OP_INSERT or position >= len(target):
+                continue
+            expected = target[position]
+            timed = 0 <= interval <= MAX_INTERVAL_NS
+            keys = [(chars, expected)]
+            if position > 0:
+                keys.append((bigrams, target[position - 1] + expected))
+            for table, key in keys:
+                row = table.setdefault(key, [0, 0, 0, 0])
+                row[ATTEMPTS] += 1
+                row[ERRORS] += codepoint != ord(expected)
+                if timed:
+                    row[LATENCY_SUM] += interval
+                    row[LATENCY_COUNT] += 1
+    return chars, bigrams
+
+
+def summarize(logs: Iterable[KeystrokeLog]) -> tuple[dict[str, list[int]], dict[str, list[int]]]:
+    """统计一组日志，返回 (按字符, 按双字符) 的统计"""
+    logs = list(logs)
+    if NUMPY_AVAILABLE:
+        return _summarize_numpy(logs)
+    return _summarize_python(logs)
+
+
+class KeyAnalytics:
+    """所有历史测试的按字符/双字符统计"""
+
+    def __init__(self):
+        self.chars: dict[str, list[int]] = {}
+        self.bigrams: dict[str, list[int]] = {}
+        # 已合并的历史记录条数，用于校验是否与历史记录同步
+        self.records = 0
+
+    def add_log(self, log: KeystrokeLog) -> None:
+        """合并一次测试的按键日志"""
+        self.extend([log])
+
+    def extend(self, logs: Iterable[KeystrokeLog]) -> None:
+        chars, bigrams = summarize(logs)
+        for table, summary in ((self.chars, chars), (self.bigrams, bigrams)):
+            for key, row in summary.items():
+                current = table.setdefault(key, [0, 0, 0, 0])
+                for i, value in enumerate(row):
+                    current[i] += value
+
+    def add_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """读取这些历史记录引用的按键日志并合并（读不出的日志跳过），返回记录条数"""
+        count = 0
+        logs = []
+        for record in records:
+            count += 1
+            path = record.get("keystroke_file")
+            if not path:
+                continue
+            try:
+                logs.append(KeystrokeLog.load(path))
+            except (OSError, ValueError):
+                continue
+        self.extend(logs)
+        return count
+
+    @classmethod
+    def from_history(cls, records: Iterable[dict[str, Any]]) -> "KeyAnalytics":
+        """读取历史记录中引用的全部按键日志重新统计"""
+        analytics = cls()
+        analytics.records = analytics.add_records(records)
+        return analytics
+
+    @staticmethod
+    def error_rate(row: list[int]) -> float:
+        return row[ERRORS] / row[ATTEMPTS] if row[ATTEMPTS] else 0.0
+
+    @staticmethod
+    def mean_latency_ms(row: list[int]) -> float:
+        return row[LATENCY_SUM] / row[LATENCY_COUNT] / 1e6 if row[LATENCY_COUNT] else 0.0
+
+    def overall_latency_ms(self) -> float:
+        """所有字符的平均按键用时"""
+        total = sum(row[LATENCY_SUM] for row in self.chars.values())
+        count = sum(row[LATENCY_COUNT] for row in self.chars.values())
+        return total / count / 1e6 if count else 0.0
+
+    def weakness(self, row: list[int], overall_ms: float) -> float:
+        """错误率加上比平均用时慢出的比例，越大越薄弱"""
+        slowdown = self.mean_latency_ms(row) / overall_ms - 1 if overall_ms else 0.0
+        return self.error_rate(row) + 0.5 * max(0.0, slowdown)
+
+    def weakest(self, count: int = 10, min_attempts: int = 5, bigrams: bool = False,
+                keys: Iterable[str] | None = None) -> list[tuple[str, float]]:
+        """最薄弱的字符（或双字符），可用keys限定范围（例如只看中文字符）"""
+        table = self.bigrams if bigrams else self.chars
+        overall_ms = self.overall_latency_ms()
+        candidates = table.items() if keys is None else ((key, table[key]) for key in keys if key in table)
+        scored = [
+            (key, self.weakness(row, overall_ms)) for key, row in candidates
+            if row[ATTEMPTS] >= min_attempts and not key.isspace()
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:count]
+
+    def weak_chars(self, count: int = 10, min_attempts: int = 5) -> dict[str, float]:
+        """用于按薄弱字符选取文本的 {字符或双字符: 权重}"""
+        weights = dict(self.weakest(count, min_attempts))
+        weights.update(self.weakest(count // 2, min_attempts, bigrams=True))
+        return {key: weight for key, weight in weights.items() if weight > 0}
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"records": self.records, "chars": self.chars, "bigrams": self.bigrams}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "KeyAnalytics":
+        analytics = cls()
+        analytics.records = data.get("records", 0)
+        analytics.chars = {key: list(row) for key, row in data.get("chars", {}).items()}
+        analytics.bigrams = {key: list(row) for key, row in data.get("bigrams", {}).items()}
+        return analytics
+
+    def save(self, path: str) -> None:
+        """原子写入统计文件"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "KeyAnalytics | None":
+        """读取统计文件，不存在或损坏时返回None"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_dict(json.load(f))
+        except (OSError, ValueError, AttributeError, TypeError):
+            return None
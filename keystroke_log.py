@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键事件日志
+用time.perf_counter_ns()记录每次按键，数据按列存放在array中（不创建逐事件的字典），
+并以紧凑的二进制格式随历史记录保存，文件布局按列对齐，之后可以直接内存映射读取。
+
+文件格式（小端序）:
+    头部 32 字节: 魔数 b"KSL1" | 版本 u16 | 标志 u16 | 事件数 u64 | 开始时间(time_ns) i64 | 文本字节数 u64
+    时间戳列 i64[n]   相对测试开始的纳秒数
+    位置列   u32[n]   编辑位置（输入框中的字符偏移）
+    字符列   u32[n]   插入或删除的字符码点
+    操作列   u8[n]    0 = 插入, 1 = 删除
+    目标文本 UTF-8
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Iterator, Sequence
+
+MAGIC = b"KSL1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQqQ")
+
+OP_INSERT = 0
+OP_DELETE = 1
+
+FLAG_CHINESE = 0x1
+
+
+class KeystrokeLog:
+    """按列存储的按键事件缓冲区"""
+
+    def __init__(self, target_text: str = "", language: str = "english"):
+        self.target_text = target_text
+        self.language = language
+        self.start_ns = 0          # perf_counter_ns基准，仅在内存中使用
+        self.wall_start_ns = 0     # 墙上时间，写入文件
+        self.timestamps = array("q")
+        self.positions = array("I")
+        self.codepoints = array("I")
+        self.ops = array("B")
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def reset(self, start_ns: int, target_text: str | None = None, language: str | None = None) -> None:
+        """开始新的记录"""
+        if target_text is not None:
+            self.target_text = target_text
+        if language is not None:
+            self.language = language
+        self.start_ns = start_ns
+        self.wall_start_ns = time.time_ns()
+        self.timestamps = array("q")
+        self.positions = array("I")
+        self.codepoints = array("I")
+        self.ops = array("B")
+
+    def append(self, timestamp_ns: int, op: int, position: int, codepoint: int) -> None:
+        """追加一条事件（时间戳为perf_counter_ns绝对值）"""
+        self.timestamps.append(timestamp_ns - self.start_ns)
+        self.positions.append(position)
+        self.codepoints.append(codepoint)
+        self.ops.append(op)
+
+    def record_edit(self, old_input: str, position: int, removed: int, inserted: str,
+                    timestamps: Sequence[int]) -> None:
+        """把一次合并后的编辑拆分为逐字符事件，并与按键时间戳对齐"""
+        count = removed + len(inserted)
+        if count == 0:
+            return
+        if not timestamps:
+            timestamps = (time.perf_counter_ns(),)
+        # 编辑由最近的count次按键产生；按键不足时沿用最后一个时间戳
+        offset = len(timestamps) - count
+        last = len(timestamps) - 1
+
+        k = 0
+        # 先删除：删除位置保持不变，依次删除原位置上的字符
+        for ch in old_input[position:position + removed]:
+            i = offset + k
+            self.append(timestamps[min(max(i, 0), last)], OP_DELETE, position, ord(ch))
+            k += 1
+        for j, ch in enumerate(inserted):
+            i = offset + k
+            self.append(timestamps[min(max(i, 0), last)], OP_INSERT, position + j, ord(ch))
+            k += 1
+
+    def events(self) -> Iterator[tuple[int, int, int, str]]:
+        """逐条产出 (相对时间ns, 操作, 位置, 字符)"""
+        for ts, op, pos, cp in zip(self.timestamps, self.ops, self.positions, self.codepoints):
+            yield ts, op, pos, chr(cp)
+
+    def elapsed_ns(self) -> int:
+        """最后一个事件相对开始的时间"""
+        return self.timestamps[-1] if self.timestamps else 0
+
+    def save(self, path: str) -> None:
+        """以二进制格式写入文件"""
+        text_bytes = self.target_text.encode("utf-8")
+        flags = FLAG_CHINESE if self.language == "chinese" else 0
+        columns = [self.timestamps, self.positions, self.codepoints, self.ops]
+        if sys.byteorder != "little":
+            columns = [array(col.typecode, col) for col in columns]
+            for col in columns:
+                col.byteswap()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, flags, len(self), self.wall_start_ns, len(text_bytes)))
+            for col in columns:
+                col.tofile(f)
+            f.write(text_bytes)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "KeystrokeLog":
+        """通过内存映射读取二进制日志"""
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < HEADER.size:
+                    raise ValueError(f"不是有效的按键日志文件: {path}")
+                magic, version, flags, count, wall_start_ns, text_size = HEADER.unpack_from(mm, 0)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"不是有效的按键日志文件: {path}")
+
+                # 每个事件占 8+4+4+1 字节
+                if len(mm) < HEADER.size + count * 17 + text_size:
+                    raise ValueError(f"按键日志文件不完整: {path}")
+
+                log = cls(language="chinese" if flags & FLAG_CHINESE else "english")
+                log.wall_start_ns = wall_start_ns
+                offset = HEADER.size
+                for name in ("timestamps", "positions", "codepoints", "ops"):
+                    col = getattr(log, name)
+                    size = count * col.itemsize
+                    col.frombytes(mm[offset:offset + size])
+                    if sys.byteorder != "little":
+                        col.byteswap()
+                    offset += size
+                log.target_text = mm[offset:offset + text_size].decode("utf-8")
+        return log
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 局域网排行榜服务器
+基于asyncio的轻量HTTP服务，接收各客户端提交的测试结果，
+结果先进入队列，由写入任务按批次写入带索引的SQLite；
+排行榜从内存中的最好成绩表直接返回，个人记录查询走索引，都不等待写入。
+只使用标准库，可以在教室里任意一台电脑上运行。
+
+接口:
+    POST /results                       提交一条结果（JSON），返回202
+    GET  /leaderboard?language=english&limit=20
+    GET  /users/<用户名>?limit=50
+    GET  /health
+    GET  /                              网页版排行榜
+
+用法: python leaderboard.py [--host 0.0.0.0] [--port 8765] [--db leaderboard.db]
+"""
+
+import asyncio
+import html
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_PORT = 8765
+LANGUAGES = ("english", "chinese")
+MAX_BODY = 64 * 1024
+MAX_USER_LENGTH = 32
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class LeaderboardStore:
+    """SQLite结果表（只在服务器的数据库线程中访问）"""
+
+    def __init__(self, path: str = "leaderboard.db"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " id INTEGER PRIMARY KEY,"
+            " user TEXT NOT NULL,"
+            " language TEXT NOT NULL,"
+            " wpm INTEGER NOT NULL,"
+            " accuracy INTEGER NOT NULL,"
+            " time INTEGER NOT NULL,"
+            " text_length INTEGER NOT NULL,"
+            " date TEXT NOT NULL,"
+            " received REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_user ON results (user, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_best ON results (language, user, wpm)")
+        self._conn.commit()
+
+    def insert_many(self, rows: list[tuple]) -> None:
+        """一个事务写入一批结果"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO results (user, language, wpm, accuracy, time, text_length, date, received)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def best_scores(self) -> list[tuple]:
+        """每个用户每种语言的最好成绩 (语言, 用户, 最高WPM, 准确率, 测试次数)"""
+        return self._conn.execute(
+            "SELECT language, user, MAX(wpm), accuracy, COUNT(*) FROM results GROUP BY language, user"
+        ).fetchall()
+
+    def user_results(self, user: str, limit: int) -> list[dict[str, Any]]:
+        """某个用户最近的结果（新的在前）"""
+        rows = self._conn.execute(
+            "SELECT language, wpm, accuracy, time, text_length, date FROM results"
+            " WHERE user = ? ORDER BY id DESC LIMIT ?",
+            (user, limit)
+        ).fetchall()
+        return [{"language": r[0], "wpm": r[1], "accuracy": r[2], "time": r[3], "text_length": r[4], "date": r[5]}
+                for r in rows]
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def validate_result(data: Any) -> tuple:
+    """校验提交的结果，返回数据库行；不合法时抛出ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("结果必须是JSON对象")
+    user = data.get("user")
+    if not isinstance(user, str) or not user.strip() or len(user) > MAX_USER_LENGTH:
+        raise ValueError(f"user必须是1-{MAX_USER_LENGTH}个字符的字符串")
+    language = data.get("language", "english")
+    if language not in LANGUAGES:
+        raise ValueError(f"language必须是{'/'.join(LANGUAGES)}")
+    values = []
+    for key, upper in (("wpm", 1000), ("accuracy", 100), ("time", 86400), ("text_length", 10_000_000)):
+        value = data.get(key, 0)
+        if not isinstance(value, int) or isinstance(value, bool) or not 0 <= value <= upper:
+            raise ValueError(f"{key}必须是0-{upper}的整数")
+        values.append(value)
+    date = str(data.get("date") or time.strftime("%Y-%m-%d %H:%M:%S"))[:32]
+    return (user.strip(), language, *values, date, time.time())
+
+
+class LeaderboardServer:
+    """接收结果并提供排行榜查询的asyncio服务器"""
+
+    def __init__(self, db_path: str = "leaderboard.db", host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 batch_size: int = 500, batch_interval: float = 0.05, queue_size: int = 100_000):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        # 每批最多写入batch_size条；队列有数据时最多等待batch_interval秒凑成一批
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        # 所有数据库操作在同一个线程中串行执行，不阻塞事件循环
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="leaderboard-db")
+        self.store: LeaderboardStore | None = None
+        # (语言, 用户) -> [最高WPM, 准确率, 测试次数]
+        self._best: dict[tuple[str, str], list[int]] = {}
+        self._ranking_cache: dict[str, list[dict[str, Any]]] = {}
+        self._server: asyncio.AbstractServer | None = None
+        self._writer_task: asyncio.Task | None = None
+        self.received = 0
+        self.written = 0
+        self.batches = 0
+
+    async def _db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    async def start(self) -> None:
+        self.store = await self._db(LeaderboardStore, self.db_path)
+        for language, user, wpm, accuracy, tests in await self._db(self.store.best_scores):
+            self._best[(language, user)] = [wpm, accuracy, tests]
+        self._writer_task = asyncio.create_task(self._write_batches())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # port为0时由系统分配端口
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """停止接收连接，写完队列中剩余的结果后关闭数据库"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.queue.join()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        if self.store is not None:
+            await self._db(self.store.close)
+        self._db_executor.shutdown()
+
+    async def _write_batches(self) -> None:
+        """批量写入任务：取到第一条后再收集一小段时间，整批用一个事务提交"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._db(self.store.insert_many, batch)
+                self._update_best(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except sqlite3.Error as e:
+                print(f"❌ 写入数据库失败，丢弃{len(batch)}条结果: {e}")
+            except Exception as e:
+                # 其他异常只影响这一批，写入任务必须继续运行，否则之后的结果都不会再写入
+                print(f"❌ 批量写入{len(batch)}条结果时发生意外错误: {e!r}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _update_best(self, rows: list[tuple]) -> None:
+        for user, language, wpm, accuracy, *_ in rows:
+            best = self._best.get((language, user))
+            if best is None:
+                self._best[(language, user)] = [wpm, accuracy, 1]
+            else:
+                if wpm > best[0]:
+                    best[0], best[1] = wpm, accuracy
+                best[2] += 1
+        self._ranking_cache.clear()
+
+    def leaderboard(self, language: str, limit: int) -> list[dict[str, Any]]:
+        """某种语言的排行榜；排序结果在下一批写入前一直复用"""
+        ranking = self._ranking_cache.get(language)
+        if ranking is None:
+            entries = [(best, user) for (lang, user), best in self._best.items() if lang == language]
+            entries.sort(key=lambda entry: (-entry[0][0], -entry[0][1], entry[1]))
+            ranking = [{"rank": i + 1, "user": user, "wpm": best[0], "accuracy": best[1], "tests": best[2]}
+                       for i, (best, user) in enumerate(entries)]
+            self._ranking_cache[language] = ranking
+        return ranking[:limit]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接上的请求（支持HTTP/1.1长连接）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "无效的请求"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "无效的Content-Length"}, keep_alive=False)
+                    break
+                if length < 0 or length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "请求体过大"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                status, payload = await self._route(method.upper(), target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+
+        def limit(default: int) -> int:
+            try:
+                return max(1, min(int(query.get("limit", [default])[0]), 1000))
+            except ValueError:
+                return default
+
+        if url.path == "/results":
+            if method != "POST":
+                return 405, {"error": "请使用POST提交结果"}
+            try:
+                row = validate_result(json.loads(body or b"null"))
+            except ValueError as e:
+                return 400, {"error": str(e)}
+            try:
+                self.queue.put_nowait(row)
+            except asyncio.QueueFull:
+                return 503, {"error": "服务器繁忙，请稍后重试"}
+            self.received += 1
+            return 202, {"queued": True}
+
+        if method != "GET":
+            return 405, {"error": "不支持的请求方法"}
+        if url.path == "/leaderboard":
+            language = query.get("language", ["english"])[0]
+            if language not in LANGUAGES:
+                return 400, {"error": f"language必须是{'/'.join(LANGUAGES)}"}
+            return 200, {"language": language, "entries": self.leaderboard(language, limit(20))}
+        if url.path.startswith("/users/"):
+            user = unquote(url.path[len("/users/"):])
+            results = await self._db(self.store.user_results, user, limit(50))
+            best = {lang: self._best[(lang, user)][0] for lang in LANGUAGES if (lang, user) in self._best}
+            return 200, {"user": user, "best_wpm": best, "results": results}
+        if url.path == "/health":
+            return 200, {"received": self.received, "written": self.written, "batches": self.batches,
+                         "queued": self.queue.qsize(), "users": len({user for _, user in self._best})}
+        if url.path == "/":
+            return 200, self._render_page(query.get("language", ["english"])[0])
+        return 404, {"error": "未知的路径"}
+
+    def _render_page(self, language: str) -> str:
+        """网页版排行榜"""
+        if language not in LANGUAGES:
+            language = "english"
+        rows = "".join(
+            f"<tr><td>{e['rank']}</td><td>{html.escape(e['user'])}</td><td>{e['wpm']}</td>"
+            f"<td>{e['accuracy']}%</td><td>{e['tests']}</td></tr>"
+            for e in self.leaderboard(language, 100)
+        )
+        other = "chinese" if language == "english" else "english"
+        return (
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><meta http-equiv='refresh' content='10'>"
+            "<title>打字排行榜</title></head><body>"
+            f"<h1>🏆 打字排行榜（{'中文' if language == 'chinese' else '英文'}）</h1>"
+            f"<p><a href='/?language={other}'>切换到{'中文' if other == 'chinese' else '英文'}</a></p>"
+            "<table border='1' cellpadding='4'><tr><th>名次</th><th>用户</th><th>最高WPM</th>"
+            f"<th>准确率</th><th>测试次数</th></tr>{rows}</table></body></html>"
+        )
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(db_path: str, host: str, port: int) -> None:
+    server = LeaderboardServer(db_path, host, port)
+    await server.start()
+    print(f"🏆 排行榜服务器已启动: http://{host}:{server.port}/ （数据库 {db_path}）")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="局域网打字排行榜服务器")
+    parser.add_argument("--host", default="0.0.0.0", help="监听地址，只在本机使用时可设为127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="监听端口")
+    parser.add_argument("--db", default="leaderboard.db", help="SQLite数据库文件")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.db, args.host, args.port))
+    except KeyboardInterrupt:
+        print("👋 服务器已停止")
+
+
+if __name__ == "__main__":
+    main()
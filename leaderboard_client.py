@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 排行榜客户端
+向局域网排行榜服务器（leaderboard.py）提交测试结果和查询排行榜。
+这些都是阻塞调用，界面中通过BackgroundRunner在后台线程执行。
+提交失败的结果保存在PendingResults中，下次提交时按顺序补交。
+"""
+
+import getpass
+import json
+import os
+import urllib.request
+from typing import Any
+from urllib.parse import quote, urlencode
+
+DEFAULT_TIMEOUT = 5
+RESULT_FIELDS = ("wpm", "accuracy", "time", "text_length", "language", "date")
+# 最多保留的待补交结果条数，超出时丢弃最早的
+MAX_PENDING = 1000
+
+
+def default_user() -> str:
+    """默认用户名：当前登录的系统用户"""
+    try:
+        return getpass.getuser()
+    except Exception:
+        return "anonymous"
+
+
+def _request(url: str, data: dict[str, Any] | None = None, timeout: float = DEFAULT_TIMEOUT) -> Any:
+    body = json.dumps(data, ensure_ascii=False).encode("utf-8") if data is not None else None
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def make_payload(user: str, result: dict[str, Any]) -> dict[str, Any]:
+    """提交的内容：只包含成绩字段，不包含按键日志路径等本地信息"""
+    payload = {key: result[key] for key in RESULT_FIELDS if key in result}
+    payload["user"] = user
+    return payload
+
+
+def post_result(server_url: str, user: str, result: dict[str, Any], timeout: float = DEFAULT_TIMEOUT) -> Any:
+    """提交一条测试结果"""
+    return _request(server_url.rstrip("/") + "/results", make_payload(user, result), timeout)
+
+
+def post_payloads(server_url: str, payloads: list[dict[str, Any]],
+                  timeout: float = DEFAULT_TIMEOUT) -> tuple[int, Exception | None]:
+    """按顺序提交，遇到第一个失败就停止；返回 (成功条数, 错误)"""
+    for sent, payload in enumerate(payloads):
+        try:
+            _request(server_url.rstrip("/") + "/results", payload, timeout)
+        except Exception as e:
+            return sent, e
+    return len(payloads), None
+
+
+class PendingResults:
+    """提交失败、等待补交的结果，保存在JSON文件中，程序重启后仍会补交"""
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError):
+            items = []
+        self.items: list[dict[str, Any]] = items if isinstance(items, list) else []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, payload: dict[str, Any]) -> None:
+        self.items.append(payload)
+        del self.items[:-MAX_PENDING]
+        self._save()
+
+    def remove_first(self, count: int) -> None:
+        """删除已经补交成功的前count条"""
+        if count:
+            del self.items[:count]
+            self._save()
+
+    def _save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.items, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # 写入失败时待补交的结果只保留在内存中
+            pass
+
+
+def fetch_leaderboard(server_url: str, language: str = "english", limit: int = 20,
+                      timeout: float = DEFAULT_TIMEOUT) -> list[dict[str, Any]]:
+    """查询某种语言的排行榜"""
+    query = urlencode({"language": language, "limit": limit})
+    return _request(f"{server_url.rstrip('/')}/leaderboard?{query}", timeout=timeout)["entries"]
+
+
+def fetch_user(server_url: str, user: str, limit: int = 50, timeout: float = DEFAULT_TIMEOUT) -> dict[str, Any]:
+    """查询某个用户的最好成绩和最近结果"""
+    return _request(f"{server_url.rstrip('/')}/users/{quote(user)}?limit={limit}", timeout=timeout)
@@ -13,29 +13,47 @@
 - 增强了程序稳定性和代码质量
 """
 
+import time
+STARTUP_T0 = time.perf_counter()  # 用于 --profile-startup 的启动计时起点
+
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
-import time
+from tkinter import filedialog, messagebox
 import json
 import os
-from datetime import datetime
-import random
-from typing import Any
-try:
-    from zhipuai import ZhipuAI
-    AI_AVAILABLE: bool = True
-except ImportError:
-    AI_AVAILABLE: bool = False
-    ZhipuAI = None  # 类型占位符
+import sys
+from typing import Any, Sequence
+from array import array
+from session import TypingSession
+from passages import ENGLISH_TEXTS, CHINESE_TEXTS
+from corpus import MAX_DIFFICULTY, CorpusPassageSource
+from passage_selector import FeatureTable, PassageSelector
+from highlighter import TextHighlighter
+from scheduler import FrameScheduler, StatsTicker
+from rolling import RollingRate
+from sparkline import Sparkline
+from history_store import HistoryStore
+from replay import SessionReplay
+from passage_cache import PassageCache
+from instrumentation import Instrumentation
+# zhipuai在首次使用AI功能时才由ai_text.create_client导入
+from ai_text import (STYLE_OPTIONS, AI_MODEL, AI_AVAILABLE, BackgroundRunner, TaskHandle, PassagePool,
+                     create_client, generate_passage, resolve_style)
+
+IMPORTS_DONE = time.perf_counter()
 
 # 设置CustomTkinter主题
 ctk.set_appearance_mode("dark")  # 可选: "light", "dark", "system"
 ctk.set_default_color_theme("blue")  # 可选: "blue", "green", "dark-blue"
 
 
+# 诊断窗口中计时的高频处理函数
+HOT_HANDLERS = ("on_key_press", "on_text_change", "process_input", "calculate_stats", "highlight_text",
+                "update_stats_display", "save_history", "generate_ai_text")
+
+
 class TypingSpeedTest:
-    def __init__(self):
+    def __init__(self, ai_client: Any = None, diagnostics: bool = False):
         # 初始化主窗口
         self.root = ctk.CTk()
         self.root.title("打字速度检测器 v1.0.1")
@@ -44,58 +62,69 @@ class TypingSpeedTest:
         
         # 测试状态变量
         self.is_testing = False
-        self.start_time = None
         self.current_text = ""
         self.user_input = ""
-        self.current_position = 0
         self.correct_chars = 0
         self.total_chars = 0
         self.wpm = 0
         self.accuracy = 100
+        # 计时、计分和按键记录都由不依赖GUI的会话引擎完成
+        self.session = TypingSession()
+        self.keystroke_dir = "keystrokes"
+        # 最近几秒的瞬时速度
+        self.speed_tracker = RollingRate()
+        self.rolling_window = 5.0
+        # 正在回放的按键日志
+        self.replay: SessionReplay | None = None
         
         # 历史记录
-        self.history_file = "typing_history.json"
+        self.history_file = "typing_history.jsonl"
+        self.legacy_history_file = "typing_history.json"
+        self.history_page_size = 20  # 历史记录窗口每页条数
         self.load_history()
+        self.key_analytics_file = self.history_file + ".keys.json"
+        # 按键统计在第一次用到时才在后台加载（key_analytics会导入numpy，不放在启动路径上）
+        self.key_analytics = None
+        self.key_analytics_loading = False
 
         # AI配置
         self.config_file = "config.json"
-        self.ai_client = None
+        self.ai_client = None  # 首次使用时才创建
+        self.ai_api_key = ""
         self.ai_style = "随机"  # 默认风格
+        self.input_fps = 60  # 输入处理的最高帧率
+        self.stats_rate = 10  # 统计栏每秒刷新次数
+        self.ai_timeout = 30  # AI生成超时时间（秒）
+        self.ai_prefetch = 3  # 每种语言和风格预取的AI文本数量
+        self.ai_cache_file = "ai_cache.db"
+        self.ai_cache_size = 500  # 磁盘缓存的AI文本数量上限
+        self.corpus_dir = "corpus"  # 外部文本库目录（.txt每行一段，或.jsonl）
+        self.passage_difficulty = 0  # 练习文本难度1-5，0为不限
+        self.leaderboard_url = ""  # 排行榜服务器地址，为空时不提交
+        self.leaderboard_user = ""  # 提交到排行榜的用户名，为空时使用系统用户名
+        self.leaderboard_pending_file = "leaderboard_pending.json"  # 提交失败、等待补交的结果
+        self.leaderboard_pending = None
+        self.leaderboard_posting = False
         self.load_config()
+        if ai_client is not None:
+            # 允许注入客户端（例如ai_text.FakeAIClient）用于离线测试
+            self.ai_client = ai_client
+        self.ai_runner = BackgroundRunner(self.root)
+        self.ai_task: TaskHandle | None = None
+        self.pending_ai_text: str | None = None
+        self.ai_cache = PassageCache(self.ai_cache_file, self.ai_cache_size)
+        self.ai_pool = PassagePool(self.get_ai_client, capacity=self.ai_prefetch,
+                                   generator=self.generate_and_cache)
         
         # 当前语言模式
         self.current_language = "english"  # "english" 或 "chinese"
 
-        # 英文测试文本库
-        self.english_texts = [
-            "The quick brown fox jumps over the lazy dog. This sentence contains every letter of the alphabet at least once.",
-            "Python is a high-level programming language that emphasizes code readability and simplicity.",
-            "Artificial intelligence is transforming the way we work, learn, and interact with technology.",
-            "The future belongs to those who believe in the beauty of their dreams and work hard to achieve them.",
-            "In the digital age, typing skills have become essential for effective communication and productivity.",
-            "Practice makes perfect, and consistent effort leads to remarkable improvement in any skill.",
-            "Technology has revolutionized our daily lives, making tasks easier and more efficient than ever before.",
-            "Learning new skills requires patience, dedication, and the willingness to embrace challenges.",
-            "The internet has connected people from all corners of the world, creating a global community.",
-            "Success is not final, failure is not fatal: it is the courage to continue that counts most."
-        ]
+        # 练习文本来源
+        self.passages = self.load_passages()
 
-        # 中文测试文本库
-        self.chinese_texts = [
-            "熟能生巧，勤能补拙。只有通过不断的练习，才能提高打字速度和准确率。",
-            "科技改变生活，创新驱动发展。人工智能正在深刻地改变着我们的工作和生活方式。",
-            "学而时习之，不亦说乎。学习是一个持续的过程，需要我们保持好奇心和求知欲。",
-            "千里之行，始于足下。每一个伟大的成就都是从小小的步骤开始的。",
-            "工欲善其事，必先利其器。掌握好的工具和技能是成功的重要基础。",
-            "海纳百川，有容乃大。包容和理解是人际交往中最重要的品质之一。",
-            "书山有路勤为径，学海无涯苦作舟。知识的获取需要我们付出努力和坚持。",
-            "天行健，君子以自强不息。面对困难和挑战，我们要保持积极向上的态度。",
-            "己所不欲，勿施于人。这是中华文化中关于道德修养的重要思想。",
-            "路漫漫其修远兮，吾将上下而求索。追求真理和知识的道路虽然漫长，但值得我们坚持。"
-        ]
-
-        # 当前文本库
-        self.text_samples = self.english_texts
+        # 热点函数计时（默认关闭），必须在绑定事件回调之前包装
+        self.instrumentation = Instrumentation(diagnostics)
+        self.instrumentation.instrument(self, HOT_HANDLERS)
         
         self.setup_ui()
         self.select_random_text()
@@ -135,6 +164,18 @@ class TypingSpeedTest:
             font=ctk.CTkFont(size=18, weight="bold")
         )
         self.time_label.pack(side="left", padx=20, pady=10)
+
+        # 最近几秒的瞬时速度和走势
+        self.rolling_label = ctk.CTkLabel(
+            stats_frame,
+            text=f"{self.rolling_window:g}秒: 0",
+            font=ctk.CTkFont(size=14)
+        )
+        self.rolling_label.pack(side="left", padx=(20, 5), pady=10)
+
+        sparkline_canvas = tk.Canvas(stats_frame)
+        sparkline_canvas.pack(side="left", padx=5, pady=10)
+        self.sparkline = Sparkline(sparkline_canvas)
         
         self.progress_label = ctk.CTkLabel(
             stats_frame, 
@@ -180,6 +221,11 @@ class TypingSpeedTest:
         self.input_textbox.pack(padx=10, pady=5, fill="x")
         self.input_textbox.bind("<KeyRelease>", self.on_text_change)
         self.input_textbox.bind("<Key>", self.on_key_press)
+        # 输入变化按帧合并处理，避免按键连发时重复计算
+        self.input_scheduler = FrameScheduler(self.root, self.process_input, self.input_fps)
+        # 统计栏按固定频率刷新；只在文字变化时才更新标签
+        self.stats_ticker = StatsTicker(self.root, self.update_stats_timer, self.stats_rate)
+        self.label_texts: dict[Any, str] = {}
         
         # 控制按钮框架
         button_frame = ctk.CTkFrame(self.root)
@@ -253,63 +299,105 @@ class TypingSpeedTest:
             font=ctk.CTkFont(size=16, weight="bold"),
             height=40,
             width=120,
-            state="disabled" if not AI_AVAILABLE else "normal"
+            state="normal" if AI_AVAILABLE else self.ai_button_state()
         )
         self.ai_text_button.pack(side="left", padx=10)
+
+        # 取消AI生成按钮（仅在生成过程中显示）
+        self.ai_cancel_button = ctk.CTkButton(
+            button_frame,
+            text="取消",
+            command=self.cancel_ai_text,
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=40,
+            width=60
+        )
+
+        # 状态栏：后台任务的提示（如排行榜提交失败），不打断练习
+        self.status_label = ctk.CTkLabel(self.root, text="", font=ctk.CTkFont(size=12), anchor="w")
+        self.status_label.pack(padx=20, pady=(0, 10), fill="x")
         
         # 配置文本高亮标签
         self.text_display.tag_configure("correct", background="#2d5a2d", foreground="#90ee90")
         self.text_display.tag_configure("incorrect", background="#5a2d2d", foreground="#ff6b6b")
         self.text_display.tag_configure("current", background="#4a4a4a", foreground="#ffff00")
         self.text_display.tag_configure("remaining", background="#2b2b2b", foreground="#ffffff")
+        self.highlighter = TextHighlighter(self.text_display)
+
+        # F12打开诊断窗口
+        self.root.bind("<F12>", lambda event: self.show_diagnostics())
         
     def toggle_language(self):
         """切换语言模式"""
         if self.current_language == "english":
             self.current_language = "chinese"
-            self.text_samples = self.chinese_texts
             self.language_button.configure(text="English")
         else:
             self.current_language = "english"
-            self.text_samples = self.english_texts
             self.language_button.configure(text="中文模式")
 
+        # 丢弃为另一种语言生成的AI文本
+        if self.pending_ai_text is not None:
+            self.pending_ai_text = None
+            self.ai_text_button.configure(text="🤖 AI文本")
+        if self.ai_client is not None:
+            self.ai_pool.prefetch(self.current_language, self.ai_style)
+
         # 重置当前测试并选择新文本
         self.reset_test()
         self.select_random_text()
 
     def select_random_text(self):
         """选择随机文本"""
-        self.current_text = random.choice(self.text_samples)
+        self.current_text = self.passages.random_passage(self.current_language, self.passage_difficulty or None)
         self.update_text_display()
         
+    def select_weak_key_text(self):
+        """选择包含较多薄弱字符的文本"""
+        # 按键统计还在加载时先按普通方式选取
+        analytics = self.ensure_key_analytics()
+        weak_chars = analytics.weak_chars() if analytics is not None else None
+        self.current_text = self.passages.select(self.current_language, self.passage_difficulty or None,
+                                                 weak_chars=weak_chars or None)
+        self.update_text_display()
+
     def update_text_display(self):
         """更新文本显示"""
-        self.text_display.config(state="normal")
-        self.text_display.delete(1.0, tk.END)
-        self.text_display.insert(1.0, self.current_text)
-        self.text_display.tag_add("remaining", 1.0, tk.END)
-        self.text_display.config(state="disabled")
+        self.stop_replay()
+        # 多行和长文本的索引换算、窗口显示都由高亮层处理
+        self.highlighter.set_text(self.current_text)
+        self.session.load(self.current_text, self.current_language)
+        self.highlighter.reset(self.session.scoring)
         
     def start_test(self):
         """开始测试"""
         if not self.is_testing:
             self.is_testing = True
-            self.start_time = time.time()
+            self.session.load(self.current_text, self.current_language)
+            self.session.start()
+            # 测试过程中在后台准备好按键统计，结束时直接合并
+            self.ensure_key_analytics()
             self.start_button.configure(text="测试中...", state="disabled")
             self.input_textbox.delete("1.0", tk.END)
             self.input_textbox.focus()
-            self.update_stats_timer()
+            self.highlighter.reset(self.session.scoring)
+            self.speed_tracker.reset(self.session.start_ns, self.current_language)
+            self.sparkline.clear()
+            self.stats_ticker.start()
             
     def reset_test(self):
         """重置测试"""
+        self.stop_replay()
         self.is_testing = False
-        self.start_time = None
-        self.current_position = 0
+        self.user_input = ""
         self.correct_chars = 0
         self.total_chars = 0
         self.wpm = 0
         self.accuracy = 100
+        self.input_scheduler.cancel()
+        self.stats_ticker.stop()
+        self.speed_tracker.reset()
+        self.sparkline.clear()
         
         self.start_button.configure(text="开始测试", state="normal")
         self.input_textbox.delete("1.0", tk.END)
@@ -322,8 +410,18 @@ class TypingSpeedTest:
         if not self.is_testing and event.char and event.char.isprintable():
             self.start_test()
 
+        # 记录产生输入的按键时间戳，文本在按键处理完成后的下一帧读取
+        if event.char or event.keysym in ("BackSpace", "Delete"):
+            self.input_scheduler.mark_dirty(time.perf_counter_ns())
+        else:
+            self.input_scheduler.mark_dirty()
+
     def on_text_change(self, event) -> None:
-        """处理文本变化"""
+        """处理文本变化（仅标记，实际处理合并到下一帧）"""
+        self.input_scheduler.mark_dirty()
+
+    def process_input(self, keystroke_times: array) -> None:
+        """每帧最多执行一次的输入处理"""
         current_input = self.input_textbox.get("1.0", tk.END).rstrip('\n')
 
         # 如果还没开始测试，但用户已经输入了内容，则自动开始
@@ -334,102 +432,75 @@ class TypingSpeedTest:
             return
 
         self.user_input = current_input
-        self.calculate_stats()
+        self.calculate_stats(keystroke_times)
         self.highlight_text()
 
         # 检查是否完成
         if len(self.user_input) >= len(self.current_text):
             self.finish_test()
             
-    def calculate_stats(self):
+    def calculate_stats(self, keystroke_times: Sequence[int] = ()):
         """计算统计数据"""
-        if not self.start_time:
+        if not self.session.active:
             return
-            
-        # 计算时间
-        elapsed_time = time.time() - self.start_time
-        
-        # 计算正确字符数和总字符数
-        self.total_chars = len(self.user_input)
-        self.correct_chars = 0
-        
-        for i in range(min(len(self.user_input), len(self.current_text))):
-            if self.user_input[i] == self.current_text[i]:
-                self.correct_chars += 1
-                
-        # 计算WPM (Words Per Minute)
-        if elapsed_time > 0:
-            if self.current_language == "chinese":
-                # 中文按字符计算，每个汉字算作一个词
-                self.wpm = int(self.correct_chars / (elapsed_time / 60))
-            else:
-                # 英文按标准计算，5个字符算作一个词
-                self.wpm = int((self.correct_chars / 5) / (elapsed_time / 60))
-            
-        # 计算准确率
-        if self.total_chars > 0:
-            self.accuracy = int((self.correct_chars / self.total_chars) * 100)
-        else:
-            self.accuracy = 100
-            
+
+        # 按编辑增量计分并记录按键，速度按最后一次按键的精确时间计算
+        self.session.process(self.user_input, keystroke_times)
+        self.track_speed(self.session.last_edit[2], keystroke_times)
+        self.total_chars = self.session.total_chars
+        self.correct_chars = self.session.correct_chars
+        self.wpm = self.session.wpm
+        self.accuracy = self.session.accuracy
+
+    def track_speed(self, inserted: str, keystroke_times: Sequence[int]) -> None:
+        """把本次插入的字符计入瞬时速度（与最近的按键时间戳对齐）"""
+        if not inserted:
+            return
+        if not keystroke_times:
+            keystroke_times = (time.perf_counter_ns(),)
+        last = len(keystroke_times) - 1
+        offset = len(keystroke_times) - len(inserted)
+        for i in range(len(inserted)):
+            self.speed_tracker.add(keystroke_times[min(max(offset + i, 0), last)])
+
     def highlight_text(self):
-        """高亮显示文本"""
-        self.text_display.config(state="normal")
-        
-        # 清除所有标签
-        for tag in ["correct", "incorrect", "current", "remaining"]:
-            self.text_display.tag_remove(tag, 1.0, tk.END)
-            
-        user_len = len(self.user_input)
-        text_len = len(self.current_text)
-        
-        # 标记已输入的字符
-        for i in range(min(user_len, text_len)):
-            start_pos = f"1.{i}"
-            end_pos = f"1.{i+1}"
-            
-            if self.user_input[i] == self.current_text[i]:
-                self.text_display.tag_add("correct", start_pos, end_pos)
-            else:
-                self.text_display.tag_add("incorrect", start_pos, end_pos)
-                
-        # 标记当前位置
-        if user_len < text_len:
-            current_pos = f"1.{user_len}"
-            next_pos = f"1.{user_len + 1}"
-            self.text_display.tag_add("current", current_pos, next_pos)
-            
-        # 标记剩余文本
-        if user_len < text_len:
-            remaining_start = f"1.{user_len + 1}"
-            self.text_display.tag_add("remaining", remaining_start, tk.END)
-            
-        self.text_display.config(state="disabled")
-        
+        """高亮显示文本（只重新标记最近一次编辑影响的区间）"""
+        self.highlighter.render(self.session.scoring)
+
+    def set_label_text(self, label, text: str) -> None:
+        """文字与上次相同时跳过configure，避免不必要的重绘"""
+        if self.label_texts.get(label) != text:
+            label.configure(text=text)
+            self.label_texts[label] = text
+
     def update_stats_display(self):
         """更新统计显示"""
-        self.wpm_label.configure(text=f"WPM: {self.wpm}")
-        self.accuracy_label.configure(text=f"准确率: {self.accuracy}%")
+        self.set_label_text(self.wpm_label, f"WPM: {self.wpm}")
+        self.set_label_text(self.accuracy_label, f"准确率: {self.accuracy}%")
+        self.set_label_text(self.rolling_label, f"{self.rolling_window:g}秒: {self.speed_tracker.wpm(self.rolling_window)}")
         
-        if self.start_time:
-            elapsed = int(time.time() - self.start_time)
-            self.time_label.configure(text=f"时间: {elapsed}s")
+        if self.session.active:
+            self.set_label_text(self.time_label, f"时间: {self.session.elapsed():.1f}s")
         else:
-            self.time_label.configure(text="时间: 0s")
+            self.set_label_text(self.time_label, "时间: 0s")
             
         # 计算进度
         if len(self.current_text) > 0:
             progress = int((len(self.user_input) / len(self.current_text)) * 100)
             progress = min(progress, 100)
-            self.progress_label.configure(text=f"进度: {progress}%")
+            self.set_label_text(self.progress_label, f"进度: {progress}%")
         else:
-            self.progress_label.configure(text="进度: 0%")
+            self.set_label_text(self.progress_label, "进度: 0%")
             
     def update_stats_timer(self):
-        """定时更新统计"""
-        if self.is_testing:
-            self.update_stats_display()
-            self.root.after(1000, self.update_stats_timer)
+        """定时更新统计（由StatsTicker按固定频率调用）"""
+        if not self.is_testing:
+            self.stats_ticker.stop()
+            return
+        self.update_stats_display()
+        # 折线图每秒采样一次
+        if self.stats_ticker.ticks % max(1, round(self.stats_ticker.rate)) == 0:
+            self.sparkline.add(self.speed_tracker.wpm(self.rolling_window))
             
     def finish_test(self):
         """完成测试"""
@@ -437,65 +508,239 @@ class TypingSpeedTest:
             return
 
         self.is_testing = False
-        if self.start_time is None:
+        self.stats_ticker.stop()
+        if not self.session.active:
             return
-        elapsed_time = time.time() - self.start_time
+        end_ns = time.perf_counter_ns()
+        elapsed_time = self.session.elapsed(end_ns)
 
         # 保存结果到历史记录
-        result = {
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "wpm": self.wpm,
-            "accuracy": self.accuracy,
-            "time": int(elapsed_time),
-            "text_length": len(self.current_text),
-            "language": self.current_language,
-            "correct_chars": self.correct_chars,
-            "total_chars": self.total_chars
-        }
+        result = self.session.finish(end_ns)
 
-        self.history.append(result)
-        self.save_history()
+        # 保存按键日志
+        try:
+            result["keystroke_file"] = self.session.save_keystroke_log(self.keystroke_dir)
+        except OSError as e:
+            messagebox.showerror("错误", f"保存按键日志失败: {e}")
+
+        self.save_history(result)
+        self.update_key_analytics()
+        self.post_leaderboard_result(result)
 
         # 显示专业测试报告
         self.show_test_report(result, elapsed_time)
 
         self.start_button.configure(text="开始测试", state="normal")
         
-    def load_history(self):
-        """加载历史记录"""
+    def replay_record(self, record: dict[str, Any]) -> None:
+        """在主窗口中按原始节奏回放一次测试，结束后与保存的结果核对"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.history = json.load(f)
+            replay = SessionReplay.from_file(record['keystroke_file'], session=self.session,
+                                             highlighter=self.highlighter, on_step=self.on_replay_step)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"读取按键日志失败: {e}")
+            return
+
+        self.reset_test()
+        self.current_language = replay.log.language
+        self.language_button.configure(text="English" if self.current_language == "chinese" else "中文模式")
+        self.current_text = replay.log.target_text
+        self.start_button.configure(text="回放中...", state="disabled")
+        # 回放期间不接受输入
+        self.input_textbox.configure(state="disabled")
+
+        def on_done():
+            self.replay = None
+            problems = replay.verify(record)
+            self.session.finish()
+            self.input_textbox.configure(state="normal")
+            self.start_button.configure(text="开始测试", state="normal")
+            if problems:
+                messagebox.showwarning("回放完成", "回放结果与保存的结果不一致:\n" + "\n".join(problems))
             else:
-                self.history = []
-        except:
-            self.history = []
-            
-    def save_history(self):
-        """保存历史记录"""
+                messagebox.showinfo("回放完成", f"回放结果与保存的结果一致\nWPM: {record['wpm']} | 准确率: {record['accuracy']}%")
+
+        self.replay = replay
+        replay.start(time.perf_counter_ns())
+        replay.play(self.root, on_done=on_done)
+
+    def on_replay_step(self, session: TypingSession) -> None:
+        """回放每一步后更新统计栏"""
+        self.user_input = session.user_input
+        self.total_chars = session.total_chars
+        self.correct_chars = session.correct_chars
+        self.wpm = session.wpm
+        self.accuracy = session.accuracy
+        self.update_stats_display()
+
+    def stop_replay(self) -> None:
+        """中止正在进行的回放"""
+        if self.replay is None:
+            return
+        self.replay.stop()
+        self.replay = None
+        self.session.finish()
+        self.input_textbox.configure(state="normal")
+
+    def post_leaderboard_result(self, result: dict[str, Any]) -> None:
+        """在后台把结果提交到排行榜服务器（未配置时跳过）；连同之前提交失败的结果一起按顺序提交"""
+        if not self.leaderboard_url:
+            return
+        # 只在使用排行榜时导入网络模块
+        from leaderboard_client import PendingResults, default_user, make_payload, post_payloads
+
+        if self.leaderboard_pending is None:
+            self.leaderboard_pending = PendingResults(self.leaderboard_pending_file)
+        pending = self.leaderboard_pending
+        pending.add(make_payload(self.leaderboard_user or default_user(), result))
+        if self.leaderboard_posting:
+            # 上一批还在提交，本条留到下次
+            return
+
+        self.leaderboard_posting = True
+        url = self.leaderboard_url
+        payloads = list(pending.items)
+
+        def on_done(outcome) -> None:
+            self.leaderboard_posting = False
+            sent, error = outcome
+            pending.remove_first(sent)
+            if error is not None:
+                self.set_status(f"🏆 排行榜提交失败，{len(pending)}条结果将在下次测试后重试: {error}")
+            elif sent > 1:
+                self.set_status(f"🏆 已补交{sent - 1}条之前提交失败的结果")
+            else:
+                self.set_status("")
+
+        def on_error(error: Exception) -> None:
+            # 超时：结果仍在待补交列表中
+            self.leaderboard_posting = False
+            self.set_status(f"🏆 排行榜提交失败，{len(pending)}条结果将在下次测试后重试: {error}")
+
+        self.ai_runner.submit(lambda: post_payloads(url, payloads), on_done, on_error,
+                              timeout=10 + 5 * len(payloads))
+
+    def set_status(self, text: str) -> None:
+        """更新主窗口底部的状态栏（不弹窗）"""
+        self.status_label.configure(text=text)
+
+    def load_history(self):
+        """加载历史记录"""
+        # 只校验文件尾部和索引，不解析全部记录；旧版JSON文件会被自动迁移
+        self.history = HistoryStore(self.history_file, self.legacy_history_file)
+
+    def ensure_key_analytics(self):
+        """返回按键统计；还没有加载时在后台开始加载并返回None"""
+        if self.key_analytics is None and not self.key_analytics_loading:
+            self.key_analytics_loading = True
+            path = self.key_analytics_file
+            history = self.history
+            count = len(history)
+            self.ai_runner.submit(lambda: self.load_key_analytics(path, history, count),
+                                  self.on_key_analytics_loaded, self.on_key_analytics_error)
+        return self.key_analytics
+
+    @staticmethod
+    def load_key_analytics(path: str, history: HistoryStore, count: int):
+        """读取按键统计并补上统计文件之后的count条以内的记录（在后台线程中执行）；
+        统计文件缺失或多于历史记录时读取全部按键日志重新统计"""
+        from key_analytics import KeyAnalytics
+
+        analytics = KeyAnalytics.load(path)
+        if analytics is None or analytics.records > count:
+            analytics = KeyAnalytics()
+        analytics.add_records(history.read_range(analytics.records, count))
+        # 按历史记录条数计，解析不了的记录也算在内，否则每次启动都会重新统计
+        analytics.records = count
+        return analytics
+
+    def on_key_analytics_loaded(self, analytics) -> None:
+        self.key_analytics_loading = False
+        # 加载期间完成的测试还没有合并
+        if analytics.records < len(self.history):
+            analytics.add_records(self.history.read_range(analytics.records, len(self.history)))
+            analytics.records = len(self.history)
+        self.key_analytics = analytics
+        self.save_key_analytics()
+
+    def on_key_analytics_error(self, error: Exception) -> None:
+        # 统计只是辅助信息，下次用到时再尝试加载
+        self.key_analytics_loading = False
+
+    def update_key_analytics(self):
+        """把本次测试的按键日志合并到按键统计；还在加载时跳过，加载完成后会从历史记录补上"""
+        if self.key_analytics is None:
+            return
+        self.key_analytics.add_log(self.session.keystroke_log)
+        self.key_analytics.records = len(self.history)
+        self.save_key_analytics()
+
+    def save_key_analytics(self):
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-        except:
+            self.key_analytics.save(self.key_analytics_file)
+        except OSError:
+            # 统计文件只是缓存，写入失败时下次启动会重新统计
             pass
 
+    def save_history(self, result: dict[str, Any]) -> None:
+        """追加保存一条历史记录"""
+        try:
+            self.history.append(result)
+        except OSError as e:
+            messagebox.showerror("错误", f"保存历史记录失败: {e}")
+
+    def load_passages(self):
+        """加载练习文本来源：先使用内置文本；有外部文本库时在后台建立索引和特征文件，完成后再切换"""
+        builtin = PassageSelector([FeatureTable.from_texts({"english": ENGLISH_TEXTS, "chinese": CHINESE_TEXTS})])
+        if self.corpus_dir and os.path.isdir(self.corpus_dir):
+            # 大文本库首次建立索引和特征文件可能需要数分钟，不能阻塞界面
+            corpus_dir = self.corpus_dir
+            self.ai_runner.submit(lambda: self.load_corpus_selector(corpus_dir, builtin),
+                                  self.on_corpus_loaded, self.on_corpus_error)
+        return builtin
+
+    @staticmethod
+    def load_corpus_selector(corpus_dir: str, fallback: PassageSelector) -> PassageSelector:
+        """读取文本库目录（在后台线程中执行），缺少某种语言时使用fallback"""
+        corpus = CorpusPassageSource.from_directory(corpus_dir)
+        return PassageSelector([FeatureTable.from_corpus(f) for f in corpus.files], fallback=fallback)
+
+    def on_corpus_loaded(self, selector: PassageSelector) -> None:
+        # 当前文本保持不变，下一次选取文本时开始使用文本库
+        self.passages = selector
+
+    def on_corpus_error(self, error: Exception) -> None:
+        messagebox.showerror("错误", f"加载文本库失败: {error}")
+
     def load_config(self):
         """加载配置"""
         try:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
                     config = json.load(f)
-                    api_key = config.get('zhipu_api_key', '')
+                    # 只记录API Key，不在启动时创建客户端
+                    self.ai_api_key = config.get('zhipu_api_key', '')
                     self.ai_style = config.get('ai_style', '随机')
-                    if api_key and AI_AVAILABLE and ZhipuAI is not None:
-                        try:
-                            self.ai_client = ZhipuAI(api_key=api_key)
-                        except Exception:
-                            self.ai_client = None
+                    self.input_fps = config.get('input_fps', 60)
+                    self.stats_rate = config.get('stats_rate', 10)
+                    self.ai_timeout = config.get('ai_timeout', 30)
+                    self.ai_prefetch = config.get('ai_prefetch', 3)
+                    self.ai_cache_size = config.get('ai_cache_size', 500)
+                    self.corpus_dir = config.get('corpus_dir', 'corpus')
+                    self.passage_difficulty = self.clamp_difficulty(config.get('passage_difficulty', 0))
+                    self.leaderboard_url = config.get('leaderboard_url', '')
+                    self.leaderboard_user = config.get('leaderboard_user', '')
         except:
             pass
 
+    @staticmethod
+    def clamp_difficulty(value: Any) -> int:
+        """把配置文件中的难度限制在0-5，无法识别时为0（不限）"""
+        try:
+            return max(0, min(MAX_DIFFICULTY, int(value)))
+        except (TypeError, ValueError):
+            return 0
+
     def save_config(self, api_key: str, ai_style: str | None = None) -> None:
         """保存配置"""
         try:
@@ -504,28 +749,33 @@ class TypingSpeedTest:
 
             config = {
                 'zhipu_api_key': api_key,
-                'ai_style': self.ai_style
+                'ai_style': self.ai_style,
+                'input_fps': self.input_fps,
+                'stats_rate': self.stats_rate,
+                'ai_timeout': self.ai_timeout,
+                'ai_prefetch': self.ai_prefetch,
+                'ai_cache_size': self.ai_cache_size,
+                'corpus_dir': self.corpus_dir,
+                'passage_difficulty': self.passage_difficulty,
+                'leaderboard_url': self.leaderboard_url,
+                'leaderboard_user': self.leaderboard_user
             }
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, ensure_ascii=False, indent=2)
 
-            # 初始化AI客户端
-            if api_key and AI_AVAILABLE and ZhipuAI is not None:
-                try:
-                    self.ai_client = ZhipuAI(api_key=api_key)
-                    self.ai_text_button.configure(state="normal")
-                except Exception:
-                    self.ai_client = None
-                    self.ai_text_button.configure(state="disabled")
-            else:
-                self.ai_client = None
-                self.ai_text_button.configure(state="disabled")
+            # AI客户端在下次使用时按新的API Key重新创建
+            self.ai_api_key = api_key
+            self.ai_client = None
+            self.ai_text_button.configure(state=self.ai_button_state())
+
+            # 客户端或风格可能已变化，丢弃预取的文本
+            self.ai_pool.clear()
         except Exception as e:
             messagebox.showerror("错误", f"保存配置失败: {e}")
             
     def show_history(self):
         """显示历史记录"""
-        if not self.history:
+        if len(self.history) == 0:
             messagebox.showinfo("历史记录", "暂无历史记录")
             return
             
@@ -562,39 +812,103 @@ class TypingSpeedTest:
         )
         title_label.pack(pady=10)
         
-        # 统计信息
-        if self.history:
-            best_wpm = max(record['wpm'] for record in self.history)
-            avg_wpm = sum(record['wpm'] for record in self.history) / len(self.history)
-            avg_accuracy = sum(record['accuracy'] for record in self.history) / len(self.history)
-            
+        # 统计信息（直接读取增量维护的汇总）
+        overall = self.history.aggregates.overall
+        if overall.count > 0:
             stats_label = ctk.CTkLabel(
                 history_window,
-                text=f"测试次数: {len(self.history)} | 最佳WPM: {best_wpm} | 平均WPM: {avg_wpm:.1f} | 平均准确率: {avg_accuracy:.1f}%",
+                text=f"测试次数: {overall.count} | 最佳WPM: {overall.best_wpm} | 平均WPM: {overall.average_wpm:.1f} | 平均准确率: {overall.average_accuracy:.1f}%",
                 font=ctk.CTkFont(size=14)
             )
             stats_label.pack(pady=5)
         
-        # 历史记录列表
+        # 历史记录列表：固定数量的行控件，翻页时只更新文字
         history_frame = ctk.CTkScrollableFrame(history_window)
         history_frame.pack(pady=10, padx=20, fill="both", expand=True)
-        
-        # 显示最近的20条记录
-        recent_history = self.history[-20:]
-        recent_history.reverse()
-        
-        for _, record in enumerate(recent_history):
-            # 获取语言信息，兼容旧记录
-            language = record.get('language', 'english')
-            lang_text = "中文" if language == "chinese" else "英文"
 
-            record_text = f"{record['date']} | {lang_text} | WPM: {record['wpm']} | 准确率: {record['accuracy']}% | 时间: {record['time']}s"
+        page_size = self.history_page_size
+        record_labels = []
+        replay_buttons = []
+        for _ in range(page_size):
+            row_frame = ctk.CTkFrame(history_frame, fg_color="transparent")
+            row_frame.pack(pady=2, fill="x")
             record_label = ctk.CTkLabel(
-                history_frame,
-                text=record_text,
+                row_frame,
+                text="",
                 font=ctk.CTkFont(size=12)
             )
-            record_label.pack(pady=2, anchor="w")
+            record_label.pack(side="left")
+            record_labels.append(record_label)
+            # 有按键日志的记录可以回放
+            replay_button = ctk.CTkButton(
+                row_frame,
+                text="▶ 回放",
+                font=ctk.CTkFont(size=12),
+                width=60,
+                height=24
+            )
+            replay_buttons.append(replay_button)
+
+        def start_replay(record: dict[str, Any]) -> None:
+            history_window.destroy()
+            self.replay_record(record)
+
+        # 翻页控制
+        nav_frame = ctk.CTkFrame(history_window)
+        nav_frame.pack(pady=(0, 10), padx=20, fill="x")
+
+        current_page = [0]
+
+        def show_page(page_number: int) -> None:
+            page_count = self.history.page_count(page_size)
+            page_number = max(0, min(page_number, page_count - 1))
+            current_page[0] = page_number
+
+            # 只读取当前页的记录
+            records = self.history.page(page_number, page_size)
+            for i, record_label in enumerate(record_labels):
+                if i < len(records):
+                    record = records[i]
+                    # 获取语言信息，兼容旧记录
+                    language = record.get('language', 'english')
+                    lang_text = "中文" if language == "chinese" else "英文"
+                    record_text = f"{record['date']} | {lang_text} | WPM: {record['wpm']} | 准确率: {record['accuracy']}% | 时间: {record['time']}s"
+                else:
+                    record = None
+                    record_text = ""
+                record_label.configure(text=record_text)
+
+                replay_button = replay_buttons[i]
+                if record and record.get('keystroke_file') and os.path.exists(record['keystroke_file']):
+                    replay_button.configure(command=lambda r=record: start_replay(r))
+                    replay_button.pack(side="right", padx=5)
+                else:
+                    replay_button.pack_forget()
+
+            page_label.configure(text=f"第 {page_number + 1} / {page_count} 页")
+            prev_button.configure(state="normal" if page_number > 0 else "disabled")
+            next_button.configure(state="normal" if page_number < page_count - 1 else "disabled")
+
+        prev_button = ctk.CTkButton(
+            nav_frame,
+            text="◀ 上一页",
+            command=lambda: show_page(current_page[0] - 1),
+            width=100
+        )
+        prev_button.pack(side="left", padx=10, pady=5)
+
+        next_button = ctk.CTkButton(
+            nav_frame,
+            text="下一页 ▶",
+            command=lambda: show_page(current_page[0] + 1),
+            width=100
+        )
+        next_button.pack(side="right", padx=10, pady=5)
+
+        page_label = ctk.CTkLabel(nav_frame, text="", font=ctk.CTkFont(size=12))
+        page_label.pack(pady=5)
+
+        show_page(0)
 
     def show_settings(self):
         """显示设置窗口"""
@@ -608,7 +922,7 @@ class TypingSpeedTest:
         main_width = self.root.winfo_width()
 
         settings_width = 550
-        settings_height = 500
+        settings_height = 700
 
         # 设置窗口位置在主窗口右侧
         x = main_x + main_width + 20
@@ -678,11 +992,35 @@ class TypingSpeedTest:
         )
         info_label.pack(pady=5)
 
+        # 缓存与预取统计
+        cache_lookups = self.ai_cache.hits + self.ai_cache.misses
+        pool_lookups = self.ai_pool.hits + self.ai_pool.misses
+        cache_label = ctk.CTkLabel(
+            ai_frame,
+            text=f"离线缓存: {len(self.ai_cache)}段 | 缓存命中率: {self.ai_cache.hit_rate:.0%} ({self.ai_cache.hits}/{cache_lookups})"
+                 f" | 预取命中率: {self.ai_pool.hit_rate:.0%} ({self.ai_pool.hits}/{pool_lookups})",
+            font=ctk.CTkFont(size=12),
+            text_color="gray"
+        )
+        cache_label.pack(pady=5)
+
+        # 统计刷新定时器的抖动
+        jitter = self.stats_ticker.jitter_stats()
+        ticker_label = ctk.CTkLabel(
+            settings_window,
+            text=f"统计刷新: {self.stats_ticker.rate:g}次/秒 | 抖动 平均{jitter['mean']:.1f}ms"
+                 f" / p95 {jitter['p95']:.1f}ms / 最大{jitter['max']:.1f}ms ({jitter['samples']}拍)"
+                 f" | 跳过{self.stats_ticker.skipped}拍",
+            font=ctk.CTkFont(size=12),
+            text_color="gray"
+        )
+        ticker_label.pack(pady=5)
+
         # 风格选择
         style_label = ctk.CTkLabel(ai_frame, text="文本风格:")
         style_label.pack(pady=(15, 5))
 
-        style_options = ["随机", "科技", "生活", "学习", "工作", "文学", "新闻", "故事", "哲理", "历史"]
+        style_options = STYLE_OPTIONS
         style_var = ctk.StringVar(value=self.ai_style)
 
         style_menu = ctk.CTkOptionMenu(
@@ -693,6 +1031,46 @@ class TypingSpeedTest:
         )
         style_menu.pack(pady=5)
 
+        # 练习文本难度
+        difficulty_label = ctk.CTkLabel(settings_window, text="练习文本难度:")
+        difficulty_label.pack(pady=(15, 5))
+
+        difficulty_options = ["不限", "1 入门", "2 简单", "3 中等", "4 较难", "5 困难"]
+        difficulty_var = ctk.StringVar(value=difficulty_options[self.passage_difficulty])
+
+        difficulty_menu = ctk.CTkOptionMenu(
+            settings_window,
+            values=difficulty_options,
+            variable=difficulty_var,
+            width=200
+        )
+        difficulty_menu.pack(pady=5)
+
+        # 排行榜服务器
+        leaderboard_label = ctk.CTkLabel(settings_window, text="🏆 排行榜服务器（为空时不提交）与用户名:")
+        leaderboard_label.pack(pady=(15, 5))
+
+        leaderboard_frame = ctk.CTkFrame(settings_window, fg_color="transparent")
+        leaderboard_frame.pack(pady=5)
+
+        leaderboard_url_entry = ctk.CTkEntry(
+            leaderboard_frame,
+            width=300,
+            placeholder_text="例如 http://192.168.1.10:8765"
+        )
+        leaderboard_url_entry.pack(side="left", padx=5)
+        if self.leaderboard_url:
+            leaderboard_url_entry.insert(0, self.leaderboard_url)
+
+        leaderboard_user_entry = ctk.CTkEntry(
+            leaderboard_frame,
+            width=150,
+            placeholder_text="用户名"
+        )
+        leaderboard_user_entry.pack(side="left", padx=5)
+        if self.leaderboard_user:
+            leaderboard_user_entry.insert(0, self.leaderboard_user)
+
         # 按钮框架
         button_frame = ctk.CTkFrame(settings_window)
         button_frame.pack(pady=20, fill="x", padx=20)
@@ -700,6 +1078,9 @@ class TypingSpeedTest:
         def save_settings():
             api_key = api_key_entry.get().strip()
             selected_style = style_var.get()
+            self.passage_difficulty = difficulty_options.index(difficulty_var.get())
+            self.leaderboard_url = leaderboard_url_entry.get().strip()
+            self.leaderboard_user = leaderboard_user_entry.get().strip()
             self.save_config(api_key, selected_style)
             messagebox.showinfo("成功", "设置已保存！")
             settings_window.destroy()
@@ -710,20 +1091,30 @@ class TypingSpeedTest:
                 messagebox.showerror("错误", "请输入API Key")
                 return
 
-            try:
-                if not AI_AVAILABLE or ZhipuAI is None:
-                    messagebox.showerror("错误", "AI功能不可用，请安装zhipuai库")
-                    return
-                test_client = ZhipuAI(api_key=api_key)
-                response = test_client.chat.completions.create(
-                    model="glm-4-flash",
+            if not AI_AVAILABLE:
+                messagebox.showerror("错误", "AI功能不可用，请安装zhipuai库")
+                return
+
+            def request():
+                test_client = create_client(api_key)
+                return test_client.chat.completions.create(
+                    model=AI_MODEL,
                     messages=[{"role": "user", "content": "你好"}],
                     max_tokens=10
                 )
+
+            def on_success(_):
+                test_button.configure(text="测试API", state="normal")
                 messagebox.showinfo("成功", "API Key验证成功！")
-            except Exception as e:
+
+            def on_error(e):
+                test_button.configure(text="测试API", state="normal")
                 messagebox.showerror("错误", f"API Key验证失败: {e}")
 
+            # 在后台验证，避免阻塞界面
+            test_button.configure(text="测试中...", state="disabled")
+            self.ai_runner.submit(request, on_success, on_error, timeout=self.ai_timeout)
+
         save_button = ctk.CTkButton(
             button_frame,
             text="保存设置",
@@ -740,6 +1131,15 @@ class TypingSpeedTest:
         )
         test_button.pack(side="left", padx=10, pady=10)
 
+        diagnostics_button = ctk.CTkButton(
+            button_frame,
+            text="🩺 诊断",
+            command=self.show_diagnostics,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            width=80
+        )
+        diagnostics_button.pack(side="left", padx=10, pady=10)
+
         close_button = ctk.CTkButton(
             button_frame,
             text="关闭",
@@ -748,60 +1148,273 @@ class TypingSpeedTest:
         )
         close_button.pack(side="right", padx=10, pady=10)
 
+    def diagnostics_info(self) -> dict[str, Any]:
+        """计时表以外的运行状态，供诊断窗口显示和导出"""
+        jitter = self.stats_ticker.jitter_stats()
+        return {
+            "stats_ticker": {
+                "rate": self.stats_ticker.rate,
+                "skipped": self.stats_ticker.skipped,
+                "jitter_mean_ms": jitter["mean"],
+                "jitter_p95_ms": jitter["p95"],
+                "jitter_max_ms": jitter["max"],
+                "samples": jitter["samples"],
+            },
+            "highlighter": {
+                "tcl_calls": self.highlighter.tcl_calls,
+                "last_render_calls": self.highlighter.last_render_calls,
+                "window_moves": self.highlighter.window_moves,
+            },
+            "input_fps": self.input_fps,
+            "text_length": len(self.current_text),
+            "language": self.current_language,
+            "history_records": len(self.history),
+        }
+
+    def show_diagnostics(self):
+        """显示诊断窗口：热点函数耗时、定时器抖动和高亮开销"""
+        diagnostics_window = ctk.CTkToplevel(self.root)
+        diagnostics_window.title("诊断信息")
+        diagnostics_window.geometry("760x460")
+        diagnostics_window.transient(self.root)
+
+        title_label = ctk.CTkLabel(
+            diagnostics_window,
+            text="🩺 诊断信息",
+            font=ctk.CTkFont(size=20, weight="bold")
+        )
+        title_label.pack(pady=(15, 5))
+
+        hint_label = ctk.CTkLabel(
+            diagnostics_window,
+            text="开启计时后重现卡顿操作，再导出文件反馈给开发者",
+            font=ctk.CTkFont(size=12),
+            text_color="gray"
+        )
+        hint_label.pack(pady=(0, 5))
+
+        report_box = ctk.CTkTextbox(diagnostics_window, font=("Consolas", 12), wrap="none")
+        report_box.pack(padx=20, pady=5, fill="both", expand=True)
+
+        def render():
+            info = self.diagnostics_info()
+            ticker = info["stats_ticker"]
+            highlighter = info["highlighter"]
+            lines = [
+                self.instrumentation.format_table(),
+                "",
+                f"统计刷新: {ticker['rate']:g}次/秒 | 抖动 平均{ticker['jitter_mean_ms']:.1f}ms"
+                f" / p95 {ticker['jitter_p95_ms']:.1f}ms / 最大{ticker['jitter_max_ms']:.1f}ms | 跳过{ticker['skipped']}拍",
+                f"高亮: 累计Tcl调用{highlighter['tcl_calls']} | 最近一次{highlighter['last_render_calls']}"
+                f" | 窗口移动{highlighter['window_moves']}次",
+                f"文本长度: {info['text_length']} | 历史记录: {info['history_records']}条",
+            ]
+            text = "\n".join(lines)
+            if report_box.get("1.0", tk.END).rstrip("\n") != text:
+                report_box.delete("1.0", tk.END)
+                report_box.insert("1.0", text)
+
+        def refresh():
+            # 窗口打开期间每秒刷新一次
+            if diagnostics_window.winfo_exists():
+                render()
+                diagnostics_window.after(1000, refresh)
+
+        def toggle():
+            self.instrumentation.set_enabled(bool(enabled_var.get()))
+
+        def reset():
+            self.instrumentation.reset()
+            render()
+
+        def export():
+            path = filedialog.asksaveasfilename(
+                parent=diagnostics_window,
+                title="导出诊断信息",
+                defaultextension=".json",
+                initialfile=f"diagnostics_{time.strftime('%Y%m%d_%H%M%S')}.json",
+                filetypes=[("JSON", "*.json")]
+            )
+            if not path:
+                return
+            try:
+                self.instrumentation.export(path, self.diagnostics_info())
+                messagebox.showinfo("成功", f"诊断信息已导出到:\n{path}", parent=diagnostics_window)
+            except OSError as e:
+                messagebox.showerror("错误", f"导出诊断信息失败: {e}", parent=diagnostics_window)
+
+        button_frame = ctk.CTkFrame(diagnostics_window)
+        button_frame.pack(pady=15, fill="x", padx=20)
+
+        enabled_var = ctk.IntVar(value=int(self.instrumentation.enabled))
+        enabled_switch = ctk.CTkSwitch(
+            button_frame,
+            text="开启计时",
+            variable=enabled_var,
+            command=toggle
+        )
+        enabled_switch.pack(side="left", padx=10, pady=10)
+
+        reset_button = ctk.CTkButton(button_frame, text="清零", command=reset, width=80)
+        reset_button.pack(side="left", padx=10, pady=10)
+
+        export_button = ctk.CTkButton(button_frame, text="导出", command=export, width=80)
+        export_button.pack(side="left", padx=10, pady=10)
+
+        close_button = ctk.CTkButton(button_frame, text="关闭", command=diagnostics_window.destroy, width=80)
+        close_button.pack(side="right", padx=10, pady=10)
+
+        refresh()
+
     def generate_ai_text(self):
-        """使用AI生成测试文本"""
-        if not self.ai_client:
-            messagebox.showerror("错误", "请先在设置中配置API Key")
+        """使用AI生成测试文本（在后台线程中请求，不阻塞界面）"""
+        # 测试过程中生成好的文本，点击按钮后再使用
+        if self.pending_ai_text is not None:
+            self.apply_ai_text(self.pending_ai_text)
             return
 
-        try:
-            # 根据当前语言和设置的风格生成文本
-            language = self.current_language
-            style = self.ai_style
-
-            # 如果风格是随机，则随机选择一个
-            if style == "随机":
-                style_options = ["科技", "生活", "学习", "工作", "文学", "新闻", "故事", "哲理", "历史"]
-                style = random.choice(style_options)
-
-            # 构建提示词
-            if language == "chinese":
-                system_prompt = f"请生成一段关于'{style}'主题的中文文本，适合打字练习使用。要求：1.长度在50-100字之间 2.语言流畅自然 3.包含常用汉字 4.避免生僻字词 5.内容积极正面 6.符合{style}主题特色"
+        if not self.has_ai_client():
+            # 没有API Key时使用离线缓存
+            cached = self.ai_cache.get(self.current_language, self.ai_style)
+            if cached is not None:
+                self.apply_ai_text(cached)
             else:
-                system_prompt = f"Please generate an English text about '{style}' suitable for typing practice. Requirements: 1.Length between 50-150 characters 2.Natural and fluent language 3.Use common words 4.Avoid complex vocabulary 5.Positive content 6.Match the {style} theme"
-
-            # 显示生成中的提示
-            self.ai_text_button.configure(text="生成中...", state="disabled")
-            self.root.update()
-
-            response = self.ai_client.chat.completions.create(
-                model="glm-4-flash",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"生成{style}主题的打字练习文本"}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
+                messagebox.showerror("错误", "请先在设置中配置API Key")
+            return
 
-            generated_text = response.choices[0].message.content
-            if generated_text is None:
-                generated_text = "生成失败，请重试"
-            else:
-                generated_text = generated_text.strip()
+        if self.ai_task is not None and self.ai_task.active:
+            return
 
-            # 使用生成的文本
-            self.current_text = generated_text
-            self.reset_test()
-            self.update_text_display()
+        # 根据当前语言和设置的风格生成文本
+        language = self.current_language
+        style = self.ai_style
 
-            # 恢复按钮状态
-            self.ai_text_button.configure(text="🤖 AI文本", state="normal")
+        # 优先使用预取好的文本
+        prefetched = self.ai_pool.get(language, style)
+        if prefetched is not None:
+            self.apply_ai_text(prefetched)
+            return
 
-        except Exception as e:
-            # 恢复按钮状态
-            self.ai_text_button.configure(text="🤖 AI文本", state="normal")
-            messagebox.showerror("错误", f"生成文本失败: {e}")
+        # 显示生成中的状态和取消按钮
+        self.ai_text_button.configure(text="生成中...", state="disabled")
+        self.ai_cancel_button.pack(side="left", padx=(0, 10), after=self.ai_text_button)
+
+        self.ai_task = self.ai_runner.submit(
+            lambda: self.generate_and_cache(self.get_ai_client(), language, style),
+            lambda text: self.on_ai_text_ready(text, language),
+            self.on_ai_text_error,
+            timeout=self.ai_timeout
+        )
+
+    def generate_and_cache(self, client: Any, language: str, style: str) -> str:
+        """生成文本并写入磁盘缓存（在后台线程中执行）"""
+        if client is None:
+            raise RuntimeError("AI客户端初始化失败，请检查API Key和zhipuai库")
+        # "随机"先换成具体风格，请求和缓存使用同一个风格，按风格取用缓存时才能命中
+        style = resolve_style(style)
+        text = generate_passage(client, language, style)
+        self.ai_cache.put(language, style, text)
+        return text
+
+    def has_ai_client(self) -> bool:
+        """是否可以使用AI客户端（不触发zhipuai的导入）"""
+        return self.ai_client is not None or (bool(self.ai_api_key) and AI_AVAILABLE)
+
+    def get_ai_client(self) -> Any:
+        """获取AI客户端，首次调用时才导入zhipuai并创建（可在后台线程中调用）"""
+        if self.ai_client is None and self.ai_api_key and AI_AVAILABLE:
+            try:
+                self.ai_client = create_client(self.ai_api_key)
+            except Exception:
+                self.ai_client = None
+        return self.ai_client
+
+    def ai_button_state(self) -> str:
+        """有可用的AI客户端或离线缓存时启用AI按钮"""
+        if self.has_ai_client() or len(self.ai_cache) > 0:
+            return "normal"
+        return "disabled"
+
+    def cancel_ai_text(self):
+        """取消正在进行的AI生成"""
+        if self.ai_task is not None:
+            self.ai_task.cancel()
+            self.ai_task = None
+        self.restore_ai_button()
+
+    def restore_ai_button(self):
+        """恢复AI按钮状态"""
+        self.ai_cancel_button.pack_forget()
+        self.ai_text_button.configure(text="🤖 AI文本", state="normal")
+
+    def on_ai_text_ready(self, generated_text: str, language: str) -> None:
+        """AI文本生成完成（在主线程中调用）"""
+        self.ai_task = None
+        self.restore_ai_button()
+
+        # 生成期间切换了语言，丢弃结果
+        if language != self.current_language:
+            return
+
+        if self.is_testing:
+            # 正在练习时不打断，等用户点击按钮再使用
+            self.pending_ai_text = generated_text
+            self.ai_text_button.configure(text="✅ 使用AI文本")
+            return
+
+        self.apply_ai_text(generated_text)
+
+    def on_ai_text_error(self, error: Exception) -> None:
+        """AI文本生成失败（在主线程中调用）"""
+        self.ai_task = None
+        self.restore_ai_button()
+
+        # 网络不可用时使用离线缓存
+        cached = self.ai_cache.get(self.current_language, self.ai_style)
+        if cached is not None and not self.is_testing:
+            self.apply_ai_text(cached)
+            return
+        messagebox.showerror("错误", f"生成文本失败: {error}")
+
+    def apply_ai_text(self, generated_text: str) -> None:
+        """使用生成的文本"""
+        self.pending_ai_text = None
+        self.ai_text_button.configure(text="🤖 AI文本")
+        self.current_text = generated_text
+        # reset_test会重新显示文本
+        self.reset_test()
+
+    def draw_key_analytics(self, frame, language: str) -> None:
+        """在测试报告中绘制按键热力图和薄弱双字符"""
+        from heatmap import KeyHeatmap
+        from key_analytics import KeyAnalytics
+
+        heatmap_canvas = tk.Canvas(frame)
+        heatmap = KeyHeatmap(heatmap_canvas)
+        if language == "chinese":
+            hanzi = [key for key in self.key_analytics.chars if "\u4e00" <= key <= "\u9fff"]
+            weakest = self.key_analytics.weakest(30, min_attempts=1, keys=hanzi)
+            heatmap.draw_chars(self.key_analytics, [key for key, _ in weakest])
+        else:
+            heatmap.draw_keyboard(self.key_analytics)
+        heatmap_canvas.pack(pady=5)
+
+        slow_bigrams = self.key_analytics.weakest(5, bigrams=True)
+        if slow_bigrams:
+            bigram_text = "  ".join(
+                f"{key}({KeyAnalytics.mean_latency_ms(self.key_analytics.bigrams[key]):.0f}ms, "
+                f"错{KeyAnalytics.error_rate(self.key_analytics.bigrams[key]):.0%})"
+                for key, _ in slow_bigrams
+            )
+            bigram_label = ctk.CTkLabel(
+                frame,
+                text=f"⚠️ 薄弱双字符: {bigram_text}",
+                font=ctk.CTkFont(size=13),
+                anchor="w",
+                wraplength=620,
+                justify="left"
+            )
+            bigram_label.pack(pady=(2, 10), padx=20, fill="x")
 
     def show_test_report(self, result: dict[str, Any], elapsed_time: float) -> None:
         """显示专业测试报告"""
@@ -911,6 +1524,13 @@ class TypingSpeedTest:
             f"⏱️  平均字符用时: {elapsed_time/result['text_length']:.2f}秒" if result['text_length'] > 0 else "⏱️  平均字符用时: 0秒"
         ]
 
+        # 历史对比（来自增量维护的汇总统计）
+        language_stats = self.history.aggregates.language(result["language"])
+        if language_stats.count > 0:
+            metrics_info.append(
+                f"🏆 {language_text}历史最佳: {language_stats.best_wpm} WPM | 平均: {language_stats.average_wpm:.1f} WPM ({language_stats.count}次)"
+            )
+
         for info in metrics_info:
             info_label = ctk.CTkLabel(
                 metrics_frame,
@@ -920,6 +1540,27 @@ class TypingSpeedTest:
             )
             info_label.pack(pady=2, padx=20, fill="x")
 
+        # 按键热力图（全部历史测试的累计统计）
+        heatmap_frame = ctk.CTkFrame(scrollable_frame)
+        heatmap_frame.pack(pady=10, padx=10, fill="x")
+
+        heatmap_title = ctk.CTkLabel(
+            heatmap_frame,
+            text="🔥 按键热力图（颜色为错误率，数字为平均按键用时）",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        heatmap_title.pack(pady=10)
+
+        if self.key_analytics is None:
+            loading_label = ctk.CTkLabel(
+                heatmap_frame,
+                text="⏳ 按键统计正在后台加载，下次测试后显示",
+                font=ctk.CTkFont(size=13)
+            )
+            loading_label.pack(pady=(2, 10))
+        else:
+            self.draw_key_analytics(heatmap_frame, result["language"])
+
         # 按钮区域
         button_frame = ctk.CTkFrame(report_window)
         button_frame.pack(pady=10, fill="x", padx=20)
@@ -937,6 +1578,19 @@ class TypingSpeedTest:
         )
         continue_button.pack(side="left", padx=10, pady=10)
 
+        def practice_weak_keys():
+            report_window.destroy()
+            self.select_weak_key_text()
+
+        weak_button = ctk.CTkButton(
+            button_frame,
+            text="🎯 薄弱字符练习",
+            command=practice_weak_keys,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            width=140
+        )
+        weak_button.pack(side="left", padx=10, pady=10)
+
         close_button = ctk.CTkButton(
             button_frame,
             text="✅ 关闭",
@@ -972,6 +1626,47 @@ class TypingSpeedTest:
     def run(self):
         """运行应用"""
         self.root.mainloop()
+        self.history.close()
+
+
+def profile_startup(app: TypingSpeedTest, init_done: float, json_path: str | None = None,
+                    exit_after: bool = False) -> None:
+    """--profile-startup: 窗口首次绘制后输出启动各阶段耗时"""
+    times: dict[str, float] = {
+        "imports_ms": (IMPORTS_DONE - STARTUP_T0) * 1000,
+        "init_ms": (init_done - STARTUP_T0) * 1000,
+    }
+    painted = [False]
+
+    def on_first_idle():
+        times["first_idle_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+
+    def report():
+        times["first_paint_ms"] = (time.perf_counter() - STARTUP_T0) * 1000
+        times.setdefault("first_idle_ms", times["first_paint_ms"])
+        print("🚀 启动耗时分析（从进程启动算起）")
+        print(f"   导入模块: {times['imports_ms']:.1f} ms")
+        print(f"   界面创建完成: {times['init_ms']:.1f} ms")
+        print(f"   首次空闲: {times['first_idle_ms']:.1f} ms")
+        print(f"   首次绘制: {times['first_paint_ms']:.1f} ms")
+        print(f"   zhipuai已导入: {'是' if 'zhipuai' in sys.modules else '否'}")
+        print("   提示: 逐模块导入耗时可用 python -X importtime main.py 查看")
+
+        if json_path:
+            times["zhipuai_imported"] = "zhipuai" in sys.modules
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(times, f, ensure_ascii=False, indent=2)
+        if exit_after:
+            app.root.after(0, app.root.destroy)
+
+    def on_map(_event=None):
+        # 子控件的Map事件也会传到主窗口，只处理第一次
+        if not painted[0]:
+            painted[0] = True
+            app.root.after_idle(report)
+
+    app.root.after_idle(on_first_idle)
+    app.root.bind("<Map>", on_map, add="+")
 
 
 if __name__ == "__main__":
@@ -985,6 +1680,16 @@ if __name__ == "__main__":
         print("pip install customtkinter zhipuai requests")
         exit(1)
 
+    import argparse
+    parser = argparse.ArgumentParser(description="打字速度检测器")
+    parser.add_argument("--profile-startup", action="store_true", help="输出导入和首次绘制耗时")
+    parser.add_argument("--startup-json", metavar="PATH", help="把启动耗时写入JSON文件（隐含--profile-startup）")
+    parser.add_argument("--exit-after-startup", action="store_true", help="首次绘制后立即退出，用于启动性能测试")
+    parser.add_argument("--diagnostics", action="store_true", help="启动时即开启热点函数计时（也可在诊断窗口中开关）")
+    args = parser.parse_args()
+
     # 创建并运行应用
-    app = TypingSpeedTest()
+    app = TypingSpeedTest(diagnostics=args.diagnostics)
+    if args.profile_startup or args.startup_json or args.exit_after_startup:
+        profile_startup(app, time.perf_counter(), args.startup_json, args.exit_after_startup)
     app.run()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - AI文本磁盘缓存
+把生成过的AI文本按语言和具体风格保存在SQLite中，相同文本只保存一次；没有API Key或请求失败时从缓存中离线取用。
+取用时按上次使用时间轮换（总是取最久没用过的一段，避免连续重复）；
+超过容量时按同一时间淘汰最久未使用的文本。
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class PassageCache:
+    """按(语言, 风格)组织的AI文本缓存，取用时轮换，超出容量时淘汰最久未使用的文本"""
+
+    def __init__(self, path: str = "ai_cache.db", max_entries: int = 500):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 预取线程也会写入缓存，统一通过锁串行访问同一个连接
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS passages ("
+            " digest TEXT PRIMARY KEY,"
+            " language TEXT NOT NULL,"
+            " style TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " uses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_passages_key ON passages (language, style, last_used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_passages_lru ON passages (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def _digest(language: str, text: str) -> str:
+        return hashlib.sha1(f"{language}\0{text}".encode("utf-8")).hexdigest()
+
+    def put(self, language: str, style: str, text: str) -> None:
+        """保存一段文本；重复的文本只刷新使用时间"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO passages (digest, language, style, text, created, last_used) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(digest) DO UPDATE SET last_used = excluded.last_used",
+                (self._digest(language, text), language, style, text, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def get(self, language: str, style: str) -> str | None:
+        """轮换取用：取出该语言和风格下最久没用过的文本并刷新其使用时间（不是最近使用的那段），
+        "随机"风格匹配任意风格"""
+        with self._lock:
+            if style == "随机":
+                row = self._conn.execute(
+                    "SELECT digest, text FROM passages WHERE language = ? ORDER BY last_used LIMIT 1",
+                    (language,)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT digest, text FROM passages WHERE language = ? AND style = ? ORDER BY last_used LIMIT 1",
+                    (language, style)
+                ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE passages SET last_used = ?, uses = uses + 1 WHERE digest = ?",
+                (time.time(), row[0])
+            )
+            self._conn.commit()
+            return row[1]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _evict(self) -> None:
+        """超出容量时删除最久未使用的文本"""
+        count = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM passages WHERE digest IN"
+                " (SELECT digest FROM passages ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
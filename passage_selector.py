@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按难度和薄弱字符选取练习文本
+为每段文本预先计算一次特征（长度、标点密度、生僻字/长单词数、每个字符的出现次数）
+并保存为列式特征文件(.cfeat)，选取时对整列做向量化运算，而不是逐段在Python中循环。
+
+字符次数是精确的：可见ASCII字符各占一列；其余字符（汉字等）按段保存(码点, 次数)的稀疏表。
+按薄弱字符选取时先用字符次数预筛选（双字符按其中两个字符估算），再取出得分最高的若干段按实际文本重新评分。
+
+文本库的特征表在安装了numpy时使用numpy（特征文件通过mmap直接映射为数组），numpy只在用到时才导入；
+内置文本很少，始终使用纯Python实现，不影响启动速度。
+
+特征文件格式（小端序）:
+    头部  HEADER: 魔数 "CFT2"、版本、ASCII列数、条目数、源文件大小、源文件修改时间(ns)、稀疏表条目数
+    列    长度 uint32、标点密度 float32、难度分 float32、生僻数 uint16、语言 uint8、难度等级 uint8
+    ASCII 字符次数 uint8 × ASCII列数（每段文本一行）
+    稀疏表 每段起点 uint64 × (条目数+1)、码点 uint32、次数 uint8
+"""
+
+import importlib.util
+import mmap
+import os
+import random
+import re
+import string
+import struct
+import sys
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from corpus import LANGUAGE_CODES, MAX_DIFFICULTY, CorpusFile
+
+# 只检查是否安装，导入推迟到第一次向量化计算（numpy导入约需100ms）
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+MAGIC = b"CFT2"
+VERSION = 2
+HEADER = struct.Struct("<4sHHQQqQ")
+
+# 可见ASCII字符（!到~）各占一列
+ASCII_FIRST = 33
+ASCII_COLUMNS = 94
+
+PUNCTUATION = frozenset(string.punctuation + "，。、；：？！“”‘’（）《》【】…—·")
+
+# 长度、标点密度、生僻字比例各自达到该值时视为最难
+LENGTH_SCALE = {"english": 250, "chinese": 100}
+PUNCTUATION_SCALE = 0.15
+RARE_SCALE = {"english": 0.04, "chinese": 0.05}
+
+# 按薄弱字符选取时，预筛选出RESCORE_K段按实际文本重新评分，再在得分最高的TOP_K段中随机选一段，避免总是练习同一段
+RESCORE_K = 128
+TOP_K = 32
+
+_WORD = re.compile("[A-Za-z]+")
+# 特征文件固定为小端序
+_SWAP = sys.byteorder != "little"
+
+
+@lru_cache(maxsize=None)
+def is_common_hanzi(char: str) -> bool:
+    """是否为GB2312一级汉字（3755个最常用汉字）"""
+    try:
+        encoded = char.encode("gb2312")
+    except UnicodeEncodeError:
+        return False
+    return len(encoded) == 2 and 0xB0 <= encoded[0] <= 0xD7
+
+
+def ascii_column(char: str) -> int | None:
+    """字符在ASCII列中的位置；不是可见ASCII字符时为None"""
+    column = ord(char) - ASCII_FIRST
+    return column if 0 <= column < ASCII_COLUMNS else None
+
+
+def extract_features(text: str, language: str) -> tuple[int, float, int, bytes, list[tuple[int, int]]]:
+    """返回 (长度, 标点密度, 生僻数, ASCII字符次数, 其余字符的[(码点, 次数)])，字母按小写统计"""
+    length = len(text)
+    lower = text.lower()
+    # 先用Counter统计（C实现），再按不同字符累加，避免逐字符的Python循环
+    counts = Counter(lower)
+    punctuation = sum(count for char, count in counts.items() if char in PUNCTUATION)
+    if language == "chinese":
+        rare = sum(count for char, count in counts.items()
+                   if "\u4e00" <= char <= "\u9fff" and not is_common_hanzi(char))
+    else:
+        # 英文以9个字母以上的长单词近似生僻词
+        rare = sum(1 for word in _WORD.findall(text) if len(word) >= 9)
+
+    ascii_counts = bytearray(ASCII_COLUMNS)
+    others = []
+    for char, count in counts.items():
+        column = ascii_column(char)
+        if column is not None:
+            ascii_counts[column] = min(count, 255)
+        elif not char.isspace():
+            others.append((ord(char), min(count, 255)))
+    others.sort()
+    return length, punctuation / length if length else 0.0, rare, bytes(ascii_counts), others
+
+
+def difficulty_score(length: int, punctuation: float, rare: int, language: str) -> float:
+    """综合长度、标点密度和生僻比例的难度分，范围[0, 1]"""
+    if length == 0:
+        return 0.0
+    return (0.45 * min(length / LENGTH_SCALE.get(language, 250), 1.0)
+            + 0.25 * min(punctuation / PUNCTUATION_SCALE, 1.0)
+            + 0.30 * min(rare / length / RARE_SCALE.get(language, 0.04), 1.0))
+
+
+def difficulty_level(score: float) -> int:
+    """把难度分映射为1-5级"""
+    return 1 + min(MAX_DIFFICULTY - 1, int(score * MAX_DIFFICULTY))
+
+
+def char_weights(weak_chars: dict[str, float]) -> dict[str, float]:
+    """预筛选用的单字符权重：双字符的权重平分到其中两个字符上，空白字符不参与"""
+    weights: dict[str, float] = {}
+    for key, weight in weak_chars.items():
+        key = key.lower()
+        if len(key) not in (1, 2):
+            continue
+        for char in key:
+            if not char.isspace():
+                weights[char] = weights.get(char, 0.0) + weight / len(key)
+    return weights
+
+
+def text_weakness(text: str, weak_chars: dict[str, float]) -> float:
+    """按实际文本计算薄弱字符和双字符的出现密度"""
+    lower = text.lower()
+    total = sum(weight * lower.count(key.lower()) for key, weight in weak_chars.items() if key.strip())
+    return total / max(len(text), 1)
+
+
+class _FeatureBuilder:
+    """逐段累积特征列"""
+
+    def __init__(self):
+        self.lengths = array("I")
+        self.punctuation = array("f")
+        self.scores = array("f")
+        self.rare = array("H")
+        self.languages = bytearray()
+        self.levels = bytearray()
+        self.ascii_counts = bytearray()
+        self.char_offsets = array("Q", [0])
+        self.char_codes = array("I")
+        self.char_counts = bytearray()
+
+    def add(self, text: str, language: str, difficulty: int = 0) -> None:
+        length, punctuation, rare, ascii_counts, others = extract_features(text, language)
+        score = difficulty_score(length, punctuation, rare, language)
+        self.lengths.append(min(length, 0xFFFFFFFF))
+        self.punctuation.append(punctuation)
+        self.scores.append(score)
+        self.rare.append(min(rare, 0xFFFF))
+        self.languages.append(LANGUAGE_CODES[language])
+        # 已标注难度的文本使用标注值，否则使用估算值
+        self.levels.append(difficulty or difficulty_level(score))
+        self.ascii_counts += ascii_counts
+        for code, count in others:
+            self.char_codes.append(code)
+            self.char_counts.append(count)
+        self.char_offsets.append(len(self.char_codes))
+
+    def columns(self) -> tuple:
+        return (self.lengths, self.punctuation, self.scores, self.rare, self.languages, self.levels,
+                self.ascii_counts, self.char_offsets, self.char_codes, self.char_counts)
+
+
+class FeatureTable:
+    """一组文本的特征列，以及按条目取出文本的函数"""
+
+    def __init__(self, count: int, columns: tuple, fetch: Callable[[int], str], mapping: mmap.mmap | None = None,
+                 vectorized: bool = False):
+        self.count = count
+        self.fetch = fetch
+        self._mapping = mapping
+        # 列为numpy数组时使用向量化计算，否则为array/bytes，使用纯Python实现
+        self.vectorized = vectorized
+        (self.lengths, self.punctuation, self.scores, self.rare, self.languages, self.levels,
+         self.ascii_counts, self.char_offsets, self.char_codes, self.char_counts) = columns
+        self._candidates: dict[tuple[int, int | None], object] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    @classmethod
+    def from_texts(cls, texts: dict[str, list[str]]) -> "FeatureTable":
+        """在内存中为少量文本（如内置文本）计算特征（纯Python，不导入numpy）"""
+        builder = _FeatureBuilder()
+        passages = []
+        for language, items in texts.items():
+            for text in items:
+                builder.add(text, language)
+                passages.append(text)
+        return cls(len(passages), builder.columns(), passages.__getitem__)
+
+    @classmethod
+    def from_corpus(cls, corpus: CorpusFile) -> "FeatureTable":
+        """读取文本库文件的特征文件，不存在或已过期时重新计算"""
+        path = corpus.path + ".cfeat"
+        if not cls._fresh(path, corpus):
+            builder = _FeatureBuilder()
+            for language, difficulty, text in corpus.iter_passages():
+                builder.add(text, language, difficulty)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, VERSION, ASCII_COLUMNS, len(corpus), corpus.source_size,
+                                    corpus.source_mtime_ns, len(builder.char_codes)))
+                f.write(cls._serialize(builder.columns()))
+            os.replace(tmp_path, path)
+
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        count = len(corpus)
+        sparse_count = HEADER.unpack_from(mapping, 0)[6]
+        if NUMPY_AVAILABLE:
+            columns = cls._numpy_columns(mapping, HEADER.size, count, sparse_count)
+        else:
+            columns = cls._array_columns(mapping, HEADER.size, count, sparse_count)
+        return cls(count, columns, corpus.passage, mapping, vectorized=NUMPY_AVAILABLE)
+
+    @staticmethod
+    def _fresh(path: str, corpus: CorpusFile) -> bool:
+        try:
+            with open(path, "rb") as f:
+                header = f.read(HEADER.size)
+        except OSError:
+            return False
+        if len(header) != HEADER.size:
+            return False
+        return HEADER.unpack(header)[:6] == (MAGIC, VERSION, ASCII_COLUMNS, len(corpus),
+                                             corpus.source_size, corpus.source_mtime_ns)
+
+    @staticmethod
+    def _serialize(columns: tuple) -> bytes:
+        parts = []
+        for column in columns:
+            if isinstance(column, array):
+                column = array(column.typecode, column)
+                if _SWAP:
+                    column.byteswap()
+                parts.append(column.tobytes())
+            else:
+                parts.append(bytes(column))
+        return b"".join(parts)
+
+    @staticmethod
+    def _layout(count: int, sparse_count: int) -> list[tuple[str, int]]:
+        """各列的(类型, 元素个数)，与_serialize的写出顺序一致"""
+        return [("I", count), ("f", count), ("f", count), ("H", count), ("B", count), ("B", count),
+                ("B", count * ASCII_COLUMNS), ("Q", count + 1), ("I", sparse_count), ("B", sparse_count)]
+
+    @classmethod
+    def _numpy_columns(cls, buffer, offset: int, count: int, sparse_count: int) -> tuple:
+        import numpy as np
+
+        dtypes = {"I": "<u4", "f": "<f4", "H": "<u2", "Q": "<u8", "B": "u1"}
+        columns = []
+        for typecode, size in cls._layout(count, sparse_count):
+            column = np.frombuffer(buffer, dtype=dtypes[typecode], count=size, offset=offset)
+            offset += column.nbytes
+            columns.append(column)
+        columns[6] = columns[6].reshape(count, ASCII_COLUMNS)
+        return tuple(columns)
+
+    @classmethod
+    def _array_columns(cls, buffer, offset: int, count: int, sparse_count: int) -> tuple:
+        columns = []
+        for typecode, size in cls._layout(count, sparse_count):
+            if typecode == "B":
+                column = bytes(buffer[offset:offset + size])
+                offset += size
+            else:
+                column = array(typecode)
+                column.frombytes(buffer[offset:offset + size * column.itemsize])
+                offset += size * column.itemsize
+                if _SWAP:
+                    column.byteswap()
+            columns.append(column)
+        return tuple(columns)
+
+    def candidates(self, language: str, difficulty: int | None = None):
+        """符合语言（和难度等级）的条目"""
+        key = (LANGUAGE_CODES.get(language, -1), difficulty)
+        if key not in self._candidates:
+            self._candidates[key] = self._find_candidates(*key)
+        return self._candidates[key]
+
+    def levels_available(self, language: str) -> set[int]:
+        """该语言的文本覆盖的难度等级"""
+        code = LANGUAGE_CODES.get(language, -1)
+        if self.vectorized:
+            import numpy as np
+            return {int(level) for level in np.unique(self.levels[self.languages == code])}
+        return {self.levels[i] for i in range(self.count) if self.languages[i] == code}
+
+    def _find_candidates(self, code: int, difficulty: int | None):
+        if self.vectorized:
+            import numpy as np
+            mask = self.languages == code
+            if difficulty is not None:
+                mask &= self.levels == difficulty
+            return np.flatnonzero(mask)
+        return [i for i in range(self.count)
+                if self.languages[i] == code and (difficulty is None or self.levels[i] == difficulty)]
+
+    def weakness_scores(self, entries, weights: dict[str, float]):
+        """每段文本中薄弱字符的出现密度（按长度归一），weights为{单字符: 权重}"""
+        ascii_weights = {}
+        other_weights = {}
+        for char, weight in weights.items():
+            column = ascii_column(char)
+            if column is not None:
+                ascii_weights[column] = weight
+            else:
+                other_weights[ord(char)] = weight
+
+        if self.vectorized:
+            import numpy as np
+
+            # 只取薄弱字符所在的列，不复制整个次数矩阵
+            totals = np.zeros(len(entries), dtype=np.float32)
+            for column, weight in ascii_weights.items():
+                totals += weight * self.ascii_counts[entries, column]
+            for code, weight in other_weights.items():
+                # 稀疏表中每段文本的每个字符只出现一次，找到所在段后直接累加
+                hits = np.flatnonzero(self.char_codes == code)
+                if len(hits):
+                    dense = np.zeros(self.count, dtype=np.float32)
+                    dense[np.searchsorted(self.char_offsets, hits, side="right") - 1] = weight * self.char_counts[hits]
+                    totals += dense[entries]
+            return totals / np.maximum(self.lengths[entries], 1)
+
+        scores = []
+        for entry in entries:
+            base = entry * ASCII_COLUMNS
+            total = 0.0
+            for column, weight in ascii_weights.items():
+                total += self.ascii_counts[base + column] * weight
+            if other_weights:
+                for i in range(self.char_offsets[entry], self.char_offsets[entry + 1]):
+                    weight = other_weights.get(self.char_codes[i])
+                    if weight:
+                        total += self.char_counts[i] * weight
+            scores.append(total / max(self.lengths[entry], 1))
+        return scores
+
+    def top(self, entries, scores, count: int) -> list[tuple[float, int]]:
+        """得分最高的count个条目"""
+        if self.vectorized and len(entries) > count:
+            import numpy as np
+            best = np.argpartition(scores, -count)[-count:]
+            return [(float(scores[i]), int(entries[i])) for i in best]
+        pairs = sorted(zip(scores, entries), reverse=True)[:count]
+        return [(float(score), int(entry)) for score, entry in pairs]
+
+    def close(self) -> None:
+        # numpy数组仍引用映射时不能关闭，交给垃圾回收
+        if self._mapping is not None and not self.vectorized:
+            self._mapping.close()
+        self._mapping = None
+
+
+class PassageSelector:
+    """在若干特征表中按难度和薄弱字符选取文本，都没有该语言的文本时使用备用选择器"""
+
+    def __init__(self, tables: Iterable[FeatureTable], fallback: "PassageSelector | None" = None,
+                 rng: random.Random | None = None):
+        self.tables = list(tables)
+        self.fallback = fallback
+        self.rng = rng or random.Random()
+
+    def random_passage(self, language: str, difficulty: int | None = None) -> str:
+        return self.select(language, difficulty)
+
+    def select(self, language: str, difficulty: int | None = None,
+               weak_chars: dict[str, float] | None = None) -> str:
+        """选取一段文本：difficulty为1-5时优先该难度，weak_chars为{字符或双字符: 权重}时优先包含这些字符的文本"""
+        candidates = self._candidates(language, difficulty)
+        if not candidates and difficulty is not None:
+            # 没有该难度的文本时改用最接近的难度等级
+            levels = set().union(*(table.levels_available(language) for table in self.tables))
+            if levels:
+                difficulty = min(levels, key=lambda level: (abs(level - difficulty), level))
+                candidates = self._candidates(language, difficulty)
+        if not candidates:
+            if self.fallback is None:
+                raise LookupError(f"没有{language}文本")
+            return self.fallback.select(language, difficulty, weak_chars)
+
+        if weak_chars:
+            # 按字符次数预筛选
+            weights = char_weights(weak_chars)
+            ranked = []
+            for table, entries in candidates:
+                scores = table.weakness_scores(entries, weights)
+                ranked.extend((score, table, entry) for score, entry in table.top(entries, scores, RESCORE_K))
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            # 取出预筛选得分最高的文本，按实际的薄弱字符和双字符重新评分
+            rescored = [(text_weakness(text, weak_chars), text)
+                        for text in (table.fetch(entry) for _, table, entry in ranked[:RESCORE_K])]
+            rescored.sort(key=lambda item: item[0], reverse=True)
+            best = rescored[:TOP_K]
+            # 只在包含薄弱字符的文本中选择；都不包含时退回到随机选取
+            best = [item for item in best if item[0] > 0] or best
+            return self.rng.choice(best)[1]
+
+        # 按各表的候选数量加权随机选取
+        target = self.rng.randrange(sum(len(entries) for _, entries in candidates))
+        for table, entries in candidates:
+            if target < len(entries):
+                break
+            target -= len(entries)
+        return table.fetch(int(entries[target]))
+
+    def _candidates(self, language: str, difficulty: int | None) -> list:
+        candidates = [(table, table.candidates(language, difficulty)) for table in self.tables]
+        return [(table, entries) for table, entries in candidates if len(entries)]
+
+    def close(self) -> None:
+        for table in self.tables:
+            table.close()
+        if self.fallback is not None:
+            self.fallback.close()
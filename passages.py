@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 练习文本来源
+内置的中英文测试文本库
+"""
+
+# 英文测试文本库
+ENGLISH_TEXTS = [
+    "The quick brown fox jumps over the lazy dog. This sentence contains every letter of the alphabet at least once.",
+    "Python is a high-level programming language that emphasizes code readability and simplicity.",
+    "Artificial intelligence is transforming the way we work, learn, and interact with technology.",
+    "The future belongs to those who believe in the beauty of their dreams and work hard to achieve them.",
+    "In the digital age, typing skills have become essential for effective communication and productivity.",
+    "Practice makes perfect, and consistent effort leads to remarkable improvement in any skill.",
+    "Technology has revolutionized our daily lives, making tasks easier and more efficient than ever before.",
+    "Learning new skills requires patience, dedication, and the willingness to embrace challenges.",
+    "The internet has connected people from all corners of the world, creating a global community.",
+    "Success is not final, failure is not fatal: it is the courage to continue that counts most."
+]
+
+# 中文测试文本库
+CHINESE_TEXTS = [
+    "熟能生巧，勤能补拙。只有通过不断的练习，才能提高打字速度和准确率。",
+    "科技改变生活，创新驱动发展。人工智能正在深刻地改变着我们的工作和生活方式。",
+    "学而时习之，不亦说乎。学习是一个持续的过程，需要我们保持好奇心和求知欲。",
+    "千里之行，始于足下。每一个伟大的成就都是从小小的步骤开始的。",
+    "工欲善其事，必先利其器。掌握好的工具和技能是成功的重要基础。",
+    "海纳百川，有容乃大。包容和理解是人际交往中最重要的品质之一。",
+    "书山有路勤为径，学海无涯苦作舟。知识的获取需要我们付出努力和坚持。",
+    "天行健，君子以自强不息。面对困难和挑战，我们要保持积极向上的态度。",
+    "己所不欲，勿施于人。这是中华文化中关于道德修养的重要思想。",
+    "路漫漫其修远兮，吾将上下而求索。追求真理和知识的道路虽然漫长，但值得我们坚持。"
+]
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键日志回放
+把保存的按键日志（.ksl）重新送入会话引擎（可选同时驱动高亮层），
+按原始节奏实时回放或全速回放，并与历史记录中保存的结果核对。
+全速回放不依赖GUI，同时也是计分路径的确定性吞吐量测试。
+
+用法:
+    python replay.py keystrokes/20250101_120000_000000.ksl [--history typing_history.jsonl]
+    python replay.py LOG --realtime [--speed 2]      按原始节奏回放
+    python replay.py LOG --repeat 100                全速回放100次并输出吞吐量
+    python replay.py LOG --highlight                 同时驱动高亮层（需要显示器）
+"""
+
+import os
+import time
+from array import array
+from typing import Any, Callable
+
+from keystroke_log import KeystrokeLog, OP_DELETE
+from session import TypingSession
+
+# 核对结果时允许的误差：保存的用时取整并包含最后一次按键到结束的间隔；
+# 最后一帧没有按键时间戳时WPM按处理时刻计算，可能相差1
+TIME_TOLERANCE = 1
+WPM_TOLERANCE = 1
+
+
+class SessionReplay:
+    """把一份按键日志重新输入会话引擎"""
+
+    def __init__(self, log: KeystrokeLog, session: TypingSession | None = None,
+                 highlighter: Any = None, on_step: Callable[[TypingSession], None] | None = None):
+        self.log = log
+        self.session = session if session is not None else TypingSession()
+        self.highlighter = highlighter
+        self.on_step = on_step
+        # 时间戳相同的连续事件来自同一次编辑（例如输入法一次上屏多个字），作为一步回放
+        self.step_ends = array("I")
+        timestamps = log.timestamps
+        for i in range(1, len(timestamps)):
+            if timestamps[i] != timestamps[i - 1]:
+                self.step_ends.append(i)
+        if len(timestamps):
+            self.step_ends.append(len(timestamps))
+        self.steps_done = 0
+        self.current_input = ""
+        self._root: Any = None
+        self._after_id: str | None = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "SessionReplay":
+        return cls(KeystrokeLog.load(path), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.step_ends)
+
+    @property
+    def finished(self) -> bool:
+        return self.steps_done >= len(self.step_ends)
+
+    def start(self, start_ns: int = 0) -> None:
+        """从头开始回放（start_ns为会话开始的perf_counter_ns，全速回放用0即可）"""
+        self.session.load(self.log.target_text, self.log.language)
+        self.session.start(start_ns)
+        self.steps_done = 0
+        self.current_input = ""
+        if self.highlighter is not None:
+            self.highlighter.set_text(self.log.target_text)
+            self.highlighter.reset(self.session.scoring)
+
+    def next_time_ns(self) -> int:
+        """下一步相对开始的时间"""
+        begin = self.step_ends[self.steps_done - 1] if self.steps_done else 0
+        return self.log.timestamps[begin]
+
+    def step(self) -> None:
+        """回放下一步：应用这一步的全部事件，再把完整输入交给会话引擎"""
+        log = self.log
+        begin = self.step_ends[self.steps_done - 1] if self.steps_done else 0
+        end = self.step_ends[self.steps_done]
+        text = self.current_input
+        for i in range(begin, end):
+            position = log.positions[i]
+            if log.ops[i] == OP_DELETE:
+                text = text[:position] + text[position + 1:]
+            else:
+                text = text[:position] + chr(log.codepoints[i]) + text[position:]
+        self.current_input = text
+
+        start_ns = self.session.start_ns or 0
+        timestamps = array("q", [start_ns + ts for ts in log.timestamps[begin:end]])
+        self.session.process(text, timestamps)
+        if self.highlighter is not None:
+            self.highlighter.render(self.session.scoring)
+        self.steps_done += 1
+        if self.on_step is not None:
+            self.on_step(self.session)
+
+    def run(self) -> float:
+        """全速回放全部剩余步骤，返回耗时（秒）"""
+        start = time.perf_counter()
+        while not self.finished:
+            self.step()
+        return time.perf_counter() - start
+
+    def play_blocking(self, speed: float = 1.0) -> None:
+        """按原始节奏回放（阻塞，用于命令行）"""
+        origin = time.perf_counter()
+        while not self.finished:
+            wait = origin + self.next_time_ns() / 1e9 / speed - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            self.step()
+
+    def play(self, root: Any, speed: float = 1.0, on_done: Callable[[], None] | None = None) -> None:
+        """在Tk事件循环中按原始节奏回放；按绝对目标时间调度，不累积误差"""
+        origin = time.perf_counter()
+
+        def tick():
+            self._after_id = None
+            # 补上所有已经到期的步骤
+            while not self.finished and origin + self.next_time_ns() / 1e9 / speed <= time.perf_counter():
+                self.step()
+            if self.finished:
+                if on_done is not None:
+                    on_done()
+                return
+            wait = origin + self.next_time_ns() / 1e9 / speed - time.perf_counter()
+            self._after_id = root.after(max(0, round(wait * 1000)), tick)
+
+        self._root = root
+        self._after_id = root.after(0, tick)
+
+    def stop(self) -> None:
+        """停止play()启动的回放"""
+        if self._after_id is not None:
+            self._root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def result(self) -> dict[str, Any]:
+        """回放得到的测试结果（用时按最后一次按键计算）"""
+        start_ns = self.session.start_ns or 0
+        return self.session.result(start_ns + self.log.elapsed_ns())
+
+    def verify(self, record: dict[str, Any]) -> list[str]:
+        """与保存的结果核对，返回不一致项的说明（全部一致时为空列表）"""
+        return compare_results(record, self.result())
+
+
+def compare_results(record: dict[str, Any], replayed: dict[str, Any]) -> list[str]:
+    """比较保存的结果和回放结果，返回不一致项的说明"""
+    problems = []
+    for key in ("correct_chars", "total_chars", "accuracy", "text_length"):
+        if key in record and record[key] != replayed[key]:
+            problems.append(f"{key}: 记录 {record[key]}，回放 {replayed[key]}")
+    if "wpm" in record and abs(record["wpm"] - replayed["wpm"]) > WPM_TOLERANCE:
+        problems.append(f"wpm: 记录 {record['wpm']}，回放 {replayed['wpm']}")
+    if "time" in record and abs(record["time"] - replayed["time"]) > TIME_TOLERANCE:
+        problems.append(f"time: 记录 {record['time']}，回放 {replayed['time']}")
+    return problems
+
+
+def find_record(history_file: str, log_path: str) -> dict[str, Any] | None:
+    """在历史记录中查找引用该按键日志的记录（只读，不修改历史记录文件）"""
+    from history_store import read_records
+
+    if not os.path.exists(history_file):
+        return None
+    name = os.path.basename(log_path)
+    for record in read_records(history_file):
+        if os.path.basename(record.get("keystroke_file") or "") == name:
+            return record
+    return None
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="回放按键日志并核对测试结果")
+    parser.add_argument("log", help="按键日志文件（.ksl）")
+    parser.add_argument("--history", default="typing_history.jsonl", help="用于核对结果的历史记录文件")
+    parser.add_argument("--realtime", action="store_true", help="按原始节奏回放")
+    parser.add_argument("--speed", type=float, default=1.0, help="实时回放的倍速")
+    parser.add_argument("--repeat", type=int, default=1, help="全速回放次数（用于吞吐量测试）")
+    parser.add_argument("--highlight", action="store_true", help="同时驱动高亮层（需要显示器）")
+    args = parser.parse_args()
+
+    highlighter = None
+    if args.highlight:
+        import tkinter as tk
+        from highlighter import TextHighlighter
+
+        root = tk.Tk()
+        root.withdraw()
+        highlighter = TextHighlighter(tk.Text(root))
+
+    replay = SessionReplay.from_file(args.log, highlighter=highlighter)
+    print(f"📼 {args.log}: {len(replay.log)} 个事件，{len(replay)} 步，"
+          f"文本 {len(replay.log.target_text)} 字，用时 {replay.log.elapsed_ns() / 1e9:.1f}s")
+
+    if args.realtime:
+        replay.start()
+        replay.play_blocking(args.speed)
+    else:
+        elapsed = 0.0
+        for _ in range(max(1, args.repeat)):
+            replay.start()
+            elapsed += replay.run()
+        events = len(replay.log) * max(1, args.repeat)
+        print(f"⚡ 全速回放 {max(1, args.repeat)} 次: {elapsed * 1000:.1f} ms，"
+              f"{events / elapsed:,.0f} 事件/秒，{elapsed / events * 1e6:.2f} µs/事件")
+    if highlighter is not None:
+        print(f"🖍️ 高亮Tcl调用: {highlighter.tcl_calls}，窗口移动 {highlighter.window_moves} 次")
+
+    result = replay.result()
+    print(f"📊 回放结果: WPM {result['wpm']} | 准确率 {result['accuracy']}% | "
+          f"正确 {result['correct_chars']}/{result['total_chars']} | 用时 {result['time']}s")
+
+    record = find_record(args.history, args.log)
+    if record is None:
+        print("ℹ️ 历史记录中没有找到对应的结果，跳过核对")
+        return
+    problems = replay.verify(record)
+    if problems:
+        print("❌ 与保存的结果不一致:")
+        for problem in problems:
+            print(f"   {problem}")
+        raise SystemExit(1)
+    print("✅ 与保存的结果一致")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 滑动窗口速度
+定长环形缓冲区保存最近的按键时间戳，据此计算最近N秒的瞬时速度；
+缓冲区写满后覆盖最旧的数据，长时间（马拉松）练习时内存占用保持不变。
+"""
+
+import time
+from array import array
+from typing import Iterator
+
+from scoring import compute_wpm
+
+
+class RingBuffer:
+    """定长环形缓冲区，元素类型由array的typecode决定"""
+
+    def __init__(self, capacity: int, typecode: str = "q"):
+        self.capacity = max(1, capacity)
+        self._data = array(typecode, bytes(array(typecode).itemsize * self.capacity))
+        self._head = 0  # 下一个写入位置
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, value) -> None:
+        self._data[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
+
+    def newest(self) -> Iterator:
+        """从最新到最旧遍历"""
+        index = self._head
+        for _ in range(self._size):
+            index = (index - 1) % self.capacity
+            yield self._data[index]
+
+    def values(self) -> list:
+        """从最旧到最新的全部元素"""
+        start = (self._head - self._size) % self.capacity
+        if start + self._size <= self.capacity:
+            return self._data[start:start + self._size].tolist()
+        return self._data[start:].tolist() + self._data[:self._head].tolist()
+
+
+class RollingRate:
+    """最近若干秒内的输入速度"""
+
+    def __init__(self, language: str = "english", capacity: int = 2048):
+        # 容量需覆盖最长窗口内的按键数：2048次按键足够10秒内每秒200键
+        self.language = language
+        self.start_ns: int | None = None
+        self.timestamps = RingBuffer(capacity, "q")
+
+    def reset(self, start_ns: int | None = None, language: str | None = None) -> None:
+        """开始新的测试；start_ns为测试开始时间，开始后不足一个窗口时按实际时长计算"""
+        if language is not None:
+            self.language = language
+        self.start_ns = start_ns
+        self.timestamps.clear()
+
+    def add(self, timestamp_ns: int) -> None:
+        """记录一个输入的字符（时间为perf_counter_ns）"""
+        self.timestamps.append(timestamp_ns)
+
+    def count(self, window: float, now_ns: int | None = None) -> int:
+        """最近window秒内输入的字符数"""
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        cutoff = now_ns - int(window * 1e9)
+        count = 0
+        for timestamp in self.timestamps.newest():
+            if timestamp < cutoff:
+                break
+            count += 1
+        return count
+
+    def wpm(self, window: float = 5.0, now_ns: int | None = None) -> int:
+        """最近window秒的速度，单位与总体WPM一致（英文每5个字符算一个词，中文按字计）"""
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        if self.start_ns is not None:
+            window = min(window, (now_ns - self.start_ns) / 1e9)
+        return compute_wpm(self.count(window, now_ns), window, self.language)
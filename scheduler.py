@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 输入调度
+把高频的键盘事件合并为每个显示帧最多处理一次，
+同时保留每次按键的精确时间戳供计分使用；以及不漂移的统计刷新定时器。
+"""
+
+import time
+from array import array
+from typing import Any, Callable
+
+from rolling import RingBuffer
+
+
+class FrameScheduler:
+    """帧率限制的输入合并调度器"""
+
+    def __init__(self, root: Any, callback: Callable[[array], None], fps: int = 60):
+        self.root = root
+        self.callback = callback
+        self.set_fps(fps)
+        self._after_id: str | None = None
+        self._last_flush = 0.0
+        # 自上次处理以来的按键时间戳（perf_counter_ns）
+        self._pending = array("q")
+        self.dirty = False
+
+    def set_fps(self, fps: int) -> None:
+        """设置每秒最多处理次数"""
+        fps = max(1, int(fps))
+        self.interval = 1.0 / fps
+
+    def mark_dirty(self, timestamp: int | None = None) -> None:
+        """标记输入已变化；传入timestamp表示这是一次需要记录时间的按键"""
+        if timestamp is not None:
+            self._pending.append(timestamp)
+        self.dirty = True
+        if self._after_id is None:
+            # 距上次处理已超过一帧则立即处理，否则等到下一帧
+            wait = self.interval - (time.perf_counter() - self._last_flush)
+            delay_ms = max(0, int(wait * 1000))
+            self._after_id = self.root.after(delay_ms, self.flush)
+
+    def flush(self) -> None:
+        """处理累积的输入变化"""
+        self._after_id = None
+        if not self.dirty:
+            return
+        self.dirty = False
+        self._last_flush = time.perf_counter()
+        timestamps = self._pending
+        self._pending = array("q")
+        self.callback(timestamps)
+
+    def cancel(self) -> None:
+        """取消尚未处理的输入"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._pending = array("q")
+        self.dirty = False
+
+
+class StatsTicker:
+    """按固定频率刷新统计的定时器。
+
+    以perf_counter为时基，每次按"起点 + 第n拍"计算下一次的目标时间，
+    回调本身的延迟不会累积成漂移；落后超过一拍时直接跳到最近的一拍。
+    每一拍实际触发时间与目标时间之差（抖动）保存在定长缓冲区中供诊断。
+    """
+
+    def __init__(self, root: Any, callback: Callable[[], None], rate: float = 10.0, jitter_samples: int = 256):
+        self.root = root
+        self.callback = callback
+        self.set_rate(rate)
+        self.ticks = 0
+        self.skipped = 0
+        self.jitter = RingBuffer(jitter_samples, "d")  # 毫秒
+        self._origin = 0.0
+        self._target = 0.0
+        self._after_id: str | None = None
+
+    def set_rate(self, rate: float) -> None:
+        """设置每秒刷新次数"""
+        self.rate = max(0.5, float(rate))
+        self.interval = 1.0 / self.rate
+
+    @property
+    def running(self) -> bool:
+        return self._after_id is not None
+
+    def start(self) -> None:
+        """从现在开始计拍，并立即触发第一拍"""
+        self.stop()
+        self.ticks = 0
+        self.skipped = 0
+        self.jitter.clear()
+        self._origin = time.perf_counter()
+        self._target = self._origin
+        self._after_id = self.root.after(0, self._tick)
+
+    def stop(self) -> None:
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self) -> None:
+        now = time.perf_counter()
+        self.jitter.append((now - self._target) * 1000)
+        self.callback()
+        if self._after_id is None:
+            # 回调中调用了stop()
+            return
+
+        self.ticks += 1
+        next_tick = self._origin + self.ticks * self.interval
+        if next_tick < now:
+            # 落后了一拍以上，跳过错过的拍子而不是连续补发
+            behind = int((now - self._origin) / self.interval) + 1
+            self.skipped += behind - self.ticks
+            self.ticks = behind
+            next_tick = self._origin + self.ticks * self.interval
+        self._target = next_tick
+        delay_ms = max(0, round((next_tick - time.perf_counter()) * 1000))
+        self._after_id = self.root.after(delay_ms, self._tick)
+
+    def jitter_stats(self) -> dict[str, float]:
+        """最近若干拍的抖动（毫秒）：平均值、p95和最大值"""
+        samples = sorted(self.jitter.values())
+        if not samples:
+            return {"mean": 0.0, "p95": 0.0, "max": 0.0, "samples": 0}
+        return {
+            "mean": sum(samples) / len(samples),
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            "max": samples[-1],
+            "samples": len(samples),
+        }
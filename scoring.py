@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 增量计分引擎
+不依赖Tk，可单独进行单元测试和性能测试
+
+每次按键只按编辑增量更新逐字符正确性位图和正确字符计数，
+在末尾输入/退格时每次按键为O(1)，不再随文本长度线性增长。
+"""
+
+
+def compute_wpm(correct_chars: int, elapsed_time: float, language: str) -> int:
+    """根据正确字符数和用时计算WPM"""
+    if elapsed_time <= 0:
+        return 0
+    if language == "chinese":
+        # 中文按字符计算，每个汉字算作一个词
+        return int(correct_chars / (elapsed_time / 60))
+    # 英文按标准计算，5个字符算作一个词
+    return int((correct_chars / 5) / (elapsed_time / 60))
+
+
+def compute_accuracy(correct_chars: int, total_chars: int) -> int:
+    """计算准确率（百分比）"""
+    if total_chars > 0:
+        return int((correct_chars / total_chars) * 100)
+    return 100
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    """二分查找两个字符串的公共前缀长度（切片比较在C层完成）"""
+    lo, hi = 0, min(len(a), len(b))
+    if a[:hi] == b[:hi]:
+        return hi
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def diff_edit(old: str, new: str) -> tuple[int, int, str]:
+    """计算把old变为new的最小单段编辑: (起始位置, 删除长度, 插入文本)"""
+    # 快速路径：末尾追加或末尾退格
+    if new.startswith(old):
+        return len(old), 0, new[len(old):]
+    if old.startswith(new):
+        return len(new), len(old) - len(new), ""
+
+    start = _common_prefix_length(old, new)
+    old_tail = old[start:]
+    new_tail = new[start:]
+    # 公共后缀（不与公共前缀重叠）
+    suffix = _common_prefix_length(old_tail[::-1], new_tail[::-1])
+    return start, len(old_tail) - suffix, new_tail[:len(new_tail) - suffix]
+
+
+class ScoringEngine:
+    """增量计分引擎"""
+
+    def __init__(self, target_text: str = "", language: str = "english"):
+        self.target_text = target_text
+        self.language = language
+        self.user_input = ""
+        self.correct_chars = 0
+        # 逐位置正确性位图，1表示该位置输入正确
+        self._bitmap = bytearray(len(target_text))
+        # 最近一次编辑影响的范围 (起始位置, 旧输入长度, 新输入长度)
+        self.last_edit: tuple[int, int, int] = (0, 0, 0)
+        # 每次状态变化递增，供高亮层判断是否需要重新渲染
+        self.version = 0
+
+    def reset(self, target_text: str | None = None, language: str | None = None) -> None:
+        """重置引擎，可同时更换目标文本和语言"""
+        if target_text is not None:
+            self.target_text = target_text
+        if language is not None:
+            self.language = language
+        self.user_input = ""
+        self.correct_chars = 0
+        self._bitmap = bytearray(len(self.target_text))
+        self.last_edit = (0, 0, 0)
+        self.version += 1
+
+    @property
+    def total_chars(self) -> int:
+        return len(self.user_input)
+
+    @property
+    def accuracy(self) -> int:
+        return compute_accuracy(self.correct_chars, self.total_chars)
+
+    def wpm(self, elapsed_time: float) -> int:
+        """按给定用时计算WPM"""
+        return compute_wpm(self.correct_chars, elapsed_time, self.language)
+
+    def is_correct(self, index: int) -> bool:
+        """判断指定位置的输入是否正确"""
+        return index < len(self._bitmap) and self._bitmap[index] == 1
+
+    def iter_runs(self, start: int, stop: int):
+        """按正确/错误合并[start, stop)区间内的连续字符，产出(起点, 终点, 是否正确)"""
+        bitmap = self._bitmap
+        stop = min(stop, len(bitmap))
+        i = start
+        while i < stop:
+            correct = bitmap[i] == 1
+            # bytearray.find在C层扫描，找到下一个状态翻转的位置
+            j = bitmap.find(0 if correct else 1, i, stop)
+            if j == -1:
+                j = stop
+            yield i, j, correct
+            i = j
+
+    def update(self, new_input: str) -> tuple[int, int, str]:
+        """用完整的新输入更新状态，内部转换为单段编辑增量"""
+        if new_input == self.user_input:
+            return len(new_input), 0, ""
+        edit = diff_edit(self.user_input, new_input)
+        # 已有完整的新输入，直接使用，避免重新拼接字符串
+        self._apply(edit[0], edit[1], len(edit[2]), new_input)
+        return edit
+
+    def insert(self, position: int, text: str) -> None:
+        """在指定位置插入文本"""
+        self.apply_edit(position, 0, text)
+
+    def delete(self, position: int, count: int = 1) -> None:
+        """删除指定位置开始的count个字符"""
+        self.apply_edit(position, count, "")
+
+    def replace(self, position: int, count: int, text: str) -> None:
+        """替换指定位置开始的count个字符"""
+        self.apply_edit(position, count, text)
+
+    def apply_edit(self, position: int, removed: int, inserted: str) -> None:
+        """应用一次编辑: 从position处删除removed个字符并插入inserted"""
+        old_len = len(self.user_input)
+        if position < 0 or position > old_len or removed < 0 or position + removed > old_len:
+            raise ValueError(f"无效的编辑: position={position}, removed={removed}, 输入长度={old_len}")
+        new_input = self.user_input[:position] + inserted + self.user_input[position + removed:]
+        self._apply(position, removed, len(inserted), new_input)
+
+    def _apply(self, position: int, removed: int, inserted_len: int, new_input: str) -> None:
+        """更新输入并重算受影响区间"""
+        old_len = len(self.user_input)
+        self.user_input = new_input
+        new_len = len(new_input)
+
+        # 长度不变的替换只影响被替换的区间，否则其后所有字符都发生了位移
+        if inserted_len == removed:
+            end_old = end_new = position + removed
+        else:
+            end_old, end_new = old_len, new_len
+
+        self._rescore(position, end_old, end_new)
+        self.last_edit = (position, old_len, new_len)
+        self.version += 1
+
+    def _rescore(self, start: int, end_old: int, end_new: int) -> None:
+        """重新计算[start, end)区间的正确性位图"""
+        bitmap = self._bitmap
+        target = self.target_text
+        limit = len(bitmap)
+
+        # 减去旧区间中的正确字符
+        if start < limit:
+            old_stop = min(end_old, limit)
+            self.correct_chars -= bitmap.count(1, start, old_stop)
+            bitmap[start:old_stop] = bytes(old_stop - start)
+
+        # 重新比对新区间
+        new_stop = min(end_new, limit)
+        user_input = self.user_input
+        correct = 0
+        for i in range(start, new_stop):
+            if user_input[i] == target[i]:
+                bitmap[i] = 1
+                correct += 1
+        self.correct_chars += correct
+
+    def stats(self, elapsed_time: float) -> dict[str, int]:
+        """返回与界面统计一致的数值"""
+        return {
+            "wpm": self.wpm(elapsed_time),
+            "accuracy": self.accuracy,
+            "correct_chars": self.correct_chars,
+            "total_chars": self.total_chars,
+        }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 测试会话引擎
+一次测试的全部状态：目标文本、计时、增量计分和按键日志。
+不依赖任何GUI库，CustomTkinter前端和无界面的性能测试、回放都通过它驱动。
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Any, Sequence
+
+from keystroke_log import KeystrokeLog
+from scoring import ScoringEngine
+
+
+class TypingSession:
+    """一次打字测试"""
+
+    def __init__(self, text: str = "", language: str = "english"):
+        self.text = text
+        self.language = language
+        self.scoring = ScoringEngine(text, language)
+        self.keystroke_log = KeystrokeLog(text, language)
+        self.start_ns: int | None = None
+        self.wpm = 0
+        # 最近一次处理的编辑 (位置, 删除长度, 插入文本)
+        self.last_edit: tuple[int, int, str] = (0, 0, "")
+
+    def load(self, text: str, language: str) -> None:
+        """更换目标文本和语言，并重置状态"""
+        self.text = text
+        self.language = language
+        self.reset()
+
+    def reset(self) -> None:
+        """回到未开始的状态"""
+        self.start_ns = None
+        self.wpm = 0
+        self.last_edit = (0, 0, "")
+        self.scoring.reset(self.text, self.language)
+
+    @property
+    def active(self) -> bool:
+        return self.start_ns is not None
+
+    def start(self, start_ns: int | None = None) -> None:
+        """开始计时（时间为perf_counter_ns）"""
+        self.reset()
+        self.start_ns = time.perf_counter_ns() if start_ns is None else start_ns
+        self.keystroke_log.reset(self.start_ns, self.text, self.language)
+
+    def elapsed(self, now_ns: int | None = None) -> float:
+        """已用时间（秒）"""
+        if self.start_ns is None:
+            return 0.0
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        return max(0, now_ns - self.start_ns) / 1e9
+
+    @property
+    def user_input(self) -> str:
+        return self.scoring.user_input
+
+    @property
+    def correct_chars(self) -> int:
+        return self.scoring.correct_chars
+
+    @property
+    def total_chars(self) -> int:
+        return self.scoring.total_chars
+
+    @property
+    def accuracy(self) -> int:
+        return self.scoring.accuracy
+
+    @property
+    def progress(self) -> int:
+        """完成进度（百分比）"""
+        if not self.text:
+            return 0
+        return min(int(self.total_chars / len(self.text) * 100), 100)
+
+    @property
+    def finished(self) -> bool:
+        return self.total_chars >= len(self.text)
+
+    def process(self, new_input: str, timestamps: Sequence[int] = ()) -> tuple[int, int, str]:
+        """处理新的完整输入；timestamps为产生这些变化的按键时间（perf_counter_ns）"""
+        old_input = self.scoring.user_input
+        self.last_edit = self.scoring.update(new_input)
+
+        # 使用最后一次按键的精确时间计算速度
+        elapsed_time = self.elapsed(timestamps[-1] if timestamps else None)
+        if elapsed_time > 0:
+            self.wpm = self.scoring.wpm(elapsed_time)
+
+        if self.start_ns is not None:
+            self.keystroke_log.record_edit(old_input, *self.last_edit, timestamps)
+        return self.last_edit
+
+    def result(self, end_ns: int | None = None) -> dict[str, Any]:
+        """生成历史记录格式的测试结果"""
+        return {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "wpm": self.wpm,
+            "accuracy": self.accuracy,
+            "time": int(self.elapsed(end_ns)),
+            "text_length": len(self.text),
+            "language": self.language,
+            "correct_chars": self.correct_chars,
+            "total_chars": self.total_chars
+        }
+
+    def finish(self, end_ns: int | None = None) -> dict[str, Any]:
+        """结束测试并返回结果"""
+        result = self.result(end_ns)
+        self.start_ns = None
+        return result
+
+    def save_keystroke_log(self, directory: str) -> str:
+        """把按键日志写入目录，返回文件路径"""
+        log_name = datetime.now().strftime("%Y%m%d_%H%M%S_%f") + ".ksl"
+        log_path = os.path.join(directory, log_name)
+        self.keystroke_log.save(log_path)
+        return log_path
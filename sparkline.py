@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 实时速度折线图
+在tk.Canvas上绘制最近若干个速度采样。画布元素只在创建时生成一次，
+之后每次刷新只用coords/itemconfigure修改坐标和文字，不删除重建。
+"""
+
+import tkinter as tk
+from typing import Sequence
+
+from rolling import RingBuffer
+
+LINE_COLOR = "#4caf50"
+TEXT_COLOR = "#aaaaaa"
+BACKGROUND = "#2b2b2b"
+
+
+class Sparkline:
+    """定长的速度折线图"""
+
+    def __init__(self, canvas: tk.Canvas, points: int = 60, width: int = 160, height: int = 36):
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.samples = RingBuffer(points, "d")
+        canvas.configure(width=width, height=height, bg=BACKGROUND, highlightthickness=0)
+        self._line = canvas.create_line(0, height - 1, width, height - 1, fill=LINE_COLOR, width=2)
+        self._label = canvas.create_text(width - 2, 2, anchor="ne", text="", fill=TEXT_COLOR, font=("Consolas", 9))
+        self._last_coords: list[float] = []
+        self._last_text = ""
+
+    def add(self, value: float) -> None:
+        """追加一个采样并重绘"""
+        self.samples.append(value)
+        self.redraw()
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self.redraw()
+
+    def redraw(self) -> None:
+        values = self.samples.values()
+        coords = self._coords(values)
+        if coords != self._last_coords:
+            self.canvas.coords(self._line, *coords)
+            self._last_coords = coords
+        text = f"峰值 {max(values):.0f}" if values else ""
+        if text != self._last_text:
+            self.canvas.itemconfigure(self._label, text=text)
+            self._last_text = text
+
+    def _coords(self, values: Sequence[float]) -> list[float]:
+        """采样映射为画布坐标（最新的采样在最右边），至少两个点"""
+        bottom = self.height - 2
+        if len(values) < 2:
+            return [0, bottom, self.width, bottom]
+        peak = max(max(values), 1.0)
+        step = self.width / (self.samples.capacity - 1)
+        x0 = self.width - step * (len(values) - 1)
+        coords: list[float] = []
+        for i, value in enumerate(values):
+            # 顶部留出显示峰值文字的空间
+            coords.append(round(x0 + i * step, 1))
+            coords.append(round(bottom - value / peak * (bottom - 14), 1))
+        return coords
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 追加式历史记录存储的测试
+覆盖写入与按序号/分页读取、残缺末行截断、索引重建、旧版JSON迁移和汇总统计的恢复。
+
+用法: python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import STATS_SAVE_INTERVAL, HistoryStore, read_records
+
+
+def make_record(i: int) -> dict:
+    return {"wpm": i, "accuracy": 90 + i % 10, "time": 30, "language": "english" if i % 2 else "chinese",
+            "text_length": 100, "date": f"2026-10-{1 + i % 28:02d} 10:00:00"}
+
+
+class HistoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "typing_history.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open_store(self) -> HistoryStore:
+        return HistoryStore(self.path, None)
+
+    def fill(self, count: int) -> HistoryStore:
+        store = self.open_store()
+        for i in range(count):
+            store.append(make_record(i))
+        return store
+
+    def test_append_and_read(self):
+        store = self.fill(25)
+        store.extend(make_record(i) for i in range(25, 30))
+        store = self.open_store()
+        self.assertEqual(len(store), 30)
+        self.assertEqual(store.get(7)["wpm"], 7)
+        self.assertEqual([r["wpm"] for r in store.read_range(28, 40)], [28, 29])
+        self.assertEqual([r["wpm"] for r in store.recent(3)], [29, 28, 27])
+        self.assertEqual(store.page_count(20), 2)
+        self.assertEqual([r["wpm"] for r in store.page(1, 20)], list(range(9, -1, -1)))
+        self.assertEqual([r["wpm"] for r in store.iter_records()], list(range(30)))
+
+    def test_truncated_tail_is_dropped(self):
+        self.fill(5).close()
+        with open(self.path, "ab") as f:
+            f.write(b'{"wpm": 99, "accur')
+        store = self.open_store()
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.get(4)["wpm"], 4)
+        with open(self.path, "rb") as f:
+            self.assertTrue(f.read().endswith(b"}\n"))
+        # 截断后可以继续追加
+        store.append(make_record(5))
+        self.assertEqual([r["wpm"] for r in self.open_store().iter_records()], list(range(6)))
+
+    def test_index_rebuilt_when_inconsistent(self):
+        self.fill(10).close()
+        # 数据已落盘但索引没写完（崩溃发生在两次写入之间）
+        with open(self.path, "ab") as f:
+            f.write((json.dumps(make_record(10)) + "\n").encode("utf-8"))
+        with open(self.path + ".idx", "ab") as f:
+            f.write(b"\x01\x02\x03")
+        store = self.open_store()
+        self.assertEqual(len(store), 11)
+        self.assertEqual(store.get(10)["wpm"], 10)
+
+        os.remove(self.path + ".idx")
+        store = self.open_store()
+        self.assertEqual(len(store), 11)
+        self.assertEqual([r["wpm"] for r in store.recent(2)], [10, 9])
+
+    def test_legacy_json_migrated(self):
+        legacy_path = os.path.join(self.tmp.name, "typing_history.json")
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump([make_record(i) for i in range(4)], f)
+        store = HistoryStore(self.path, legacy_path)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.aggregates.overall.count, 4)
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + ".bak"))
+        # 再次打开不会重复迁移
+        self.assertEqual(len(HistoryStore(self.path, legacy_path)), 4)
+
+    def test_aggregates_catch_up_after_unclean_exit(self):
+        count = STATS_SAVE_INTERVAL + 7
+        self.fill(count)  # 不调用close，模拟意外退出
+        store = self.open_store()
+        self.assertEqual(store.aggregates.records, count)
+        self.assertEqual(store.aggregates.overall.count, count)
+        self.assertEqual(store.aggregates.overall.wpm_sum, sum(range(count)))
+        self.assertEqual(store.aggregates.language("english").count, count // 2)
+
+    def test_aggregates_rebuilt_when_sidecar_ahead(self):
+        self.fill(5).close()
+        # 数据文件被换成了更短的版本
+        with open(self.path, "rb") as f:
+            lines = f.readlines()
+        with open(self.path, "wb") as f:
+            f.writelines(lines[:3])
+        os.remove(self.path + ".idx")
+        store = self.open_store()
+        self.assertEqual(store.aggregates.overall.count, 3)
+
+    def test_read_records_does_not_create_files(self):
+        self.fill(3).close()
+        other = os.path.join(self.tmp.name, "copy.jsonl")
+        with open(self.path, "rb") as src, open(other, "wb") as dst:
+            dst.write(src.read() + b"not json\n")
+        self.assertEqual([r["wpm"] for r in read_records(other)], [0, 1, 2])
+        self.assertFalse(os.path.exists(other + ".idx"))
+        self.assertFalse(os.path.exists(other + ".stats.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
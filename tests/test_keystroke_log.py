@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按键事件日志的测试
+保存后再读取必须得到相同的事件、目标文本和语言；损坏或不完整的文件应抛出ValueError。
+
+用法: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keystroke_log import HEADER, OP_DELETE, OP_INSERT, KeystrokeLog
+from session import TypingSession
+
+
+def make_log(target: str, language: str) -> KeystrokeLog:
+    log = KeystrokeLog(target, language)
+    log.reset(1_000_000)
+    log.record_edit("", 0, 0, target[:3], [1_100_000, 1_200_000, 1_300_000])
+    # 打错一个字符再退格改正
+    typed = target[:3]
+    log.record_edit(typed, 3, 0, "x", [1_400_000])
+    log.record_edit(typed + "x", 3, 1, "", [1_500_000])
+    log.record_edit(typed, 3, 0, target[3:], [1_600_000 + i for i in range(len(target) - 3)])
+    return log
+
+
+class KeystrokeLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "logs", "test.ksl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        for target, language in (("hello world", "english"), ("书山有路勤为径，学海无涯。", "chinese")):
+            log = make_log(target, language)
+            log.save(self.path)
+            loaded = KeystrokeLog.load(self.path)
+            self.assertEqual(loaded.target_text, target)
+            self.assertEqual(loaded.language, language)
+            self.assertEqual(loaded.wall_start_ns, log.wall_start_ns)
+            self.assertEqual(list(loaded.events()), list(log.events()))
+            self.assertEqual(loaded.elapsed_ns(), log.elapsed_ns())
+
+    def test_recorded_events(self):
+        events = list(make_log("abcd", "english").events())
+        self.assertEqual(events[:5], [
+            (100_000, OP_INSERT, 0, "a"), (200_000, OP_INSERT, 1, "b"), (300_000, OP_INSERT, 2, "c"),
+            (400_000, OP_INSERT, 3, "x"), (500_000, OP_DELETE, 3, "x"),
+        ])
+        self.assertEqual(events[5], (600_000, OP_INSERT, 3, "d"))
+
+    def test_empty_log_round_trip(self):
+        KeystrokeLog("abc").save(self.path)
+        loaded = KeystrokeLog.load(self.path)
+        self.assertEqual(len(loaded), 0)
+        self.assertEqual(loaded.target_text, "abc")
+
+    def test_session_saves_log(self):
+        session = TypingSession()
+        session.load("hi", "english")
+        session.start()
+        session.process("hi")
+        path = session.save_keystroke_log(os.path.dirname(self.path))
+        self.assertEqual("".join(char for _, _, _, char in KeystrokeLog.load(path).events()), "hi")
+
+    def test_invalid_files_rejected(self):
+        make_log("hello world", "english").save(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        cases = {
+            "empty": b"",
+            "short header": data[:HEADER.size - 1],
+            "bad magic": b"XXXX" + data[4:],
+            "truncated columns": data[:HEADER.size + 20],
+            "truncated text": data[:-3],
+        }
+        for name, content in cases.items():
+            with open(self.path, "wb") as f:
+                f.write(content)
+            with self.assertRaises(ValueError, msg=name):
+                KeystrokeLog.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 按薄弱字符选取文本的测试
+干扰文本只包含与薄弱字符码点模32相同的字符（如'n'和'.'），选出的文本必须真正包含薄弱字符。
+
+用法: python -m unittest discover tests
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import CorpusFile
+from passage_selector import FeatureTable, PassageSelector
+
+WEAK_HANZI = "熟"
+# 与薄弱汉字码点模32相同的汉字
+DECOY_HANZI = chr(ord(WEAK_HANZI) + 32)
+
+
+def make_texts() -> dict[str, list[str]]:
+    english = [f"a.b.c.d.e.f.g.{i}" for i in range(60)] + ["on and on", "nine lines", "the thin path"]
+    chinese = [DECOY_HANZI * 10 + f"第{i}段" for i in range(60)] + ["熟能生巧，勤学苦练"]
+    return {"english": english, "chinese": chinese}
+
+
+class WeakCharSelectionTest(unittest.TestCase):
+    """内置文本（纯Python）和文本库（特征文件）两种特征表都要选中包含薄弱字符的文本"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "corpus.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for language, items in make_texts().items():
+                for text in items:
+                    f.write(json.dumps({"text": text, "language": language}, ensure_ascii=False) + "\n")
+        self.corpus = CorpusFile(path)
+        self.selectors = {
+            "builtin": PassageSelector([FeatureTable.from_texts(make_texts())], rng=random.Random(0)),
+            "corpus": PassageSelector([FeatureTable.from_corpus(self.corpus)], rng=random.Random(0)),
+        }
+
+    def tearDown(self):
+        for selector in self.selectors.values():
+            selector.close()
+        self.corpus.close()
+        self.tmp.cleanup()
+
+    def assert_picks_contain(self, language: str, weak_chars: dict[str, float], expected: str):
+        for name, selector in self.selectors.items():
+            for _ in range(50):
+                text = selector.select(language, weak_chars=weak_chars)
+                self.assertIn(expected, text.lower(), f"{name}: {text!r}")
+
+    def test_weak_ascii_letter(self):
+        self.assert_picks_contain("english", {"n": 1.0}, "n")
+
+    def test_weak_bigram(self):
+        self.assert_picks_contain("english", {"th": 1.0}, "th")
+
+    def test_weak_hanzi(self):
+        self.assert_picks_contain("chinese", {WEAK_HANZI: 1.0}, WEAK_HANZI)
+
+
+if __name__ == "__main__":
+    unittest.main()
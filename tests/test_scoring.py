@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+打字速度检测器 - 增量计分引擎的测试
+随机编辑序列下，增量结果必须与逐字符重新比对（原calculate_stats的做法）完全一致。
+
+用法: python -m unittest discover tests
+"""
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring import ScoringEngine, diff_edit
+
+TARGETS = {
+    "english": "The quick brown fox jumps over the lazy dog.\nPractice makes perfect.",
+    "chinese": "书山有路勤为径，学海无涯苦作舟。\n天行健，君子以自强不息。",
+}
+
+
+def brute_force_correct(user_input: str, target: str) -> int:
+    return sum(1 for i in range(min(len(user_input), len(target))) if user_input[i] == target[i])
+
+
+def random_edit(rng: random.Random, current: str, target: str) -> str:
+    """模拟打字：大多在末尾输入（偶尔打错）或退格，也有中间修改和粘贴"""
+    kind = rng.random()
+    position = len(current)
+    if kind < 0.55:
+        char = target[position] if position < len(target) and rng.random() < 0.9 else rng.choice("xq，。 ")
+        return current + char
+    if kind < 0.75:
+        return current[:-1]
+    if kind < 0.85 and current:
+        i = rng.randrange(len(current))
+        return current[:i] + rng.choice("ab书") + current[i + 1:]
+    if kind < 0.95:
+        i = rng.randrange(len(current) + 1)
+        j = rng.randrange(i, len(current) + 1)
+        return current[:i] + "".join(rng.choice(target + "xz") for _ in range(rng.randint(0, 4))) + current[j:]
+    # 全选后重新输入或粘贴更长的文本
+    return target[:rng.randint(0, len(target) + 5)]
+
+
+class ScoringEngineTest(unittest.TestCase):
+
+    def assert_matches_oracle(self, engine: ScoringEngine, user_input: str, target: str):
+        self.assertEqual(engine.user_input, user_input)
+        self.assertEqual(engine.correct_chars, brute_force_correct(user_input, target))
+        self.assertEqual(engine.total_chars, len(user_input))
+        for i in range(len(target)):
+            self.assertEqual(engine.is_correct(i), i < len(user_input) and user_input[i] == target[i], i)
+
+    def test_update_matches_full_rescan(self):
+        for language, target in TARGETS.items():
+            for seed in range(20):
+                rng = random.Random(seed)
+                engine = ScoringEngine(target, language)
+                user_input = ""
+                for _ in range(300):
+                    user_input = random_edit(rng, user_input, target)
+                    engine.update(user_input)
+                    self.assert_matches_oracle(engine, user_input, target)
+
+    def test_apply_edit_matches_full_rescan(self):
+        target = TARGETS["english"]
+        rng = random.Random(1)
+        engine = ScoringEngine(target)
+        user_input = ""
+        for _ in range(500):
+            position = rng.randrange(len(user_input) + 1)
+            removed = rng.randrange(len(user_input) - position + 1)
+            inserted = "".join(rng.choice(target) for _ in range(rng.randint(0, 3)))
+            engine.apply_edit(position, removed, inserted)
+            user_input = user_input[:position] + inserted + user_input[position + removed:]
+            self.assert_matches_oracle(engine, user_input, target)
+
+    def test_invalid_edit_rejected(self):
+        engine = ScoringEngine("abc")
+        engine.update("ab")
+        with self.assertRaises(ValueError):
+            engine.apply_edit(1, 5, "")
+        self.assertEqual(engine.user_input, "ab")
+
+    def test_diff_edit_is_minimal_single_edit(self):
+        rng = random.Random(2)
+        alphabet = "aab书 "
+        for _ in range(2000):
+            old = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            new = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            start, removed, inserted = diff_edit(old, new)
+            self.assertEqual(old[:start] + inserted + old[start + removed:], new)
+            # 编辑区间两侧是最长的公共前缀/后缀
+            prefix = 0
+            while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+                prefix += 1
+            self.assertEqual(start, prefix)
+            self.assertEqual(removed - len(inserted), len(old) - len(new))
+            if removed and inserted:
+                self.assertNotEqual(old[start + removed - 1], inserted[-1])
+
+    def test_stats(self):
+        engine = ScoringEngine("hello world")
+        engine.update("hellx")
+        self.assertEqual(engine.stats(60), {"wpm": 0, "accuracy": 80, "correct_chars": 4, "total_chars": 5})
+        engine.reset("你好", "chinese")
+        engine.update("你好")
+        self.assertEqual(engine.stats(60)["wpm"], 2)
+        self.assertEqual(engine.stats(0)["wpm"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()